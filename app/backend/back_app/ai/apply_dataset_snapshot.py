@@ -0,0 +1,85 @@
+"""
+Bring a local copy of the training dataset up to date from snapshot archives.
+
+Archives come from GET /ai/export/snapshots/{version}. A full snapshot
+(base_version null in its manifest.json) is unpacked into an empty
+directory; each delta must be applied on top of its base_version: its files
+overwrite the local ones, then the samples it lists as removed are deleted.
+The applied manifest is kept as <dataset>/manifest.json, so deltas can be
+applied one run at a time, in any number of runs.
+
+    python apply_dataset_snapshot.py datasets/aerowaste_yolo aerowaste_yolo_v1.zip
+    python apply_dataset_snapshot.py datasets/aerowaste_yolo aerowaste_yolo_v2.zip aerowaste_yolo_v3.zip
+"""
+import argparse
+import json
+import shutil
+import sys
+import zipfile
+from pathlib import Path, PurePosixPath
+
+SPLITS = ("train", "val")
+
+
+def read_manifest(archive: zipfile.ZipFile) -> dict:
+    try:
+        return json.loads(archive.read("manifest.json"))
+    except KeyError:
+        raise ValueError(f"{archive.filename} has no manifest.json; download it from /ai/export/snapshots")
+
+
+def apply_archive(dataset: Path, path: Path) -> dict:
+    state_path = dataset / "manifest.json"
+    current = json.loads(state_path.read_text()) if state_path.exists() else None
+
+    with zipfile.ZipFile(path) as archive:
+        manifest = read_manifest(archive)
+        if manifest["base_version"] is None:
+            if current is not None:
+                raise ValueError(f"{dataset} already holds version {current['version']}; unpack full snapshots into an empty directory")
+        elif current is None or current["version"] != manifest["base_version"]:
+            have = "nothing" if current is None else f"version {current['version']}"
+            raise ValueError(f"{path.name} is a delta on version {manifest['base_version']}, but {dataset} holds {have}")
+
+        for member in archive.infolist():
+            name = PurePosixPath(member.filename)
+            if member.filename == "manifest.json" or name.is_absolute() or ".." in name.parts:
+                continue
+            target = dataset / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Member by member, so archives of any size unpack in constant memory
+            with archive.open(member) as source, open(target, "wb") as out:
+                shutil.copyfileobj(source, out, 1024 * 1024)
+
+    for removed in manifest["removed"]:
+        for split in SPLITS:
+            for folder in ("images", "labels"):
+                for stale in (dataset / split / folder).glob(f"{removed['sample']}.*"):
+                    stale.unlink()
+
+    state_path.write_text(json.dumps(manifest, indent=2) + "\n")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", type=Path, help="Local dataset directory")
+    parser.add_argument("archives", type=Path, nargs="+", help="Snapshot archives, oldest first")
+    args = parser.parse_args()
+
+    args.dataset.mkdir(parents=True, exist_ok=True)
+    for path in args.archives:
+        try:
+            manifest = apply_archive(args.dataset, path)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        print(
+            f"✅ {path.name}: now at version {manifest['version']} "
+            f"(+{manifest['added']} added, {manifest['changed']} changed, {len(manifest['removed'])} removed)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
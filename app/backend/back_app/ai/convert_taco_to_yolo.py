@@ -1,7 +1,26 @@
+"""
+Convert the TACO dataset (COCO annotations) to the YOLO layout the detector trains on.
+
+Each image is assigned to train or val by a seeded hash of its file name, so
+the split does not depend on annotation order and survives the dataset
+growing. Images are hardlinked into the output (reflinked, then copied, where
+the filesystem does not allow it) and conversion fans out over a process pool.
+Images whose label file and linked image are already up to date are skipped,
+so reruns only touch what changed.
+
+    python convert_taco_to_yolo.py
+    python convert_taco_to_yolo.py --val-percent 20 --seed 0 --workers 8
+"""
+import argparse
+import hashlib
 import json
 import os
 import shutil
-from collections import defaultdict
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 # === Always resolve base path from current script location ===
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -12,82 +31,200 @@ ANNOTATION_FILE = os.path.join(BASE_DIR, 'annotations.json')
 IMAGE_ROOT_DIR = os.path.join(BASE_DIR, 'data')
 OUTPUT_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', 'datasets', 'taco_yolo'))
 
-# === Output folder structure ===
-for folder in ["train/images", "train/labels", "val/images", "val/labels"]:
-    os.makedirs(os.path.join(OUTPUT_DIR, folder), exist_ok=True)
-
-# === Load TACO annotations ===
-if not os.path.exists(ANNOTATION_FILE):
-    raise FileNotFoundError(f"Could not find annotation file at: {ANNOTATION_FILE}")
-
-with open(ANNOTATION_FILE, 'r') as f:
-    data = json.load(f)
-
-# === Create category mapping ===
-categories = {c["id"]: c["name"] for c in data["categories"]}
-category_map = {name: idx for idx, name in enumerate(sorted(set(categories.values())))}
-
-# Save class list
-with open(os.path.join(OUTPUT_DIR, "classes.txt"), "w") as f:
-    for name in category_map:
-        f.write(name + "\n")
-
-# === Group annotations by image_id ===
-annotations_by_image = defaultdict(list)
-for ann in data["annotations"]:
-    annotations_by_image[ann["image_id"]].append(ann)
-
-# === Get list of image IDs and split into train/val sets ===
-image_ids = list(set(img["id"] for img in data["images"]))
-split_idx = int(len(image_ids) * 0.8)
-train_ids = set(image_ids[:split_idx])
-val_ids = set(image_ids[split_idx:])
-
-# === Create image_id → path mapping ===
-image_path_map = {}
-for root, dirs, files in os.walk(IMAGE_ROOT_DIR):
-    for file in files:
-        if file.lower().endswith((".jpg", ".jpeg", ".png")):
-            rel_path = os.path.relpath(os.path.join(root, file), IMAGE_ROOT_DIR)
-            rel_path = rel_path.replace("\\", "/")  # Ensure forward slashes
-            image_path_map[rel_path] = os.path.join(root, file)
-
-# === Process each image ===
-for img in data["images"]:
-    img_id = img["id"]
-    file_name = img["file_name"]
+SPLITS = ("train", "val")
+
+# Linux ioctl that clones a file's extents (btrfs, xfs, ...) instead of copying its bytes
+FICLONE = 0x40049409
+
+# (source image, output image, output label, label text, outputs in the other split to remove)
+Task = Tuple[str, str, str, str, Tuple[str, ...]]
+
+
+def split_of(file_name: str, val_percent: int, seed: int = 0) -> str:
+    """
+    Deterministic train/val assignment from the file name and seed, independent of annotation order
+    """
+    digest = hashlib.sha1(f"{seed}:{file_name}".encode()).hexdigest()
+    return "val" if int(digest[:8], 16) % 100 < val_percent else "train"
+
+
+def category_map(data: dict) -> Tuple[Dict[int, str], Dict[str, int]]:
+    """
+    TACO category id -> name, and name -> YOLO class id (names sorted, as in classes.txt)
+    """
+    categories = {c["id"]: c["name"] for c in data["categories"]}
+    return categories, {name: idx for idx, name in enumerate(sorted(set(categories.values())))}
+
+
+def yolo_labels(img: dict, anns: List[dict], categories: Dict[int, str], class_ids: Dict[str, int]) -> str:
+    """
+    COCO boxes (top-left x/y, width/height in pixels) as YOLO txt: class cx cy w h, normalised to 0..1
+    """
     width, height = img["width"], img["height"]
-    anns = annotations_by_image[img_id]
-    
-    set_type = "train" if img_id in train_ids else "val"
-    out_img_path = os.path.join(OUTPUT_DIR, set_type, "images", file_name)
-    out_txt_path = os.path.join(
-        OUTPUT_DIR, set_type, "labels",
-        file_name.rsplit('.', 1)[0] + ".txt"
-    )
-
-    # === Copy image file from correct batch folder ===
-    src_path = image_path_map.get(file_name)
-    if not src_path:
-        print(f"⚠️ Image file not found: {file_name} — skipping.")
-        continue
-
-    # Ensure the parent directory exists for the image file
-    os.makedirs(os.path.dirname(out_img_path), exist_ok=True)
-    shutil.copy(src_path, out_img_path)
-
-    # Ensure the parent directory exists for the label file
-    os.makedirs(os.path.dirname(out_txt_path), exist_ok=True)
-    with open(out_txt_path, "w") as f:
-        for ann in anns:
-            cat_name = categories[ann["category_id"]]
-            class_id = category_map[cat_name]
-
-            bbox = ann["bbox"]  # [x, y, width, height]
-            x_center = (bbox[0] + bbox[2] / 2) / width
-            y_center = (bbox[1] + bbox[3] / 2) / height
-            w = bbox[2] / width
-            h = bbox[3] / height
-            f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {w:.6f} {h:.6f}\n")
-
-print("✅ TACO dataset converted to YOLO format.")
\ No newline at end of file
+    lines = []
+    for ann in anns:
+        x, y, w, h = ann["bbox"]
+        lines.append(
+            f"{class_ids[categories[ann['category_id']]]} "
+            f"{(x + w / 2) / width:.6f} {(y + h / 2) / height:.6f} {w / width:.6f} {h / height:.6f}\n"
+        )
+    return "".join(lines)
+
+
+def _reflink(src: str, dst: str):
+    import fcntl
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+
+
+def place_image(src: str, dst: str) -> str:
+    """
+    Put src at dst as cheaply as the filesystem allows; returns how ("linked", "reflinked" or "copied")
+    """
+    tmp = f"{dst}.tmp"
+    for method, place in (("linked", os.link), ("reflinked", _reflink), ("copied", shutil.copy2)):
+        try:
+            place(src, tmp)
+        except (OSError, ImportError):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            continue
+        os.replace(tmp, dst)
+        return method
+    raise OSError(f"Could not place {src} at {dst}")
+
+
+def _image_current(src: str, dst: str) -> bool:
+    try:
+        if os.path.samefile(src, dst):
+            return True
+        source, target = os.stat(src), os.stat(dst)
+    except FileNotFoundError:
+        return False
+    # Copies keep the source mtime (copy2), so size + mtime identify an unchanged copy
+    return source.st_size == target.st_size and source.st_mtime_ns == target.st_mtime_ns
+
+
+def _label_current(path: str, text: str) -> bool:
+    try:
+        with open(path, "r") as f:
+            return f.read() == text
+    except FileNotFoundError:
+        return False
+
+
+def convert_one(task: Task) -> str:
+    """
+    Bring one image's output up to date; returns "skipped", "missing", "relabelled" or how the image was placed
+    """
+    src, out_img, out_txt, text, stale = task
+    if not os.path.exists(src):
+        return "missing"
+
+    # An image that changed split (new seed or val percent) must not stay in both
+    for path in stale:
+        if os.path.exists(path):
+            os.remove(path)
+
+    method = "skipped"
+    if not _image_current(src, out_img):
+        os.makedirs(os.path.dirname(out_img), exist_ok=True)
+        method = place_image(src, out_img)
+    if not _label_current(out_txt, text):
+        os.makedirs(os.path.dirname(out_txt), exist_ok=True)
+        with open(f"{out_txt}.tmp", "w") as f:
+            f.write(text)
+        os.replace(f"{out_txt}.tmp", out_txt)
+        method = "relabelled" if method == "skipped" else method
+    return method
+
+
+def build_tasks(data: dict, image_root: str, output_dir: str, val_percent: int, seed: int) -> List[Task]:
+    categories, class_ids = category_map(data)
+    annotations_by_image = defaultdict(list)
+    for ann in data["annotations"]:
+        annotations_by_image[ann["image_id"]].append(ann)
+
+    tasks = []
+    for img in data["images"]:
+        file_name = img["file_name"]
+        stem = file_name.rsplit('.', 1)[0]
+        split = split_of(file_name, val_percent, seed)
+        other = "val" if split == "train" else "train"
+        tasks.append((
+            # TACO file names are relative to the data folder (batch_N/xxxxxx.jpg), no need to walk it
+            os.path.join(image_root, file_name),
+            os.path.join(output_dir, split, "images", file_name),
+            os.path.join(output_dir, split, "labels", stem + ".txt"),
+            yolo_labels(img, annotations_by_image[img["id"]], categories, class_ids),
+            (
+                os.path.join(output_dir, other, "images", file_name),
+                os.path.join(output_dir, other, "labels", stem + ".txt")
+            )
+        ))
+    return tasks
+
+
+def write_classes(data: dict, output_dir: str):
+    text = "".join(name + "\n" for name in category_map(data)[1])
+    path = os.path.join(output_dir, "classes.txt")
+    # Rewritten only when the class list changes, so dependants (taco.yaml, exports) see a stable file
+    if not _label_current(path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+
+def convert(
+    annotation_file: str = ANNOTATION_FILE,
+    image_root: str = IMAGE_ROOT_DIR,
+    output_dir: str = OUTPUT_DIR,
+    val_percent: int = 20,
+    seed: int = 0,
+    workers: Optional[int] = None
+) -> Counter:
+    """
+    Convert (or bring up to date) the YOLO copy of TACO; returns how many images were linked, copied, skipped, ...
+    """
+    if not os.path.exists(annotation_file):
+        raise FileNotFoundError(f"Could not find annotation file at: {annotation_file}")
+    with open(annotation_file, 'r') as f:
+        data = json.load(f)
+
+    for split in SPLITS:
+        for folder in ("images", "labels"):
+            os.makedirs(os.path.join(output_dir, split, folder), exist_ok=True)
+    write_classes(data, output_dir)
+
+    tasks = build_tasks(data, image_root, output_dir, val_percent, seed)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return Counter(map(convert_one, tasks))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return Counter(pool.map(convert_one, tasks, chunksize=max(1, len(tasks) // (workers * 8))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--annotations", default=ANNOTATION_FILE, help="TACO annotations.json")
+    parser.add_argument("--images", default=IMAGE_ROOT_DIR, help="TACO data folder (holds batch_N/)")
+    parser.add_argument("--output", default=OUTPUT_DIR, help="YOLO dataset directory")
+    parser.add_argument("--val-percent", type=int, default=20, help="Share of images in the val split")
+    parser.add_argument("--seed", type=int, default=0, help="Split seed; changing it reshuffles train/val")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        counts = convert(args.annotations, args.images, args.output, args.val_percent, args.seed, args.workers)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return 1
+    if counts["missing"]:
+        print(f"⚠️ {counts['missing']} image files not found under {args.images} — skipped.")
+    done = ", ".join(f"{n} {method}" for method, n in sorted(counts.items()) if method != "missing")
+    print(f"✅ TACO dataset converted to YOLO format in {time.perf_counter() - start:.1f}s ({done}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
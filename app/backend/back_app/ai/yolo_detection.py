@@ -1,125 +1,324 @@
 import os
 import glob
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional, Sequence
 import cv2
 import numpy as np
-# Import your YOLO model libraries (e.g., ultralytics, torch, etc.)
-# from ultralytics import YOLO
+import torch
+from ultralytics.models.yolo.detect import DetectionPredictor
+from ultralytics.utils.checks import check_imgsz
+
+# Trained litter weights; falls back to the stock YOLOv8n checkpoint
+DEFAULT_MODEL_PATH = os.getenv("AEROWASTE_MODEL_PATH", "yolov8n.pt")
+DEFAULT_BATCH_SIZE = int(os.getenv("AEROWASTE_INFERENCE_BATCH", "16"))
+DEFAULT_IMGSZ = int(os.getenv("AEROWASTE_INFERENCE_IMGSZ", "640"))
+DEFAULT_CONF = float(os.getenv("AEROWASTE_INFERENCE_CONF", "0.25"))
+# ultralytics pins OMP_NUM_THREADS=1 on import (a training default), which
+# would leave inference on a single core unless we size the torch pool here
+DEFAULT_THREADS = int(os.getenv("AEROWASTE_TORCH_THREADS", "0")) or (os.cpu_count() or 1)
+
+
+def apply_class_floor(preds, floor: torch.Tensor, end2end: bool = False):
+    """
+    Zero the class scores of every candidate box whose best class is below that class's threshold
+
+    Runs in place on the raw prediction tensor, so non_max_suppression drops those
+    candidates with the rest of the low-confidence boxes instead of them being
+    built into Results and filtered afterwards. NMS suppresses within a class, so
+    this keeps exactly the boxes a post-NMS per-class filter would.
+
+    Args:
+        preds: Raw model output (batch, 4 + classes, boxes), or (batch, boxes, 6) for end-to-end models
+        floor: Minimum confidence per class id
+        end2end: Whether the model emits final (x1, y1, x2, y2, conf, cls) rows without NMS
+    """
+    prediction = preds[0] if isinstance(preds, (list, tuple)) else preds
+    if prediction.shape[-1] == 6 or end2end:
+        conf, cls = prediction[..., 4], prediction[..., 5].long()
+        conf.mul_(conf > floor[cls])
+        return preds
+    scores = prediction[:, 4:4 + len(floor)]
+    best, best_class = scores.max(1)
+    scores.mul_((best > floor[best_class]).unsqueeze(1))
+    return preds
+
+
+class LitterPredictor(DetectionPredictor):
+    """
+    DetectionPredictor that runs already-decoded image batches on a model
+    that is loaded and warmed up exactly once.
+
+    BasePredictor.__call__ rebuilds a data source on every call, which is
+    fine for the CLI but wasteful when we feed it thousands of drone frames,
+    so we drive preprocess -> inference -> postprocess directly.
+    """
+
+    def setup(self, model_path: str):
+        """
+        Load the weights through AutoBackend and warm the model up
+
+        Args:
+            model_path: Path to the YOLO weights file
+        """
+        self.setup_model(model_path, verbose=False)
+        self.imgsz = check_imgsz(self.args.imgsz, stride=self.model.stride, min_dim=2)
+        self.model.warmup(
+            imgsz=(1 if self.model.pt or self.model.triton else self.args.batch, self.model.ch, *self.imgsz)
+        )
+        self.done_warmup = True
+        self.default_conf = self.args.conf
+        self.class_floor = None
+
+    def set_class_thresholds(self, thresholds: Dict[str, float]):
+        """
+        Per-class minimum confidence, applied before NMS
+
+        Args:
+            thresholds: Class name (case-insensitive) -> minimum confidence;
+                classes not listed keep the predictor's default conf
+        """
+        thresholds = {name.strip().lower(): conf for name, conf in thresholds.items()}
+        floor = [
+            thresholds.get(self.model.names[i].lower(), self.default_conf) for i in range(len(self.model.names))
+        ]
+        with self._lock:
+            self.class_floor = torch.tensor(floor, device=self.device) if thresholds else None
+            # NMS keeps candidates above args.conf; the per-class floor does the rest
+            self.args.conf = min(floor) if thresholds else self.default_conf
+
+    def postprocess(self, preds, img, orig_imgs, **kwargs):
+        if self.class_floor is not None:
+            preds = apply_class_floor(preds, self.class_floor, getattr(self.model, "end2end", False))
+        return super().postprocess(preds, img, orig_imgs, **kwargs)
+
+    def predict_batch(self, images: List[np.ndarray], paths: List[str]):
+        """
+        Run one forward pass over a batch of BGR images
+
+        Args:
+            images: Decoded images as returned by cv2.imread
+            paths: Source path for each image (kept on the Results objects)
+
+        Returns:
+            List of ultralytics Results, one per image
+        """
+        with self._lock, torch.inference_mode():
+            self.batch = (paths, images, [""] * len(images))
+            im = self.preprocess(images)
+            preds = self.inference(im)
+            return self.postprocess(preds, im, images)
+
 
 class LitterDetector:
-    def __init__(self, model_path: str = None):
+    def __init__(
+        self,
+        model_path: str = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        imgsz: int = DEFAULT_IMGSZ,
+        conf: float = DEFAULT_CONF,
+        device: Optional[str] = None,
+        threads: int = DEFAULT_THREADS,
+        read_image: Callable[[str], Optional[np.ndarray]] = cv2.imread,
+        class_thresholds: Optional[Dict[str, float]] = None,
+    ):
         """
         Initialize the YOLO litter detection model
-        
+
         Args:
             model_path: Path to your trained YOLO model weights
+            batch_size: Number of images sent through the model per forward pass
+            imgsz: Inference image size
+            conf: Minimum confidence kept by NMS
+            device: Torch device string, e.g. "cpu" or "0" (auto-selected if None)
+            threads: Intra-op CPU threads used by torch in this process
+            read_image: Decodes an image path/uri to BGR (cv2.imread for local files)
+            class_thresholds: Class name -> minimum confidence, overriding conf per class
+        """
+        torch.set_num_threads(max(1, threads))
+        self.read_image = read_image
+        self.model_path = model_path or DEFAULT_MODEL_PATH
+        self.batch_size = max(1, batch_size)
+        self.predictor = LitterPredictor(
+            overrides={
+                "model": self.model_path,
+                "task": "detect",
+                "mode": "predict",
+                "imgsz": imgsz,
+                "conf": conf,
+                "batch": self.batch_size,
+                "device": device,
+                "save": False,
+                "verbose": False,
+            }
+        )
+        self.predictor.setup(self.model_path)
+        self.model = self.predictor.model
+        self.names = self.model.names
+        if class_thresholds:
+            self.set_class_thresholds(class_thresholds)
+
+        # cv2 releases the GIL while decoding, so a few threads keep the model fed
+        self._loader = ThreadPoolExecutor(
+            max_workers=min(8, os.cpu_count() or 1),
+            thread_name_prefix="litter-decode",
+        )
+
+    def set_class_thresholds(self, thresholds: Dict[str, float]):
         """
-        # TODO: Load your trained YOLO model
-        # self.model = YOLO(model_path) if model_path else YOLO('yolov8n.pt')
-        self.model = None  # Placeholder until you add your model
-    
+        Replace the per-class confidence thresholds (empty to use conf for every class)
+
+        Args:
+            thresholds: Class name (case-insensitive) -> minimum confidence
+        """
+        self.predictor.set_class_thresholds(thresholds)
+
     def detect_litter(self, image_path: str) -> Dict[str, Any]:
         """
         Detect litter in a single image
-        
+
         Args:
             image_path: Path to the image file
-            
+
         Returns:
             Dictionary containing detection results
         """
-        try:
-            # Load image
-            image = cv2.imread(image_path)
-            if image is None:
-                return {
+        return self.detect_batch([image_path])[0]
+
+    def detect_batch(self, image_paths: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Detect litter in many images, batching them through the model
+
+        Args:
+            image_paths: Paths to the image files
+
+        Returns:
+            List of detection results in the same order as image_paths
+        """
+        image_paths = [str(p) for p in image_paths]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(image_paths)
+
+        for start in range(0, len(image_paths), self.batch_size):
+            chunk = image_paths[start:start + self.batch_size]
+            images = list(self._loader.map(self.read_image, chunk))
+
+            loaded = []
+            for offset, (image_path, image) in enumerate(zip(chunk, images)):
+                if image is None:
+                    results[start + offset] = self._error_result(image_path, 'Could not load image')
+                else:
+                    loaded.append((start + offset, image_path, image))
+
+            if not loaded:
+                continue
+
+            try:
+                outputs = self.predictor.predict_batch(
+                    [image for _, _, image in loaded],
+                    [image_path for _, image_path, _ in loaded],
+                )
+            except Exception as e:
+                for index, image_path, _ in loaded:
+                    results[index] = self._error_result(image_path, str(e))
+                continue
+
+            for (index, image_path, _), output in zip(loaded, outputs):
+                detections = self._process_results(output)
+                results[index] = {
                     'image_path': image_path,
-                    'status': 'error',
-                    'error': 'Could not load image',
-                    'detections': [],
-                    'litter_found': False
+                    'image_name': os.path.basename(image_path),
+                    'status': 'success',
+                    'detections': detections,
+                    'litter_found': bool(detections),
+                    'detection_count': len(detections)
                 }
-            
-            # TODO: Replace with your actual YOLO model inference
-            # results = self.model(image)
-            # detections = self._process_results(results)
-            
-            # Placeholder detection logic
-            detections = []
-            litter_found = False
-            
-            return {
-                'image_path': image_path,
-                'image_name': os.path.basename(image_path),
-                'status': 'success',
-                'detections': detections,
-                'litter_found': litter_found,
-                'detection_count': len(detections)
-            }
-            
-        except Exception as e:
-            return {
-                'image_path': image_path,
-                'status': 'error',
-                'error': str(e),
-                'detections': [],
-                'litter_found': False
-            }
-    
-    def _process_results(self, results):
+
+        return results
+
+    def detect_arrays(self, images: List[np.ndarray]) -> List[List[Dict[str, Any]]]:
         """
-        Process YOLO detection results
-        
+        Detect litter in images that are already decoded (BGR arrays)
+
         Args:
-            results: Raw YOLO detection results
-            
+            images: Decoded images
+
         Returns:
-            List of processed detections
+            List of detections for each image
         """
         detections = []
-        # TODO: Implement result processing based on your YOLO model output
-        # Example structure:
-        # for result in results:
-        #     for box in result.boxes:
-        #         detection = {
-        #             'class': result.names[int(box.cls)],
-        #             'confidence': float(box.conf),
-        #             'bbox': box.xyxy[0].tolist(),  # [x1, y1, x2, y2]
-        #         }
-        #         detections.append(detection)
+        for start in range(0, len(images), self.batch_size):
+            chunk = images[start:start + self.batch_size]
+            outputs = self.predictor.predict_batch(chunk, [f"image{start + i}" for i in range(len(chunk))])
+            detections.extend(self._process_results(output) for output in outputs)
         return detections
-    
+
+    @staticmethod
+    def _error_result(image_path: str, error: str) -> Dict[str, Any]:
+        return {
+            'image_path': image_path,
+            'status': 'error',
+            'error': error,
+            'detections': [],
+            'litter_found': False
+        }
+
+    def _process_results(self, result) -> List[Dict[str, Any]]:
+        """
+        Process YOLO detection results
+
+        Args:
+            result: ultralytics Results object for a single image
+
+        Returns:
+            List of processed detections
+        """
+        boxes = result.boxes
+        if boxes is None or not len(boxes):
+            return []
+
+        xyxy = boxes.xyxy.cpu().numpy()
+        confs = boxes.conf.cpu().numpy()
+        classes = boxes.cls.cpu().numpy().astype(int)
+
+        return [
+            {
+                'class': self.names[class_id],
+                'class_id': int(class_id),
+                'confidence': float(conf),
+                'bbox': [float(v) for v in box],  # [x1, y1, x2, y2]
+            }
+            for box, conf, class_id in zip(xyxy, confs, classes)
+        ]
+
     def process_image_folder(self, folder_path: str) -> List[Dict[str, Any]]:
         """
         Process all JPG images in a folder
-        
+
         Args:
             folder_path: Path to folder containing images
-            
+
         Returns:
             List of detection results for all images
         """
-        results = []
-        
         # Get all JPG files in the folder
         jpg_patterns = ['*.jpg', '*.jpeg', '*.JPG', '*.JPEG']
         image_files = []
-        
+
         for pattern in jpg_patterns:
             image_files.extend(glob.glob(os.path.join(folder_path, pattern)))
-        
+
         if not image_files:
             print(f"No JPG images found in {folder_path}")
-            return results
-        
-        print(f"Found {len(image_files)} images to process")
-        
-        for image_path in image_files:
-            print(f"Processing: {os.path.basename(image_path)}")
-            result = self.detect_litter(image_path)
-            results.append(result)
-            
+            return []
+
+        print(f"Found {len(image_files)} images to process (batch size {self.batch_size})")
+
+        results = self.detect_batch(image_files)
+
+        for result in results:
+            print(f"Processing: {os.path.basename(result['image_path'])}")
+
             # Print result summary
             if result['status'] == 'success':
                 if result['litter_found']:
@@ -128,59 +327,107 @@ class LitterDetector:
                     print(f"  ○ No litter detected")
             else:
                 print(f"  ✗ Error: {result['error']}")
-        
+
         return results
-    
+
     def trigger_actions(self, detection_result: Dict[str, Any]):
         """
         Trigger actions based on detection results
-        
+
         Args:
             detection_result: Result from detect_litter method
         """
         if detection_result['status'] != 'success':
             return
-        
+
         if detection_result['litter_found']:
             print(f"Litter detected in {detection_result['image_name']} - triggering actions:")
-            
+
             # TODO: Implement your action triggers
             # self.start_motor()
             # self.plot_gps_location()
             # self.send_notification()
-            
+
             print("  - Starting motor...")
             print("  - Plotting GPS location...")
             print("  - Sending notification...")
         else:
             print(f"No litter in {detection_result['image_name']} - no actions triggered")
 
+
+_detector: Optional[LitterDetector] = None
+_detector_lock = threading.Lock()
+
+
+def get_detector() -> LitterDetector:
+    """
+    Return the process-wide LitterDetector, loading the model on first use
+
+    Every worker process pays the model load and warmup once; all later
+    calls reuse the same warm model.
+    """
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = LitterDetector()
+    return _detector
+
+
+def to_bounding_boxes(detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Convert detections to the litter_images.bounding_boxes format (x/y/width/height in pixels)
+    """
+    boxes = []
+    for det in detections:
+        x1, y1, x2, y2 = det['bbox']
+        boxes.append({
+            "label": det['class'],
+            "confidence": round(det['confidence'], 4),
+            "x": int(round(x1)),
+            "y": int(round(y1)),
+            "width": int(round(x2 - x1)),
+            "height": int(round(y2 - y1))
+        })
+    return boxes
+
+
+def to_classification(detections: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Summarise detections as the litter_images.classification field (top detection)
+    """
+    if not detections:
+        return {"label": None, "confidence": None}
+    best = max(detections, key=lambda d: d['confidence'])
+    return {"label": best['class'], "confidence": round(best['confidence'], 4)}
+
+
 def main():
     """
     Main function to run the litter detection pipeline
     """
     # Initialize detector
-    detector = LitterDetector()
-    
+    detector = get_detector()
+
     # Set the path to your images folder
     images_folder = "AeroWaste/app/backend/back_app/ai/litter_images"
-    
+
     # Process all images in the folder
     results = detector.process_image_folder(images_folder)
-    
+
     # Process each result and trigger actions
     print("\n" + "="*50)
     print("PROCESSING RESULTS AND TRIGGERING ACTIONS")
     print("="*50)
-    
+
     for result in results:
         detector.trigger_actions(result)
-    
+
     # Summary
     total_images = len(results)
     successful_detections = len([r for r in results if r['status'] == 'success'])
     litter_found_count = len([r for r in results if r.get('litter_found', False)])
-    
+
     print(f"\n" + "="*50)
     print("SUMMARY")
     print("="*50)
@@ -190,4 +437,4 @@ def main():
     print(f"Images without litter: {successful_detections - litter_found_count}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
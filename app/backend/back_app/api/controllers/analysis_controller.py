@@ -0,0 +1,29 @@
+from typing import Optional
+from back_app.services.geo_service import GeoService
+from back_app.services.summary_service import SummaryService
+
+async def run_analysis():
+    # Totals come from the coarse heatmap tiles, not a scan of litter_images
+    return await GeoService.totals()
+
+async def litter_in_bbox(
+    min_lon: float, min_lat: float, max_lon: float, max_lat: float,
+    limit: int, cursor: Optional[str] = None
+):
+    items, next_cursor = await GeoService.litter_in_bbox(min_lon, min_lat, max_lon, max_lat, limit, cursor)
+    return {"items": items, "next_cursor": next_cursor}
+
+async def litter_near(lon: float, lat: float, radius_m: float, limit: int):
+    return {"items": await GeoService.litter_near(lon, lat, radius_m, limit)}
+
+async def litter_heatmap(
+    min_lon: float, min_lat: float, max_lon: float, max_lat: float,
+    max_cells: int, litter_class: Optional[str] = None
+):
+    return await GeoService.heatmap(min_lon, min_lat, max_lon, max_lat, max_cells, litter_class)
+
+async def summary(scope: str = "all", key: str = "all"):
+    return await SummaryService.get_summary(scope, key)
+
+async def daily_report(start: str, end: str):
+    return {"days": await SummaryService.get_daily(start, end)}
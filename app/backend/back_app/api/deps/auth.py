@@ -1,15 +1,39 @@
-from fastapi import Cookie, HTTPException
+from fastapi import Cookie, Depends, HTTPException
+from back_app.services.auth_service import AuthService, Principal
 import jwt
 
 SECRET = "dev-secret-change-me"
 ALGO = "HS256"
 COOKIE_NAME = "aw_session"
 
-def require_session(session: str | None = Cookie(default=None, alias=COOKIE_NAME)):
+def session_user(session: str | None) -> Principal:
+    """
+    Principal for a session cookie value; raises HTTPException(401) when it is missing or invalid
+    """
     if not session:
         raise HTTPException(status_code=401, detail="Not authenticated")
     try:
         payload = jwt.decode(session, SECRET, algorithms=[ALGO])
-        return payload["sub"]  # user_id
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired session")
+    try:
+        return AuthService.authorise(payload)
+    except PermissionError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+async def current_user(session: str | None = Cookie(default=None, alias=COOKIE_NAME)) -> Principal:
+    # async so it runs on the event loop: AuthService schedules its cache refreshes there
+    return session_user(session)
+
+async def require_session(user: Principal = Depends(current_user)) -> str:
+    return user.user_id
+
+def require_permission(permission: str):
+    """
+    Dependency allowing only users whose role grants `permission` (or "all")
+    """
+    async def check(user: Principal = Depends(current_user)) -> Principal:
+        if not user.can(permission):
+            raise HTTPException(status_code=403, detail=f"Missing permission: {permission}")
+        return user
+    return check
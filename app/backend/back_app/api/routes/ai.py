@@ -1,9 +1,17 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from pydantic import BaseModel
-from typing import List, Optional, Literal
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional, Literal, Any
 from datetime import datetime
-from ..services.image_service import ImageService
-from ..models.image_models import (
+from back_app.services.image_service import ImageService
+from back_app.services.inference_queue import get_job_queue
+from back_app.services.video_service import VideoService
+from back_app.services.export_service import ExportService
+from back_app.services.threshold_service import ThresholdService
+from back_app.api.deps.auth import require_permission
+from back_app.api.routes.media import serve_blob
+from back_app.models.image_models import (
     ImageUploadResponse, 
     ReviewRequest, 
     BoundingBoxUpdate,
@@ -16,6 +24,8 @@ router = APIRouter(prefix="/ai", tags=["ai"])
 class QueueItem(BaseModel):
     id: str
     image_url: str
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
     ai_class: str
     ai_conf: float
     mission_id: str
@@ -23,6 +33,7 @@ class QueueItem(BaseModel):
 
 class QueueResponse(BaseModel):
     items: List[QueueItem]
+    next_cursor: Optional[str] = None
 
 class ReviewItem(BaseModel):
     id: str
@@ -34,10 +45,10 @@ class ReviewRequest(BaseModel):
     items: List[ReviewItem]
 
 class ThresholdClass(BaseModel):
-    class_: str
-    conf: float
+    class_: str = Field(..., alias="class")
+    conf: float = Field(..., ge=0, le=1)
     class Config:
-        fields = {'class_': 'class'}
+        populate_by_name = True
 
 class RTB(BaseModel):
     battery_pct: int
@@ -57,19 +68,15 @@ class HistoryItem(BaseModel):
 
 class HistoryResponse(BaseModel):
     items: List[HistoryItem]
+    next_cursor: Optional[str] = None
 
-# ----- Mock threshold data (expanded to match your existing structure) -----
-MOCK_THRESHOLDS = {
-    "classes": [
-        {"class": "plastic", "conf": 0.85},
-        {"class": "glass", "conf": 0.75},
-        {"class": "paper", "conf": 0.65},
-        {"class": "cardboard", "conf": 0.70},
-        {"class": "cigarette", "conf": 0.80},
-        {"class": "tyre", "conf": 0.75}
-    ],
-    "rtb": {"battery_pct": 20, "hold_pct": 80}
-}
+class JobStatus(BaseModel):
+    job_id: str
+    image_id: str
+    status: Literal["queued","running","done","failed"]
+    attempts: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
 
 # ----- Image Upload Endpoints -----
 @router.post("/upload", response_model=ImageUploadResponse)
@@ -100,11 +107,27 @@ async def upload_image(
             location=location
         )
         
+        # A duplicate upload already carries the cached results of its first copy
+        if image_record.inferred_at:
+            return ImageUploadResponse(
+                success=True,
+                message=f"Image uploaded successfully (duplicate of {image_record.duplicate_of}, cached results reused)",
+                image_id=image_record.id,
+                image_url=image_record.image_url,
+                duplicate_of=image_record.duplicate_of
+            )
+        
+        # Queue YOLO inference; workers write the results back to litter_images
+        job_ids = await run_in_threadpool(
+            get_job_queue().enqueue, [(image_record.id, image_record.local_path)]
+        )
+        
         return ImageUploadResponse(
             success=True,
             message="Image uploaded successfully",
             image_id=image_record.id,
-            image_url=image_record.image_url
+            image_url=image_record.image_url,
+            job_id=job_ids[0]
         )
         
     except ValueError as e:
@@ -114,9 +137,9 @@ async def upload_image(
 
 # ----- Validation Queue Endpoints -----
 @router.get("/queue", response_model=QueueResponse)
-async def get_queue(reviewer: str = "admin", limit: int = 6):
+async def get_queue(reviewer: str = "admin", limit: int = Query(6, ge=1, le=200), _=Depends(require_permission("ai:review"))):
     """
-    Get images pending review from MongoDB
+    Claim the next images for a reviewer; they stay leased to them until reviewed or the lease expires
     """
     try:
         items = await ImageService.get_pending_images(limit=limit, reviewer=reviewer)
@@ -124,36 +147,48 @@ async def get_queue(reviewer: str = "admin", limit: int = 6):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch queue: {str(e)}")
 
+@router.get("/queue/pending", response_model=QueueResponse)
+async def list_pending(limit: int = Query(20, ge=1, le=200), cursor: Optional[str] = None, _=Depends(require_permission("ai:review"))):
+    """
+    Browse unclaimed pending images without leasing them; pass next_cursor back to fetch the following page
+    """
+    try:
+        items, next_cursor = await ImageService.list_pending_images(limit=limit, cursor=cursor)
+        return QueueResponse(items=items, next_cursor=next_cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch pending images: {str(e)}")
+
 @router.post("/review")
-async def submit_review(payload: ReviewRequest):
+async def submit_review(payload: ReviewRequest, _=Depends(require_permission("ai:review"))):
     """
     Submit human review for multiple images (preserving existing API structure)
     """
     try:
-        success_count = 0
-        
-        # Process each review item
-        for item in payload.items:
-            review_data = {
+        reviews = [
+            {
+                "id": item.id,
                 "is_litter": item.is_litter,
                 "litter_class": item.litter_class,
                 "weight_grams": item.weight_grams,  # ✅ Weight is preserved
                 "reviewer": "admin"  # TODO: Get from authentication
             }
-            
-            success = await ImageService.update_human_review(item.id, review_data)
-            if success:
-                success_count += 1
+            for item in payload.items
+        ]
+        
+        # One bulk_write for the whole grid (chunked for mission-sized approvals)
+        results, success_count = await ImageService.update_human_reviews(reviews)
         
-        # Return format matching existing API
-        return {"ok": True, "saved": success_count}
+        # Return format matching existing API, plus the per-item outcome
+        return {"ok": True, "saved": success_count, "results": results}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Review submission failed: {str(e)}")
 
 # ----- Bounding Box Endpoints -----
 @router.post("/bounding-boxes")
-async def update_bounding_boxes(request: BoundingBoxUpdate):
+async def update_bounding_boxes(request: BoundingBoxUpdate, _=Depends(require_permission("ai:review"))):
     """
     Update bounding boxes for an image
     """
@@ -175,14 +210,14 @@ async def update_bounding_boxes(request: BoundingBoxUpdate):
         raise HTTPException(status_code=500, detail=f"Failed to update bounding boxes: {str(e)}")
 
 @router.get("/image/{image_id}/bounding-boxes")
-async def get_bounding_boxes(image_id: str):
+async def get_bounding_boxes(image_id: str, _=Depends(require_permission("ai:review"))):
     """
     Get bounding boxes for a specific image
     """
     try:
-        from db.mongo import litter_images
+        from db.async_mongo import litter_images
         
-        image_doc = litter_images.find_one({"id": image_id})
+        image_doc = await litter_images.find_one({"id": image_id})
         if not image_doc:
             raise HTTPException(status_code=404, detail="Image not found")
         
@@ -194,63 +229,117 @@ async def get_bounding_boxes(image_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get bounding boxes: {str(e)}")
 
+@router.api_route("/image/{image_id}/{variant}", methods=["GET", "HEAD"])
+async def get_image_derivative(image_id: str, variant: str, request: Request):
+    """
+    Get a downscaled image ("thumb" for grids, "preview" for detail views);
+    WebP when the browser accepts it, JPEG otherwise
+    """
+    image_format = "webp" if "image/webp" in request.headers.get("accept", "") else "jpg"
+    try:
+        path = await ImageService.get_derivative(image_id, variant, image_format)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to render image: {str(e)}")
+    
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    # The cache file name is content hash + variant + format, so it doubles as a strong ETag
+    size = (await run_in_threadpool(path.stat)).st_size
+    return serve_blob(
+        request, size, f'"{path.stem}.{image_format}"', ImageService.DERIVATIVE_FORMATS[image_format][1],
+        path=path, headers={"Vary": "Accept"}
+    )
+
 # ----- Configuration Endpoints -----
 @router.get("/initiation", response_model=InitiationConfig)
 async def get_initiation_thresholds():
     """
     Get AI model initiation thresholds
     """
-    return MOCK_THRESHOLDS
+    try:
+        return await ThresholdService.get_config()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch thresholds: {str(e)}")
 
 @router.put("/initiation")
 async def update_initiation_thresholds(body: InitiationConfig):
     """
     Update AI model initiation thresholds (matching existing API structure)
+
+    Inference workers pick the new per-class thresholds up within
+    AEROWASTE_THRESHOLD_REFRESH_SECONDS and apply them before NMS.
     """
-    global MOCK_THRESHOLDS
     # Normalize incoming Pydantic alias to match existing format
     classes = [{"class": c.class_, "conf": c.conf} for c in body.classes]
-    MOCK_THRESHOLDS = {"classes": classes, "rtb": body.rtb.dict()}
-    return {"ok": True}
+    try:
+        config = await ThresholdService.update_config(classes, body.rtb.dict())
+        return {"ok": True, "version": config["version"]}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update thresholds: {str(e)}")
 
 # ----- Review History Endpoints -----
 @router.get("/review/history", response_model=HistoryResponse)
-async def get_review_history(limit: int = 20):
+async def get_review_history(limit: int = Query(20, ge=1, le=200), cursor: Optional[str] = None, _=Depends(require_permission("ai:review"))):
     """
-    Get history of reviewed images from MongoDB
+    Get history of reviewed images from MongoDB; pass next_cursor back to fetch the following page
     """
     try:
-        items = await ImageService.get_review_history(limit=limit)
-        return HistoryResponse(items=items)
+        items, next_cursor = await ImageService.get_review_history(limit=limit, cursor=cursor)
+        return HistoryResponse(items=items, next_cursor=next_cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch history: {str(e)}")
 
 # ----- Batch Upload Endpoint -----
 @router.post("/upload-batch")
-async def upload_batch(files: List[UploadFile] = File(...)):
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    mission_id: Optional[str] = Form(None),
+    drone_id: Optional[str] = Form(None)
+):
     """
-    Upload multiple images at once
+    Upload multiple images at once (files written concurrently, metadata inserted in bulk)
     """
     try:
         results = []
+        uploaded = []
         
-        for file in files:
-            try:
-                image_record = await ImageService.upload_image(file=file)
+        outcomes = await ImageService.upload_images(files, mission_id=mission_id, drone_id=drone_id)
+        
+        for file, outcome in zip(files, outcomes):
+            if isinstance(outcome, BaseException):
                 results.append({
                     "filename": file.filename,
-                    "success": True,
-                    "image_id": image_record.id,
-                    "image_url": image_record.image_url
+                    "success": False,
+                    "error": str(outcome)
                 })
-            except Exception as e:
+            else:
+                uploaded.append(outcome)
                 results.append({
                     "filename": file.filename,
-                    "success": False,
-                    "error": str(e)
+                    "success": True,
+                    "image_id": outcome.id,
+                    "image_url": outcome.image_url,
+                    "duplicate_of": outcome.duplicate_of
                 })
         
-        success_count = sum(1 for r in results if r["success"])
+        # Queue inference for the whole batch in one transaction, skipping duplicates with cached results
+        to_infer = [record for record in uploaded if not record.inferred_at]
+        job_ids = await run_in_threadpool(
+            get_job_queue().enqueue, [(record.id, record.local_path) for record in to_infer]
+        )
+        jobs_by_image = {record.id: job_id for record, job_id in zip(to_infer, job_ids)}
+        for result in results:
+            if result["success"]:
+                result["job_id"] = jobs_by_image.get(result["image_id"])
+        
+        success_count = len(uploaded)
         
         return {
             "success": True,
@@ -261,83 +350,156 @@ async def upload_batch(files: List[UploadFile] = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Batch upload failed: {str(e)}")
 
-# ----- YOLO Model Integration Placeholder -----
-@router.post("/analyze/{image_id}")
+# ----- Video Ingestion Endpoints -----
+@router.post("/upload-video", status_code=202)
+async def upload_video(
+    file: UploadFile = File(...),
+    mission_id: Optional[str] = Form(None),
+    drone_id: Optional[str] = Form(None),
+    vid_stride: Optional[int] = Form(None),
+    threshold: Optional[int] = Form(None)
+):
+    """
+    Upload a flight recording; keyframes are extracted, deduplicated and stored as litter images
+    in the background. Poll /ai/videos/{ingest_id} for progress.
+    """
+    try:
+        ingest = await VideoService.start_ingest(
+            file=file,
+            mission_id=mission_id,
+            drone_id=drone_id,
+            vid_stride=vid_stride,
+            threshold=threshold
+        )
+        return {
+            "success": True,
+            "ingest_id": ingest["id"],
+            "status": ingest["status"]
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Video upload failed: {str(e)}")
+
+@router.get("/videos/{ingest_id}")
+async def get_video_ingest(ingest_id: str):
+    """
+    Get the progress of a video ingest (frames read, keyframes stored, resulting image ids)
+    """
+    ingest = await VideoService.get_ingest(ingest_id)
+    if not ingest:
+        raise HTTPException(status_code=404, detail="Video ingest not found")
+    return ingest
+
+# ----- YOLO Inference Jobs -----
+@router.post("/analyze/{image_id}", status_code=202)
 async def analyze_image(image_id: str):
     """
-    Run YOLO model analysis on a specific image
-    TODO: Integrate with your YOLO model
+    Queue YOLO model analysis for a specific image; poll /ai/jobs/{job_id} for the result
     """
     try:
-        from db.mongo import litter_images
+        from db.async_mongo import litter_images
         
-        image_doc = litter_images.find_one({"id": image_id})
+        image_doc = await litter_images.find_one({"id": image_id}, {"local_path": 1})
         if not image_doc:
             raise HTTPException(status_code=404, detail="Image not found")
         
-        # TODO: Replace this with actual YOLO model inference
-        # For now, return placeholder results
-        mock_classification = {
-            "label": "plastic",
-            "confidence": 0.85
-        }
-        
-        mock_bounding_boxes = [
-            {
-                "label": "plastic_bottle",
-                "confidence": 0.85,
-                "x": 100,
-                "y": 150,
-                "width": 80,
-                "height": 120
-            }
-        ]
-        
-        # Update image with AI results
-        litter_images.update_one(
-            {"id": image_id},
-            {
-                "$set": {
-                    "classification": mock_classification,
-                    "bounding_boxes": mock_bounding_boxes,
-                    "updated_at": datetime.utcnow().isoformat() + "Z"
-                }
-            }
+        job_ids = await run_in_threadpool(
+            get_job_queue().enqueue, [(image_id, image_doc["local_path"])]
         )
         
         return {
             "success": True,
             "image_id": image_id,
-            "classification": mock_classification,
-            "bounding_boxes": mock_bounding_boxes
+            "job_id": job_ids[0],
+            "status": "queued"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job_status(job_id: str):
+    """
+    Get the status (and, once done, the result) of an inference job
+    """
+    job = await run_in_threadpool(get_job_queue().get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return JobStatus(
+        job_id=job["id"],
+        image_id=job["image_id"],
+        status=job["status"],
+        attempts=job["attempts"],
+        result=job["result"],
+        error=job["error"]
+    )
+
 # ----- Training Data Export Endpoint -----
 @router.get("/export/training-data")
-async def export_training_data(format: str = "yolo"):
+async def export_training_data(
+    format: str = "yolo",
+    val_percent: int = Query(ExportService.VAL_PERCENT, ge=0, le=100),
+    include_background: bool = True
+):
     """
-    Export validated images as training data in YOLO format
-    TODO: Implement YOLO format export
+    Download reviewed images as a YOLO dataset zip (images, labels, classes.txt, data.yaml)
+    
+    The archive is generated while it streams, so memory use does not depend on the dataset size.
+    Rejected images are included as background (empty label files) unless include_background=false.
+    """
+    if format != "yolo":
+        raise HTTPException(status_code=400, detail=f"Unsupported export format '{format}'. Use yolo.")
+    
+    filename = f"aerowaste_yolo_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        ExportService.stream_yolo_zip(val_percent=val_percent, include_background=include_background),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/export/snapshots", status_code=201)
+async def create_export_snapshot(
+    full: bool = False,
+    val_percent: int = Query(None, ge=0, le=100),
+    include_background: bool = True
+):
+    """
+    Record a new training-data version; download it from the returned download_url
+    
+    Continues the latest snapshot as a delta (only added, changed and removed samples)
+    unless full=true or there is none yet. val_percent/include_background only apply to full snapshots.
     """
     try:
-        from db.mongo import litter_images
-        
-        # Get all reviewed images
-        reviewed_images = list(litter_images.find({"review_status": "reviewed"}))
-        
-        # TODO: Implement actual YOLO format export
-        # This is a placeholder response
-        return {
-            "success": True,
-            "message": f"Training data export ready",
-            "format": format,
-            "total_images": len(reviewed_images),
-            "litter_images": len([img for img in reviewed_images if img["human_review"]["is_litter"]]),
-            "non_litter_images": len([img for img in reviewed_images if not img["human_review"]["is_litter"]])
-        }
-        
+        return await ExportService.create_snapshot(full=full, val_percent=val_percent, include_background=include_background)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Snapshot failed: {str(e)}")
+
+@router.get("/export/snapshots")
+async def list_export_snapshots(limit: int = Query(50, ge=1, le=500)):
+    """
+    Training-data versions, newest first
+    """
+    try:
+        return {"snapshots": await ExportService.list_snapshots(limit=limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list snapshots: {str(e)}")
+
+@router.get("/export/snapshots/{version}")
+async def download_export_snapshot(version: int):
+    """
+    Download a snapshot archive: the full dataset, or the delta from its base version (see manifest.json)
+    """
+    archive = await ExportService.stream_snapshot(version)
+    if archive is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return StreamingResponse(
+        archive,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="aerowaste_yolo_v{version}.zip"'}
+    )
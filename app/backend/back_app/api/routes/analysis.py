@@ -1,8 +1,101 @@
-from fastapi import APIRouter
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
 from ..controllers import analysis_controller
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
 @router.get("/")
 async def analyze():
-    return analysis_controller.run_analysis()
\ No newline at end of file
+    """
+    Confirmed litter totals, overall and per class
+    """
+    try:
+        return await analysis_controller.run_analysis()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+@router.get("/litter")
+async def litter_in_bbox(
+    min_lon: float = Query(..., ge=-180, le=180),
+    min_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    limit: int = Query(500, ge=1, le=5000),
+    cursor: Optional[str] = None
+):
+    """
+    Confirmed litter inside a bounding box; pass next_cursor back to fetch the following page
+    """
+    try:
+        return await analysis_controller.litter_in_bbox(min_lon, min_lat, max_lon, max_lat, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch litter: {str(e)}")
+
+@router.get("/litter/near")
+async def litter_near(
+    lon: float = Query(..., ge=-180, le=180),
+    lat: float = Query(..., ge=-90, le=90),
+    radius_m: float = Query(..., gt=0, le=50000),
+    limit: int = Query(500, ge=1, le=5000)
+):
+    """
+    Confirmed litter within radius_m metres of a point, nearest first
+    """
+    try:
+        return await analysis_controller.litter_near(lon, lat, radius_m, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch litter: {str(e)}")
+
+@router.get("/heatmap")
+async def litter_heatmap(
+    min_lon: float = Query(..., ge=-180, le=180),
+    min_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_cells: int = Query(1024, ge=1, le=4096),
+    litter_class: Optional[str] = None
+):
+    """
+    Per-cell confirmed litter counts and weights for a map heatmap; the grid gets finer as the box gets smaller
+    """
+    try:
+        return await analysis_controller.litter_heatmap(min_lon, min_lat, max_lon, max_lat, max_cells, litter_class)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to build heatmap: {str(e)}")
+
+@router.get("/summary")
+async def overall_summary():
+    """
+    Image, review, class and weight counters across every mission (one document read)
+    """
+    try:
+        return await analysis_controller.summary()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch summary: {str(e)}")
+
+@router.get("/missions/{mission_id}/summary")
+async def mission_summary(mission_id: str):
+    """
+    Image, review, class and weight counters for one mission (one document read)
+    """
+    try:
+        return {"mission_id": mission_id, **await analysis_controller.summary("mission", mission_id)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch mission summary: {str(e)}")
+
+@router.get("/daily")
+async def daily_report(start: date, end: date):
+    """
+    Per-day counters by capture date, start..end inclusive (at most a year)
+    """
+    try:
+        return await analysis_controller.daily_report(start.isoformat(), end.isoformat())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to build daily report: {str(e)}")
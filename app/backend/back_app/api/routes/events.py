@@ -0,0 +1,67 @@
+import json
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from back_app.api.deps.auth import COOKIE_NAME, session_user
+from back_app.services.event_hub import TOPICS, EventHub, Subscriber
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+async def _push(websocket: WebSocket, subscriber: Subscriber):
+    while True:
+        frame = await subscriber.next_frame()
+        try:
+            await asyncio.wait_for(websocket.send_text(frame), EventHub.SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            # 1013 (try again later): the client reconnects and reloads over REST
+            try:
+                await asyncio.wait_for(websocket.close(code=1013), 1)
+            except Exception:
+                pass
+            return
+
+async def _listen(websocket: WebSocket, subscriber: Subscriber):
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                if "subscribe" in message:
+                    EventHub.subscribe(subscriber, message["subscribe"])
+                if "unsubscribe" in message:
+                    EventHub.unsubscribe(subscriber, message["unsubscribe"])
+                reply = {"type": "subscribed", "topics": sorted(subscriber.topics)}
+            except (ValueError, TypeError, KeyError) as e:
+                reply = {"type": "error", "detail": str(e)}
+            subscriber.offer(None, json.dumps(reply))
+    except WebSocketDisconnect:
+        pass
+
+@router.websocket("/ws")
+async def event_stream(websocket: WebSocket, topics: str = Query(",".join(TOPICS))):
+    """
+    Push channel for live pages. ?topics=drones,reviews picks the topics (all by
+    default); send {"subscribe": [...]} or {"unsubscribe": [...]} to change them.
+    Each frame is a JSON array of events; {"type": "resync"} means events were
+    dropped because the client fell behind, and it should reload over REST.
+    """
+    try:
+        session_user(websocket.cookies.get(COOKIE_NAME))
+        subscriber = EventHub.connect(topic for topic in topics.split(",") if topic)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+
+    try:
+        await websocket.accept()
+        sender = asyncio.create_task(_push(websocket, subscriber))
+        listener = asyncio.create_task(_listen(websocket, subscriber))
+        try:
+            await asyncio.wait({sender, listener}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            sender.cancel()
+            listener.cancel()
+            await asyncio.gather(sender, listener, return_exceptions=True)
+    finally:
+        EventHub.unsubscribe(subscriber)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, Response
+import math
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from db.mongo import mongo_db
-from passlib.hash import bcrypt
+from db.async_mongo import users
+from back_app.services.auth_service import AuthService
+from back_app.services.password_service import HashingOverloaded, PasswordService
 import jwt
 
 router = APIRouter(tags=["auth"])
@@ -15,25 +17,52 @@ class LoginRequest(BaseModel):
     username_or_email: str
     password: str
 
-def make_session(user_id: str):
-    payload = {"sub": user_id, "exp": datetime.utcnow() + timedelta(hours=12)}
+def make_session(user_id: str, claims: dict | None = None):
+    # claims: role and permissions (AuthService.session_claims), so requests authorise without a lookup
+    payload = {**(claims or {}), "sub": user_id, "exp": datetime.utcnow() + timedelta(hours=12)}
     return jwt.encode(payload, SECRET, algorithm=ALGO)
 
 @router.post("/login")
-def login(request: LoginRequest, response: Response):
-    users = mongo_db.users
-    user = users.find_one({
+async def login(request: LoginRequest, response: Response, http_request: Request):
+    account = request.username_or_email.strip().lower()
+    client = http_request.client.host if http_request.client else "unknown"
+
+    # Throttled before any lookup or hashing, so brute force costs us a dict lookup per attempt
+    wait = max(
+        PasswordService.account_throttle.retry_after([account]),
+        PasswordService.client_throttle.retry_after([client])
+    )
+    if wait:
+        raise HTTPException(
+            status_code=429, detail="Too many failed login attempts, try again later",
+            headers={"Retry-After": str(math.ceil(wait))}
+        )
+
+    user = await users.find_one({
         "$or": [
             {"username": request.username_or_email},
             {"email": request.username_or_email.lower()}
         ]
     })
-    if not user or not bcrypt.verify(request.password, user.get("hashed_password", "")):
+    try:
+        valid, new_hash = await PasswordService.verify_password(
+            request.password, user.get("hashed_password") if user else None
+        )
+    except HashingOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    if not valid:
+        PasswordService.account_throttle.failed([account])
+        PasswordService.client_throttle.failed([client])
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    PasswordService.account_throttle.succeeded([account])
 
-    users.update_one({"_id": user["_id"]}, {"$set": {"last_login": datetime.utcnow()}})
+    update = {"last_login": datetime.utcnow()}
+    if new_hash:
+        # Stored with an older cost factor: upgrade it now that we have the password
+        update["hashed_password"] = new_hash
+    await users.update_one({"_id": user["_id"]}, {"$set": update})
 
-    token = make_session(str(user["_id"]))
+    token = make_session(str(user["_id"]), await AuthService.session_claims(user))
     # Important for cookies from React → FastAPI
     response.set_cookie(
         key=COOKIE_NAME,
@@ -0,0 +1,194 @@
+import re
+import mimetypes
+from pathlib import Path, PurePosixPath
+from typing import AsyncIterator, Callable, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from starlette.responses import Response
+from back_app.services.storage import INCOMING, LocalStorage, get_storage
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+# Pre-/media image URLs; registered ahead of the /static mount, which would shadow them
+legacy_router = APIRouter(prefix="/static/litter_images", tags=["media"])
+
+# Every stored object is write-once (content-addressed), so caches may keep it forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=" Range header into an inclusive (start, end)
+
+    Returns None for anything we answer with the whole body (multiple ranges, other units, garbage).
+    """
+    match = _RANGE.match(header.replace(" ", ""))
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored"""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+class BlobResponse(Response):
+    """
+    Full or single-range body from a local file or a storage stream
+
+    Local files are handed to the server for zero-copy sending when it supports
+    the ASGI zerocopysend/pathsend extensions; otherwise they are read in chunks.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: dict,
+        media_type: str,
+        start: int,
+        end: int,
+        path: Optional[Path] = None,
+        stream: Optional[Callable[[int, int], AsyncIterator[bytes]]] = None
+    ):
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.path = path
+        self.stream = stream
+        self.start = start
+        self.end = end
+        self.init_headers({**headers, "Content-Length": str(end - start + 1)})
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.end < self.start:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if self.path is not None and "http.response.zerocopysend" in extensions:
+            # The extension takes a file object, not a raw descriptor
+            handle = await run_in_threadpool(open, self.path, "rb")
+            try:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": handle,
+                    "offset": self.start,
+                    "count": self.end - self.start + 1
+                })
+            finally:
+                await run_in_threadpool(handle.close)
+            return
+        if self.path is not None and self.status_code == 200 and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            return
+
+        async for chunk in (self.stream or self._read_file)(self.start, self.end):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _read_file(self, start: int, end: int) -> AsyncIterator[bytes]:
+        handle = await run_in_threadpool(open, self.path, "rb")
+        try:
+            await run_in_threadpool(handle.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await run_in_threadpool(handle.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await run_in_threadpool(handle.close)
+
+def serve_blob(
+    request: Request,
+    size: int,
+    etag: str,
+    media_type: str,
+    path: Optional[Path] = None,
+    stream: Optional[Callable[[int, int], AsyncIterator[bytes]]] = None,
+    headers: Optional[dict] = None
+) -> Response:
+    """
+    Answer a GET/HEAD for an immutable blob: 304 on a matching If-None-Match,
+    206 for a satisfiable single Range (honouring If-Range), 416 otherwise, else 200
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+        **(headers or {})
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        return BlobResponse(200, headers, media_type, 0, size - 1, path=path, stream=stream)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return BlobResponse(206, headers, media_type, start, end, path=path, stream=stream)
+
+async def serve_stored_image(request: Request, key: str) -> Response:
+    storage = get_storage()
+    size = None
+    if not key.startswith(INCOMING):  # half-finished uploads are not served
+        try:
+            size = await storage.size(key)
+        except ValueError:
+            pass
+    if size is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    # Keys are <sha256>.<ext> (or a legacy uuid name), never reused, so the name is a strong validator
+    etag = f'"{PurePosixPath(key).stem}"'
+    media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+    if isinstance(storage, LocalStorage):
+        return serve_blob(request, size, etag, media_type, path=storage.path(key))
+    return serve_blob(
+        request, size, etag, media_type,
+        stream=lambda start, end: storage.stream(key, start, end)
+    )
+
+@router.api_route("/{key:path}", methods=["GET", "HEAD"])
+async def get_media(key: str, request: Request):
+    """
+    Serve an original image from the configured storage backend (ETag, 304, Range)
+    """
+    return await serve_stored_image(request, key)
+
+@legacy_router.api_route("/{key:path}", methods=["GET", "HEAD"])
+async def get_legacy_media(key: str, request: Request):
+    """
+    Serve images stored under their old /static/litter_images URLs
+    """
+    return await serve_stored_image(request, key)
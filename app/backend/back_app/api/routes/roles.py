@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from back_app.models.role_models import RoleCreate, RoleUpdate, RoleInDB
 from back_app.services.role_service import RoleService
-from back_app.api.deps.auth import require_session
+from back_app.api.deps.auth import require_permission, require_session
 
 router = APIRouter(prefix="/roles", tags=["roles"])
 
@@ -23,14 +23,14 @@ async def get_role(role_id: str, _: str = Depends(require_session)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/", response_model=RoleInDB)
-async def create_role(role: RoleCreate, _: str = Depends(require_session)):
+async def create_role(role: RoleCreate, _=Depends(require_permission("roles:write"))):
     try:
         return await RoleService.create_role(role)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{role_id}", response_model=RoleInDB)
-async def update_role(role_id: str, role: RoleUpdate, _: str = Depends(require_session)):
+async def update_role(role_id: str, role: RoleUpdate, _=Depends(require_permission("roles:write"))):
     try:
         if updated_role := await RoleService.update_role(role_id, role):
             return updated_role
@@ -39,7 +39,7 @@ async def update_role(role_id: str, role: RoleUpdate, _: str = Depends(require_s
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{role_id}")
-async def delete_role(role_id: str, _: str = Depends(require_session)):
+async def delete_role(role_id: str, _=Depends(require_permission("roles:write"))):
     try:
         if await RoleService.delete_role(role_id):
             return {"message": "Role deleted successfully"}
@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from back_app.api.deps.auth import COOKIE_NAME, require_session, session_user
+from back_app.models.telemetry_models import TelemetryBatch, TelemetrySample
+from back_app.services.flight_controller import FlightController, TelemetryOverloaded
+
+router = APIRouter(prefix="/telemetry", tags=["telemetry"])
+
+@router.post("/", status_code=202)
+async def ingest_telemetry(batch: TelemetryBatch, _=Depends(require_session)):
+    """Accept a batch of samples; they are stored within a few seconds"""
+    try:
+        return {"accepted": FlightController.ingest(batch.samples)}
+    except TelemetryOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+@router.websocket("/ws")
+async def telemetry_stream(websocket: WebSocket):
+    """
+    One connection per drone (or ground station); each message is a sample, a list
+    of samples or {"samples": [...]}. Nothing is sent back except errors.
+    Needs a session cookie, like the REST routes.
+    """
+    try:
+        session_user(websocket.cookies.get(COOKIE_NAME))
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError as e:
+                # A malformed frame is answered like an invalid sample; the stream stays open
+                await websocket.send_json({"error": f"Invalid JSON: {str(e)}"})
+                continue
+            if isinstance(message, dict) and "samples" in message:
+                message = message["samples"]
+            items = message if isinstance(message, list) else [message]
+            try:
+                FlightController.ingest([TelemetrySample(**item) for item in items])
+            except (ValidationError, TypeError) as e:
+                await websocket.send_json({"error": f"Invalid telemetry: {str(e)}"})
+            except TelemetryOverloaded as e:
+                await websocket.send_json({"error": str(e), "retry_after": 1})
+    except WebSocketDisconnect:
+        pass
+
+@router.get("/{drone_id}")
+async def get_telemetry(
+    drone_id: str,
+    since: Optional[datetime] = Query(None, description="Only samples taken after this time"),
+    limit: int = Query(1000, ge=1, le=10000),
+    _=Depends(require_session)
+):
+    """A drone's stored track, oldest first"""
+    try:
+        return await FlightController.history(drone_id, since, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch telemetry: {str(e)}")
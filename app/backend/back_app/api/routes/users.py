@@ -1,13 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends
 from back_app.models.user_models import UserCreate, UserUpdate, UserInDB
 from back_app.services.user_service import UserService
-from back_app.api.deps.auth import require_session
+from back_app.api.deps.auth import require_permission
 from datetime import datetime
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/", response_model=list[UserInDB])
-async def get_users():
+async def get_users(_=Depends(require_permission("users:read"))):
      """Get all users"""
      try:
          users = await UserService.get_users()
@@ -16,14 +16,14 @@ async def get_users():
          raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{user_id}", response_model=UserInDB)
-async def get_user(user_id: str, _: str = Depends(require_session)):
+async def get_user(user_id: str, _=Depends(require_permission("users:read"))):
     """Get a specific user by ID"""
     if user := await UserService.get_user(user_id):
         return user
     raise HTTPException(status_code=404, detail="User not found")
 
 @router.post("/", response_model=UserInDB)
-async def create_user(user: UserCreate):
+async def create_user(user: UserCreate, _=Depends(require_permission("users:write"))):
     """Create a new user"""
     try:
         return await UserService.create_user(user)
@@ -31,14 +31,14 @@ async def create_user(user: UserCreate):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{user_id}", response_model=UserInDB)
-async def update_user(user_id: str, user: UserUpdate):
+async def update_user(user_id: str, user: UserUpdate, _=Depends(require_permission("users:write"))):
     """Update an existing user"""
     if updated_user := await UserService.update_user(user_id, user):
         return updated_user
     raise HTTPException(status_code=404, detail="User not found")
 
 @router.delete("/{user_id}")
-async def delete_user(user_id: str):
+async def delete_user(user_id: str, _=Depends(require_permission("users:write"))):
     """Delete a user"""
     if await UserService.delete_user(user_id):
         return {"message": "User deleted successfully"}
@@ -1,9 +1,15 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 from starlette.staticfiles import StaticFiles
-from back_app.api.routes import missions, drones, analysis, login, ai, users, roles, bases
+from back_app.api.routes import missions, drones, analysis, login, ai, users, roles, bases, media, telemetry, events
+from back_app.services.inference_queue import InferenceWorkerPool
+from back_app.services.image_service import ImageService
+from back_app.services.flight_controller import FlightController
+from back_app.services.event_hub import EventHub
 from db.mongo import ensure_indexes, seed_admin
+from db.async_mongo import run_sync
 
 BASE_DIR = Path(__file__).resolve().parent          # -> /app/backend/back_app
 STATIC_DIR = BASE_DIR / "static"                    # -> /app/backend/back_app/static
@@ -23,14 +29,13 @@ app.add_middleware(
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
+# Images are served from the storage backend via /media (ETag/304/Range); the old
+# /static/litter_images URLs go through the same handler and must precede the /static mount
+app.include_router(media.legacy_router)
+
 STATIC_DIR.mkdir(parents=True, exist_ok=True)
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
-# Add litter images static serving
-LITTER_IMAGES_DIR = Path("C:/Users/flyin/AeroWaste/app/backend/back_app/ai/litter_images")
-LITTER_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/static/litter_images", StaticFiles(directory=str(LITTER_IMAGES_DIR)), name="litter_images")
-
 app.include_router(missions.router)
 app.include_router(drones.router)
 app.include_router(analysis.router)
@@ -39,12 +44,34 @@ app.include_router(ai.router)
 app.include_router(users.router)
 app.include_router(roles.router)
 app.include_router(bases.router)
+app.include_router(media.router)
+app.include_router(telemetry.router)
+app.include_router(events.router)
+
+# YOLO inference runs in separate worker processes so it never blocks the event loop
+inference_pool = InferenceWorkerPool()
+background_tasks = []
 
 @app.on_event("startup")
 async def _startup():
     # Create indexes and seed the Admin/Testing123 user + Admin role on first boot
-    ensure_indexes()
-    seed_admin()
+    await run_sync(ensure_indexes)
+    await run_sync(seed_admin)
+    inference_pool.start()
+    # Hand images from abandoned review sessions back to the queue
+    background_tasks.append(asyncio.create_task(ImageService.reclaim_leases_forever()))
+    # Buffered drone telemetry goes to Mongo in batches
+    background_tasks.append(asyncio.create_task(FlightController.run_forever()))
+    # Inference results pushed to /events subscribers
+    background_tasks.append(asyncio.create_task(EventHub.watch_detections_forever()))
+
+@app.on_event("shutdown")
+async def _shutdown():
+    for task in background_tasks:
+        task.cancel()
+    # Let the telemetry task write out what it still holds
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    inference_pool.stop()
 
 @app.get("/")
 async def root():
@@ -0,0 +1,51 @@
+"""
+Maintenance commands for the precomputed aggregates.
+
+Run from app/backend:
+
+    python -m back_app.maintenance rebuild-tiles
+    python -m back_app.maintenance rebuild-summaries
+    python -m back_app.maintenance dedupe-ids
+"""
+import sys
+import asyncio
+import argparse
+from back_app.services.geo_service import GeoService
+from back_app.services.summary_service import SummaryService
+from back_app.services.id_allocator import ID_FORMATS, IdAllocator
+
+async def rebuild_tiles(args):
+    print("🗺️ Rebuilding litter heatmap tiles from litter_images...")
+    written = await GeoService.rebuild_tiles()
+    print(f"✅ {written} tiles written")
+
+async def rebuild_summaries(args):
+    print("📊 Rebuilding mission/day detection summaries from litter_images...")
+    written = await SummaryService.rebuild()
+    print(f"✅ {written} summaries written")
+
+async def dedupe_ids(args):
+    print("🔢 Reassigning duplicate ids so the unique id indexes can be built...")
+    for collection in ID_FORMATS:
+        for old_id, new_id in await IdAllocator.reassign_duplicates(collection):
+            print(f"   {collection}: duplicate {old_id} is now {new_id}")
+    print("✅ Every id is unique")
+
+COMMANDS = {
+    "rebuild-tiles": (rebuild_tiles, "Recompute litter_tiles (heatmap grid) from confirmed litter"),
+    "rebuild-summaries": (rebuild_summaries, "Recompute detections_summary (mission/day counters)"),
+    "dedupe-ids": (dedupe_ids, "Renumber documents that share an id (from count-based ids)"),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="AeroWaste maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text)
+
+    args = parser.parse_args()
+    asyncio.run(COMMANDS[args.command][0](args))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -35,5 +35,11 @@ class DroneUpdate(BaseModel):
 
 class DroneInDB(DroneBase):
     id: str
+    # Latest telemetry (FlightController); None until the drone has reported
+    position: Optional[dict] = None  # GeoJSON Point
+    altitude: Optional[float] = None
+    speed: Optional[float] = None
+    heading: Optional[float] = None
+    last_telemetry_at: Optional[datetime] = None
     created_at: datetime = datetime.utcnow()
     updated_at: datetime = datetime.utcnow()
\ No newline at end of file
@@ -24,6 +24,7 @@ class HumanReview(BaseModel):
     weight_grams: Optional[int] = None
     reviewer: Optional[str] = None
     reviewed_at: Optional[str] = None
+    first_reviewed_at: Optional[str] = None
 
 class VacuumAction(BaseModel):
     command_issued: bool = False
@@ -46,11 +47,18 @@ class LitterImageInDB(BaseModel):
     mission_id: str
     drone_id: str
     image_url: str
+    storage_key: Optional[str] = None
     local_path: str
     original_filename: str
+    content_hash: Optional[str] = None
+    file_size: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    duplicate_of: Optional[str] = None
     captured_at: str
     location: Location
     classification: Classification
+    inferred_at: Optional[str] = None
     review_status: str
     bounding_boxes: List[BoundingBox]
     human_review: HumanReview
@@ -67,6 +75,8 @@ class ImageUploadResponse(BaseModel):
     message: str
     image_id: str
     image_url: str
+    job_id: Optional[str] = None
+    duplicate_of: Optional[str] = None
 
 class ReviewSubmission(BaseModel):
     id: str
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+class TelemetrySample(BaseModel):
+    drone_id: str
+    ts: Optional[datetime] = None  # when the drone took the reading; receipt time if omitted
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+    altitude: Optional[float] = None  # metres above take-off
+    battery: Optional[int] = Field(default=None, ge=0, le=100)
+    speed: Optional[float] = None  # m/s
+    heading: Optional[float] = None  # degrees
+    signal_strength: Optional[str] = None
+    status: Optional[str] = None
+
+class TelemetryBatch(BaseModel):
+    samples: List[TelemetrySample] = Field(..., max_length=1000)
@@ -0,0 +1,190 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, FrozenSet, Iterable, List, Optional, Tuple
+from bson import ObjectId
+from db.async_mongo import users, roles
+
+# Granted by the seeded Admin role: every permission
+ALL_PERMISSIONS = "all"
+
+class TTLCache:
+    """
+    LRU map whose entries go stale `ttl` seconds after they were stored
+
+    Stale entries are still returned (flagged as such) so callers can serve them
+    while a refresh runs. `generation` moves on every direct store, letting a
+    refresh that started before it know its result is already out of date.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 10_000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.generation = 0
+        # key -> (value, stored at), least recently used first
+        self._entries: "OrderedDict[Any, Tuple[Any, float]]" = OrderedDict()
+
+    def get(self, key) -> Tuple[Any, bool]:
+        """
+        (value, fresh); value is None when the key is unknown
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+        self._entries.move_to_end(key)
+        value, stored = entry
+        return value, time.monotonic() - stored < self.ttl
+
+    def set(self, key, value, generation: Optional[int] = None):
+        if generation is not None and generation != self.generation:
+            return
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def store(self, key, value):
+        # A known-current value: wins over any refresh already in flight
+        self.generation += 1
+        self.set(key, value)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+class Principal:
+    """
+    The caller of a request: user id, role name and the role's permissions
+    """
+
+    __slots__ = ("user_id", "role", "permissions")
+
+    def __init__(self, user_id: str, role: Optional[str], permissions: Iterable[str]):
+        self.user_id = user_id
+        self.role = role
+        self.permissions: FrozenSet[str] = frozenset(permissions)
+
+    def can(self, permission: str) -> bool:
+        return ALL_PERMISSIONS in self.permissions or permission in self.permissions
+
+class AuthService:
+    """
+    Authorisation from session claims, without a Mongo round trip per request
+
+    Session tokens carry the user's role and its permissions as of login. Each
+    process also keeps user -> (role, active) and role -> permissions in TTL
+    caches; when they hold an entry it overrides the token, so a role or
+    permission change applies to sessions already issued. Expired or missing
+    entries are refreshed in the background while the request is answered from
+    what is known (the stale entry, or the token), so requests never wait on
+    Mongo. Changes made through this process are stored immediately; other
+    processes pick them up within CACHE_SECONDS.
+    """
+
+    # How long another process may serve a user's or role's old permissions
+    CACHE_SECONDS = float(os.getenv("AEROWASTE_AUTH_CACHE_SECONDS", "30"))
+
+    # user id -> {"role": name, "active": bool}
+    _users = TTLCache(CACHE_SECONDS)
+
+    # role name -> list of permissions ([] for a deleted role)
+    _roles = TTLCache(CACHE_SECONDS)
+
+    # (cache, key) pairs being refreshed, and their tasks (kept referenced until done)
+    _refreshing = set()
+    _tasks = set()
+
+    @staticmethod
+    async def _load_user(user_id: str) -> dict:
+        doc = await users.find_one(
+            {"_id": ObjectId(user_id)}, {"_id": 0, "access_rights": 1, "is_active": 1}
+        ) if ObjectId.is_valid(user_id) else None
+        if doc is None:
+            return {"role": None, "active": False}
+        return {"role": doc.get("access_rights"), "active": doc.get("is_active", True)}
+
+    @staticmethod
+    async def _load_role(name: str) -> List[str]:
+        doc = await roles.find_one({"name": name}, {"_id": 0, "permissions": 1})
+        return list(doc.get("permissions") or []) if doc else []
+
+    @staticmethod
+    async def _refresh(cache: TTLCache, key, loader: Callable[[Any], Awaitable[Any]]):
+        generation = cache.generation
+        try:
+            cache.set(key, await loader(key), generation)
+        except Exception as e:
+            print(f"⚠️ Could not refresh authorisation cache for {key}: {e}")
+        finally:
+            AuthService._refreshing.discard((id(cache), key))
+
+    @staticmethod
+    def _cached(cache: TTLCache, key, loader: Callable[[Any], Awaitable[Any]]):
+        """
+        Cached value for `key` (None if unknown), scheduling a refresh when it is missing or stale
+        """
+        value, fresh = cache.get(key)
+        if not fresh and (id(cache), key) not in AuthService._refreshing:
+            AuthService._refreshing.add((id(cache), key))
+            task = asyncio.get_running_loop().create_task(AuthService._refresh(cache, key, loader))
+            AuthService._tasks.add(task)
+            task.add_done_callback(AuthService._tasks.discard)
+        return value
+
+    @staticmethod
+    async def role_permissions(role: Optional[str]) -> List[str]:
+        """
+        Current permissions of a role, loaded from Mongo unless freshly cached (used at login)
+        """
+        if not role:
+            return []
+        permissions, fresh = AuthService._roles.get(role)
+        if not fresh:
+            permissions = await AuthService._load_role(role)
+            AuthService._roles.set(role, permissions)
+        return permissions
+
+    @staticmethod
+    async def session_claims(user: dict) -> dict:
+        """
+        Role claims to embed in a new session token for `user` (a users document)
+        """
+        role = user.get("access_rights")
+        AuthService._users.store(str(user["_id"]), {"role": role, "active": user.get("is_active", True)})
+        return {"role": role, "perms": await AuthService.role_permissions(role)}
+
+    @staticmethod
+    def authorise(claims: dict) -> Principal:
+        """
+        Principal for decoded session claims; raises PermissionError for disabled or deleted accounts
+
+        Must run on the event loop (refreshes are scheduled on it), but never awaits.
+        """
+        user_id = claims["sub"]
+        user = AuthService._cached(AuthService._users, user_id, AuthService._load_user)
+        if user is not None and not user["active"]:
+            raise PermissionError("Account is disabled")
+
+        role = user["role"] if user is not None else claims.get("role")
+        permissions = AuthService._cached(AuthService._roles, role, AuthService._load_role) if role else []
+        if permissions is None:
+            # Role not cached yet: the token's claims hold, unless the user has since moved role
+            permissions = claims.get("perms", []) if role == claims.get("role") else []
+        return Principal(user_id, role, permissions)
+
+    @staticmethod
+    def user_updated(user_id: str, role: Optional[str], active: bool):
+        AuthService._users.store(user_id, {"role": role, "active": active})
+
+    @staticmethod
+    def user_deleted(user_id: str):
+        AuthService._users.store(user_id, {"role": None, "active": False})
+
+    @staticmethod
+    def role_updated(name: str, permissions: Optional[List[str]]):
+        AuthService._roles.store(name, list(permissions or []))
+
+    @staticmethod
+    def role_deleted(name: str):
+        AuthService._roles.store(name, [])
@@ -1,4 +1,6 @@
-from db.mongo import bases, routes
+from db.async_mongo import bases, routes
+from .event_hub import EventHub
+from .id_allocator import IdAllocator
 from back_app.models.base_models import (
     BaseStationCreate, BaseStationUpdate, BaseStationInDB,
     RouteCreate, RouteUpdate, RouteInDB
@@ -10,7 +12,7 @@ class BaseService:
     async def get_bases():
         cursor = bases.find({})
         docs = []
-        for doc in cursor:
+        async for doc in cursor:
             if "_id" in doc and "id" not in doc:
                 doc["id"] = str(doc["_id"])
             docs.append(BaseStationInDB(**doc))
@@ -18,7 +20,7 @@ class BaseService:
 
     @staticmethod
     async def get_base(base_id: str):
-        if (base := bases.find_one({"id": base_id})):
+        if (base := await bases.find_one({"id": base_id})):
             if "_id" in base and "id" not in base:
                 base["id"] = str(base["_id"])
             return BaseStationInDB(**base)
@@ -27,29 +29,37 @@ class BaseService:
     @staticmethod
     async def create_base(base: BaseStationCreate):
         base_dict = base.dict()
-        base_dict["id"] = f"B_{str(bases.count_documents({}) + 1).zfill(3)}"
+        base_dict["id"] = await IdAllocator.next_id("bases")
         base_dict["created_at"] = datetime.utcnow()
         base_dict["updated_at"] = datetime.utcnow()
         
-        bases.insert_one(base_dict)
-        return BaseStationInDB(**base_dict)
+        await bases.insert_one(base_dict)
+        created = BaseStationInDB(**base_dict)
+        EventHub.publish("bases", "base.created", created.dict(), key=created.id)
+        return created
 
     @staticmethod
     async def update_base(base_id: str, base: BaseStationUpdate):
         update_data = base.dict(exclude_unset=True)
         update_data["updated_at"] = datetime.utcnow()
         
-        result = bases.update_one(
+        result = await bases.update_one(
             {"id": base_id},
             {"$set": update_data}
         )
         if result.modified_count:
-            return await BaseService.get_base(base_id)
+            updated = await BaseService.get_base(base_id)
+            if updated:
+                # Capacity and status changes reach the dashboards without a reload
+                EventHub.publish("bases", "base.updated", updated.dict(), key=base_id)
+            return updated
         return None
 
     @staticmethod
     async def delete_base(base_id: str):
-        result = bases.delete_one({"id": base_id})
+        result = await bases.delete_one({"id": base_id})
+        if result.deleted_count:
+            EventHub.publish("bases", "base.deleted", {"id": base_id}, key=base_id)
         return result.deleted_count > 0
 
 class RouteService:
@@ -57,7 +67,7 @@ class RouteService:
     async def get_routes():
         cursor = routes.find({})
         docs = []
-        for doc in cursor:
+        async for doc in cursor:
             if "_id" in doc and "id" not in doc:
                 doc["id"] = str(doc["_id"])
             docs.append(RouteInDB(**doc))
@@ -65,7 +75,7 @@ class RouteService:
 
     @staticmethod
     async def get_route(route_id: str):
-        if (route := routes.find_one({"id": route_id})):
+        if (route := await routes.find_one({"id": route_id})):
             if "_id" in route and "id" not in route:
                 route["id"] = str(route["_id"])
             return RouteInDB(**route)
@@ -74,11 +84,11 @@ class RouteService:
     @staticmethod
     async def create_route(route: RouteCreate):
         route_dict = route.dict()
-        route_dict["id"] = f"R_{str(routes.count_documents({}) + 1).zfill(3)}_N"
+        route_dict["id"] = await IdAllocator.next_id("routes")
         route_dict["created_at"] = datetime.utcnow()
         route_dict["updated_at"] = datetime.utcnow()
         
-        routes.insert_one(route_dict)
+        await routes.insert_one(route_dict)
         return RouteInDB(**route_dict)
 
     @staticmethod
@@ -86,7 +96,7 @@ class RouteService:
         update_data = route.dict(exclude_unset=True)
         update_data["updated_at"] = datetime.utcnow()
         
-        result = routes.update_one(
+        result = await routes.update_one(
             {"id": route_id},
             {"$set": update_data}
         )
@@ -96,5 +106,5 @@ class RouteService:
 
     @staticmethod
     async def delete_route(route_id: str):
-        result = routes.delete_one({"id": route_id})
+        result = await routes.delete_one({"id": route_id})
         return result.deleted_count > 0
\ No newline at end of file
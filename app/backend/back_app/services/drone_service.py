@@ -1,4 +1,6 @@
-from db.mongo import drones
+from db.async_mongo import drones
+from .event_hub import EventHub
+from .id_allocator import IdAllocator
 from back_app.models.drone_models import DroneCreate, DroneUpdate, DroneInDB
 from datetime import datetime
 
@@ -7,7 +9,7 @@ class DroneService:
     async def get_drones():
         cursor = drones.find({})
         docs = []
-        for doc in cursor:
+        async for doc in cursor:
             # Convert MongoDB _id to string id if needed
             if "_id" in doc and "id" not in doc:
                 doc["id"] = str(doc["_id"])
@@ -16,7 +18,7 @@ class DroneService:
 
     @staticmethod
     async def get_drone(drone_id: str):
-        if (drone := drones.find_one({"id": drone_id})):
+        if (drone := await drones.find_one({"id": drone_id})):
             if "_id" in drone and "id" not in drone:
                 drone["id"] = str(drone["_id"])
             return DroneInDB(**drone)
@@ -25,27 +27,34 @@ class DroneService:
     @staticmethod
     async def create_drone(drone: DroneCreate):
         drone_dict = drone.dict()
-        drone_dict["id"] = f"D{str(drones.count_documents({}) + 1).zfill(3)}"
+        drone_dict["id"] = await IdAllocator.next_id("drones")
         drone_dict["created_at"] = datetime.utcnow()
         drone_dict["updated_at"] = datetime.utcnow()
         
-        drones.insert_one(drone_dict)
-        return DroneInDB(**drone_dict)
+        await drones.insert_one(drone_dict)
+        created = DroneInDB(**drone_dict)
+        EventHub.publish("drones", "drone.created", created.dict(), key=created.id)
+        return created
 
     @staticmethod
     async def update_drone(drone_id: str, drone: DroneUpdate):
         update_data = drone.dict(exclude_unset=True)
         update_data["updated_at"] = datetime.utcnow()
         
-        result = drones.update_one(
+        result = await drones.update_one(
             {"id": drone_id},
             {"$set": update_data}
         )
         if result.modified_count:
-            return await DroneService.get_drone(drone_id)
+            updated = await DroneService.get_drone(drone_id)
+            if updated:
+                EventHub.publish("drones", "drone.updated", updated.dict(), key=drone_id)
+            return updated
         return None
 
     @staticmethod
     async def delete_drone(drone_id: str):
-        result = drones.delete_one({"id": drone_id})
+        result = await drones.delete_one({"id": drone_id})
+        if result.deleted_count:
+            EventHub.publish("drones", "drone.deleted", {"id": drone_id}, key=drone_id)
         return result.deleted_count > 0
\ No newline at end of file
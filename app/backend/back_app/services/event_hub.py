@@ -0,0 +1,150 @@
+import os
+import json
+import asyncio
+import itertools
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+from .inference_queue import get_job_queue
+
+# What a client can subscribe to
+TOPICS = ("drones", "detections", "reviews", "bases")
+
+class Subscriber:
+    """
+    One push connection: its topics and the events waiting to be sent to it
+
+    At most `max_pending` events wait. Events published with a key (a drone,
+    base or image id) replace the one already waiting for that key, so a slow
+    client gets each entity's latest state rather than every step. Past the
+    limit the oldest events are dropped and the client is told to resync.
+    """
+
+    def __init__(self, max_pending: int):
+        self.topics: Set[str] = set()
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending: "OrderedDict[object, str]" = OrderedDict()
+        self._unkeyed = itertools.count()
+        self._ready = asyncio.Event()
+
+    def offer(self, key, message: str):
+        if key is not None and key in self._pending:
+            self._pending[key] = message
+        else:
+            self._pending[next(self._unkeyed) if key is None else key] = message
+            if len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+        self._ready.set()
+
+    async def next_frame(self) -> str:
+        """
+        Wait for events, then take everything pending as one JSON array
+        """
+        await self._ready.wait()
+        self._ready.clear()
+        messages = list(self._pending.values())
+        self._pending.clear()
+        if self.dropped:
+            messages.insert(0, json.dumps({"type": "resync", "dropped": self.dropped}))
+            self.dropped = 0
+        return "[" + ",".join(messages) + "]"
+
+class EventHub:
+    """
+    In-process pub/sub for the dashboard and review pages
+
+    Services publish changes as they make them (drone, base and review updates,
+    coalesced telemetry); detections written by the inference workers are picked
+    up from the job queue. Each event is serialised once and handed to every
+    subscriber of its topic without awaiting, so publishing costs the same
+    whether clients are fast or slow. Clients connected to another API process
+    only see that process's events.
+    """
+
+    # Events waiting per client before the oldest are dropped
+    QUEUE_SIZE = int(os.getenv("AEROWASTE_EVENTS_QUEUE_SIZE", "500"))
+
+    # A client that takes longer than this to accept a frame is disconnected
+    SEND_TIMEOUT = float(os.getenv("AEROWASTE_EVENTS_SEND_TIMEOUT", "10"))
+
+    # How often the job queue is checked for new detections
+    DETECTION_POLL_SECONDS = float(os.getenv("AEROWASTE_EVENTS_DETECTION_POLL_SECONDS", "1"))
+
+    _subscribers: Dict[str, Set[Subscriber]] = {topic: set() for topic in TOPICS}
+
+    @staticmethod
+    def connect(topics: Iterable[str]) -> Subscriber:
+        subscriber = Subscriber(EventHub.QUEUE_SIZE)
+        EventHub.subscribe(subscriber, topics)
+        return subscriber
+
+    @staticmethod
+    def subscribe(subscriber: Subscriber, topics: Iterable[str]):
+        """
+        Add topics to a subscriber; raises ValueError for an unknown topic
+        """
+        topics = set(topics)
+        if unknown := topics - set(TOPICS):
+            raise ValueError(f"Unknown topics: {', '.join(sorted(unknown))}")
+        for topic in topics:
+            EventHub._subscribers[topic].add(subscriber)
+        subscriber.topics |= topics
+
+    @staticmethod
+    def unsubscribe(subscriber: Subscriber, topics: Optional[Iterable[str]] = None):
+        topics = set(subscriber.topics if topics is None else topics) & subscriber.topics
+        for topic in topics:
+            EventHub._subscribers[topic].discard(subscriber)
+        subscriber.topics -= topics
+
+    @staticmethod
+    def has_subscribers(topic: str) -> bool:
+        return bool(EventHub._subscribers[topic])
+
+    @staticmethod
+    def publish(topic: str, event_type: str, data: dict, key: Optional[str] = None) -> int:
+        """
+        Queue an event for every subscriber of `topic`; returns how many there were
+
+        Events with the same key replace each other in a slow client's queue, so only
+        use a key for state (the latest value is all that matters), not for one-off events.
+        """
+        subscribers = EventHub._subscribers[topic]
+        if not subscribers:
+            return 0
+        message = json.dumps(
+            {"type": event_type, "topic": topic, "data": data, "ts": datetime.utcnow().isoformat() + "Z"},
+            default=str
+        )
+        queue_key = None if key is None else (topic, key)
+        for subscriber in subscribers:
+            subscriber.offer(queue_key, message)
+        return len(subscribers)
+
+    @staticmethod
+    async def watch_detections_forever():
+        """
+        Background task: publish inference results as the workers complete them
+
+        Starts from now; results finished before the API started are not replayed.
+        """
+        queue = get_job_queue()
+        position = (await asyncio.to_thread(queue.last_completed)) or (0.0, "")
+        while True:
+            try:
+                if EventHub.has_subscribers("detections"):
+                    jobs = await asyncio.to_thread(queue.completed_since, position)
+                    for job in jobs:
+                        EventHub.publish("detections", "detection.created", {
+                            "image_id": job["image_id"], **(job["result"] or {})
+                        }, key=job["image_id"])
+                    if jobs:
+                        position = (jobs[-1]["updated_at"], jobs[-1]["id"])
+                else:
+                    # Nobody listening: skip ahead instead of replaying a backlog to the next subscriber
+                    position = (await asyncio.to_thread(queue.last_completed)) or position
+            except Exception as e:
+                print(f"⚠️ Detection event polling failed: {e}")
+            await asyncio.sleep(EventHub.DETECTION_POLL_SECONDS)
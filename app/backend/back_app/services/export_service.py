@@ -0,0 +1,405 @@
+import os
+import json
+import hashlib
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path, PurePosixPath
+from typing import AsyncIterator, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
+from db.async_mongo import litter_images, dataset_snapshots
+from .image_service import ImageService, _UploadSink
+
+# Class order of the training set; exported labels use these ids so new data lines up with the existing model
+EXPORT_CLASSES_PATH = Path(os.getenv(
+    "AEROWASTE_EXPORT_CLASSES",
+    str(Path(__file__).resolve().parents[2] / "datasets" / "taco_yolo" / "classes.txt")
+))
+
+# Reviewed images make up the training set: confirmed litter with its boxes, rejections as background
+EXPORT_QUERY = {"review_status": "reviewed", "human_review.is_litter": {"$in": [True, False]}}
+
+def load_class_names(extra_labels: List[str], base: Optional[List[str]] = None) -> List[str]:
+    """
+    Training classes from classes.txt (or an earlier snapshot's list), followed by any
+    exported label it does not list (sorted). Only ever appends, so class ids stay stable.
+    """
+    names = list(base or [])
+    if not names and EXPORT_CLASSES_PATH.exists():
+        names = [line.strip() for line in EXPORT_CLASSES_PATH.read_text().splitlines() if line.strip()]
+    known = set(names)
+    return names + sorted(label for label in set(extra_labels) if label and label not in known)
+
+def data_yaml(class_names: List[str]) -> str:
+    """
+    data.yaml in the layout generate_yaml_from_classes_txt.py writes; without a `path`
+    key ultralytics resolves train/val relative to the file, wherever the archive is unpacked
+    """
+    lines = ["train: train/images", "val: val/images", f"nc: {len(class_names)}", "names:"]
+    lines += [f"  {i}: {name}" for i, name in enumerate(class_names)]
+    return "\n".join(lines) + "\n"
+
+def sample_key(doc: dict) -> str:
+    """
+    Name of an exported sample: the image content hash, so every duplicate upload
+    of a frame maps to the same sample across exports (legacy records use their id)
+    """
+    return doc.get("content_hash") or doc["id"]
+
+def split_of(doc: dict, val_percent: int) -> str:
+    """
+    Deterministic train/val assignment from the image content, so re-exports (and
+    duplicate uploads of the same frame) always land on the same side
+    """
+    return "val" if int(hashlib.sha1(sample_key(doc).encode()).hexdigest()[:8], 16) % 100 < val_percent else "train"
+
+def yolo_labels(doc: dict, class_ids: dict, width: int, height: int) -> str:
+    """
+    bounding_boxes (top-left x/y, width/height in pixels) as YOLO txt: class cx cy w h, normalised to 0..1
+    """
+    if not doc["human_review"].get("is_litter") or not width or not height:
+        return ""
+    lines = []
+    for box in doc.get("bounding_boxes") or []:
+        x1 = min(max(box["x"], 0), width)
+        y1 = min(max(box["y"], 0), height)
+        x2 = min(max(box["x"] + box["width"], 0), width)
+        y2 = min(max(box["y"] + box["height"], 0), height)
+        if x2 <= x1 or y2 <= y1 or box.get("label") not in class_ids:
+            continue
+        lines.append(
+            f"{class_ids[box['label']]} {(x1 + x2) / 2 / width:.6f} {(y1 + y2) / 2 / height:.6f} "
+            f"{(x2 - x1) / width:.6f} {(y2 - y1) / height:.6f}"
+        )
+    return "\n".join(lines) + ("\n" if lines else "")
+
+class _ZipSink:
+    """
+    Write-only file object for ZipFile: whatever is written is handed on to the
+    response and dropped, so the archive never accumulates in memory. It has no
+    seek(), which makes ZipFile use data descriptors instead of rewriting headers.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+class ExportService:
+
+    # Percentage of images assigned to the validation split
+    VAL_PERCENT = int(os.getenv("AEROWASTE_EXPORT_VAL_PERCENT", "20"))
+
+    # A snapshot's high-water mark trails its creation by this much, so writes stamped just
+    # before it but committed just after are picked up by the next delta instead of being lost
+    SNAPSHOT_LAG_SECONDS = 5
+
+    EXPORT_PROJECTION = {
+        "_id": 0, "id": 1, "storage_key": 1, "content_hash": 1, "width": 1, "height": 1,
+        "bounding_boxes": 1, "human_review.is_litter": 1, "human_review.first_reviewed_at": 1, "created_at": 1
+    }
+
+    @staticmethod
+    def export_query(include_background: bool) -> dict:
+        return EXPORT_QUERY if include_background else {**EXPORT_QUERY, "human_review.is_litter": True}
+
+    @staticmethod
+    async def class_names(base: Optional[List[str]] = None) -> List[str]:
+        labels = await litter_images.distinct("bounding_boxes.label", {**EXPORT_QUERY, "human_review.is_litter": True})
+        return await run_in_threadpool(load_class_names, labels, base)
+
+    @staticmethod
+    async def _write_entry(
+        archive: zipfile.ZipFile,
+        sink: _ZipSink,
+        name: str,
+        chunks: AsyncIterator[bytes],
+        compress: bool,
+        timestamp: tuple
+    ) -> AsyncIterator[bytes]:
+        """
+        Add one archive member from an async iterable of chunks, yielding archive bytes as they are produced
+        """
+        info = zipfile.ZipInfo(name, date_time=timestamp)
+        info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        entry = await run_in_threadpool(archive.open, info, "w", force_zip64=True)
+        try:
+            async for chunk in chunks:
+                await run_in_threadpool(entry.write, chunk)
+                if data := sink.drain():
+                    yield data
+        finally:
+            await run_in_threadpool(entry.close)
+        if data := sink.drain():
+            yield data
+
+    @staticmethod
+    async def _text(value: str) -> AsyncIterator[bytes]:
+        yield value.encode()
+
+    @staticmethod
+    async def _image_chunks(doc: dict, dimensions: _UploadSink) -> AsyncIterator[bytes]:
+        # Images without stored dimensions (older uploads) are measured from their header on the way through
+        measure = not (doc.get("width") and doc.get("height"))
+        async for chunk in ImageService.storage.stream(doc["storage_key"]):
+            if measure:
+                await run_in_threadpool(dimensions.update, chunk)
+            yield chunk
+
+    @staticmethod
+    async def _write_sample(
+        archive: zipfile.ZipFile,
+        sink: _ZipSink,
+        doc: dict,
+        class_ids: dict,
+        val_percent: int,
+        timestamp: tuple
+    ) -> AsyncIterator[bytes]:
+        """
+        {split}/images/<sample><ext> and {split}/labels/<sample>.txt for one record
+        """
+        split, key = split_of(doc, val_percent), sample_key(doc)
+        dimensions = _UploadSink()
+        image_name = f"{split}/images/{key}{PurePosixPath(doc['storage_key']).suffix}"
+        async for data in ExportService._write_entry(
+            archive, sink, image_name, ExportService._image_chunks(doc, dimensions), False, timestamp
+        ):
+            yield data
+
+        labels = yolo_labels(
+            doc, class_ids, doc.get("width") or dimensions.width, doc.get("height") or dimensions.height
+        )
+        async for data in ExportService._write_entry(
+            archive, sink, f"{split}/labels/{key}.txt", ExportService._text(labels), True, timestamp
+        ):
+            yield data
+
+    @staticmethod
+    async def _write_dataset_files(
+        archive: zipfile.ZipFile,
+        sink: _ZipSink,
+        class_names: List[str],
+        timestamp: tuple,
+        manifest: Optional[dict] = None
+    ) -> AsyncIterator[bytes]:
+        files = [("classes.txt", "\n".join(class_names) + "\n"), ("data.yaml", data_yaml(class_names))]
+        if manifest is not None:
+            files.append(("manifest.json", json.dumps(manifest, indent=2) + "\n"))
+        for name, value in files:
+            async for data in ExportService._write_entry(archive, sink, name, ExportService._text(value), True, timestamp):
+                yield data
+        await run_in_threadpool(archive.close)
+        yield sink.drain()
+
+    @staticmethod
+    async def stream_yolo_zip(
+        val_percent: int = None,
+        include_background: bool = True,
+        class_names: Optional[List[str]] = None,
+        until: Optional[str] = None,
+        manifest: Optional[dict] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Reviewed images and their boxes as a YOLO dataset zip, produced while it is sent
+
+        Layout: {train,val}/images/<sample><ext>, {train,val}/labels/<sample>.txt, classes.txt,
+        data.yaml (and manifest.json for snapshots). `until` limits the export to records last
+        changed at or before that updated_at. Memory stays at one cursor batch plus one storage
+        chunk whatever the dataset size. Records sharing a content hash are exported once.
+        """
+        val_percent = ExportService.VAL_PERCENT if val_percent is None else val_percent
+        class_names = class_names or await ExportService.class_names()
+        class_ids = {name: i for i, name in enumerate(class_names)}
+        timestamp = datetime.utcnow().timetuple()[:6]
+
+        sink = _ZipSink()
+        archive = zipfile.ZipFile(sink, "w")
+        query = ExportService.export_query(include_background)
+        if until:
+            query = {**query, "updated_at": {"$lte": until}}
+        # In content-hash order duplicates are adjacent, so skipping them needs no memory of what was sent;
+        # the hint keeps the planner from sorting the whole reviewed set in memory instead
+        cursor = litter_images.find(query, ExportService.EXPORT_PROJECTION).hint(
+            [("content_hash", 1), ("id", 1)]
+        ).sort([("content_hash", 1), ("id", 1)])
+        previous_hash = None
+
+        async for doc in cursor:
+            if not doc.get("storage_key") or (doc.get("content_hash") and doc["content_hash"] == previous_hash):
+                continue
+            previous_hash = doc.get("content_hash")
+            if manifest is not None:
+                manifest["added"] += 1
+            async for data in ExportService._write_sample(archive, sink, doc, class_ids, val_percent, timestamp):
+                yield data
+
+        async for data in ExportService._write_dataset_files(archive, sink, class_names, timestamp, manifest):
+            yield data
+
+    @staticmethod
+    async def stream_yolo_delta(snapshot: dict, base: dict) -> AsyncIterator[bytes]:
+        """
+        Samples added, changed or removed between two snapshots' high-water marks, as a zip
+
+        Only records whose updated_at falls in (base, snapshot] are visited: they are grouped
+        by sample on the server, and each touched sample is written from its current first
+        qualifying record, or listed under "removed" in manifest.json if none qualifies any more.
+        """
+        class_ids = {name: i for i, name in enumerate(snapshot["class_names"])}
+        query = ExportService.export_query(snapshot["include_background"])
+        timestamp = datetime.utcnow().timetuple()[:6]
+        manifest = ExportService.manifest(snapshot)
+
+        sink = _ZipSink()
+        archive = zipfile.ZipFile(sink, "w")
+        changed = litter_images.aggregate([
+            # Unreviewed records (uploads, lease claims) were never part of a dataset
+            {"$match": {
+                "review_status": "reviewed",
+                "updated_at": {"$gt": base["high_water_mark"], "$lte": snapshot["high_water_mark"]}
+            }},
+            {"$group": {"_id": {"$ifNull": ["$content_hash", "$id"]}, "id": {"$min": "$id"}}},
+            {"$sort": {"_id": 1}}
+        ], allowDiskUse=True)
+
+        async for group in changed:
+            by_hash = group["_id"] != group["id"]
+            doc = await litter_images.find_one(
+                {**query, "content_hash": group["_id"]} if by_hash else {**query, "id": group["id"]},
+                ExportService.EXPORT_PROJECTION,
+                sort=[("id", 1)]
+            )
+            if doc is None or not doc.get("storage_key"):
+                manifest["removed"].append({"sample": group["_id"]})
+                continue
+            reviewed_at = doc["human_review"].get("first_reviewed_at") or doc.get("created_at") or ""
+            key = "added" if reviewed_at > base["high_water_mark"] else "changed"
+            manifest[key] += 1
+            async for data in ExportService._write_sample(
+                archive, sink, doc, class_ids, snapshot["val_percent"], timestamp
+            ):
+                yield data
+
+        async for data in ExportService._write_dataset_files(
+            archive, sink, snapshot["class_names"], timestamp, manifest
+        ):
+            yield data
+
+    @staticmethod
+    def manifest(snapshot: dict) -> dict:
+        """
+        manifest.json of a snapshot archive: how to apply it to a local copy of the dataset
+
+        A full snapshot (base_version null) is unpacked into an empty directory. A delta
+        requires the local copy to be at base_version: its files overwrite existing ones,
+        then every sample listed in "removed" has its image and label deleted from both splits.
+        """
+        return {
+            "format": "yolo",
+            "version": snapshot["version"],
+            "base_version": snapshot["base_version"],
+            "high_water_mark": snapshot["high_water_mark"],
+            "created_at": snapshot["created_at"],
+            "val_percent": snapshot["val_percent"],
+            "include_background": snapshot["include_background"],
+            "added": 0,
+            "changed": 0,
+            "removed": []
+        }
+
+    @staticmethod
+    def _snapshot_out(snapshot: dict) -> dict:
+        return {
+            "version": snapshot["version"],
+            "base_version": snapshot["base_version"],
+            "high_water_mark": snapshot["high_water_mark"],
+            "created_at": snapshot["created_at"],
+            "val_percent": snapshot["val_percent"],
+            "include_background": snapshot["include_background"],
+            "classes": len(snapshot["class_names"]),
+            "download_url": f"{ImageService.PUBLIC_BASE_URL}/ai/export/snapshots/{snapshot['version']}"
+        }
+
+    @staticmethod
+    async def create_snapshot(
+        full: bool = False,
+        val_percent: int = None,
+        include_background: bool = True
+    ) -> dict:
+        """
+        Record a new dataset version whose high-water mark is (about) now
+
+        Continues the latest snapshot's chain as a delta, keeping its split and
+        class list, unless `full` (or there is no snapshot yet), which starts a new chain.
+        """
+        while True:
+            latest = await dataset_snapshots.find_one({}, {"_id": 0}, sort=[("version", DESCENDING)])
+            base = None if full or latest is None else latest
+            now = datetime.utcnow()
+            high_water_mark = (now - timedelta(seconds=ExportService.SNAPSHOT_LAG_SECONDS)).isoformat(timespec="microseconds") + "Z"
+            if base and high_water_mark <= base["high_water_mark"]:
+                raise ValueError("Nothing new since the latest snapshot; try again in a few seconds")
+
+            snapshot = {
+                "version": (latest["version"] + 1) if latest else 1,
+                "base_version": base["version"] if base else None,
+                "high_water_mark": high_water_mark,
+                "created_at": now.isoformat() + "Z",
+                "val_percent": base["val_percent"] if base else (
+                    ExportService.VAL_PERCENT if val_percent is None else val_percent
+                ),
+                "include_background": base["include_background"] if base else include_background,
+                "class_names": await ExportService.class_names(base["class_names"] if base else None)
+            }
+            try:
+                await dataset_snapshots.insert_one(dict(snapshot))
+                return ExportService._snapshot_out(snapshot)
+            except DuplicateKeyError:
+                continue  # another export took this version number; chain onto it instead
+
+    @staticmethod
+    async def list_snapshots(limit: int = 50) -> List[dict]:
+        docs = await dataset_snapshots.find({}, {"_id": 0}).sort("version", DESCENDING).limit(limit).to_list(limit)
+        return [ExportService._snapshot_out(doc) for doc in docs]
+
+    @staticmethod
+    async def stream_snapshot(version: int) -> Optional[AsyncIterator[bytes]]:
+        """
+        Archive of a snapshot: the full dataset up to its high-water mark, or the delta from its base
+
+        Returns None for an unknown version. A full snapshot holds the records last updated
+        at or before its high-water mark, in their current state; a record updated after the
+        snapshot was taken is left out here and arrives with the next delta. A delta holds the
+        samples with a record updated in (base, high-water mark], each written from its current
+        first qualifying record, which may carry changes made after the snapshot; samples whose
+        records were all updated later are left to the next delta.
+        """
+        snapshot = await dataset_snapshots.find_one({"version": version}, {"_id": 0})
+        if not snapshot:
+            return None
+        if snapshot["base_version"] is None:
+            return ExportService.stream_yolo_zip(
+                val_percent=snapshot["val_percent"],
+                include_background=snapshot["include_background"],
+                class_names=snapshot["class_names"],
+                until=snapshot["high_water_mark"],
+                manifest=ExportService.manifest(snapshot)
+            )
+        base = await dataset_snapshots.find_one({"version": snapshot["base_version"]}, {"_id": 0})
+        return ExportService.stream_yolo_delta(snapshot, base)
@@ -0,0 +1,202 @@
+import os
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from db.async_mongo import drones, telemetry
+from back_app.models.telemetry_models import TelemetrySample
+from .event_hub import EventHub
+
+class TelemetryOverloaded(Exception):
+    """
+    More samples are waiting to be written than FlightController.MAX_BUFFERED allows
+    """
+
+# Fields of the latest sample mirrored onto the drone document
+STATE_FIELDS = ("battery", "signal_strength", "status", "altitude", "speed", "heading")
+
+def _utc(ts: Optional[datetime]) -> datetime:
+    if ts is None:
+        return datetime.utcnow()
+    # Stored naive UTC, like every other timestamp in the database
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+
+class FlightController:
+    """
+    Live drone telemetry: buffered in memory, written to Mongo in batches
+
+    Samples are appended to an in-process buffer and flushed to the `telemetry`
+    time-series collection with one insert_many every FLUSH_SECONDS (sooner when
+    FLUSH_BATCH samples are waiting). Each drone's latest state is coalesced
+    in memory and written to `drones` with one bulk_write every STATE_SECONDS,
+    however many samples arrived in between. A sample never costs a round trip
+    of its own, so 50 drones at 10 Hz are 500 samples/s for a couple of writes.
+    Samples not yet flushed are lost if the process dies.
+    """
+
+    FLUSH_SECONDS = float(os.getenv("AEROWASTE_TELEMETRY_FLUSH_SECONDS", "1"))
+    FLUSH_BATCH = int(os.getenv("AEROWASTE_TELEMETRY_FLUSH_BATCH", "5000"))
+    STATE_SECONDS = float(os.getenv("AEROWASTE_TELEMETRY_STATE_SECONDS", "2"))
+
+    # Samples allowed to wait for a flush (e.g. while Mongo is down); beyond this ingestion is refused
+    MAX_BUFFERED = int(os.getenv("AEROWASTE_TELEMETRY_MAX_BUFFERED", "100000"))
+
+    _samples: List[dict] = []
+
+    # drone id -> newest sample not yet written to `drones`
+    _latest: Dict[str, dict] = {}
+
+    _flush_requested: Optional[asyncio.Event] = None
+    _flush_lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    def _document(sample: TelemetrySample) -> dict:
+        doc = {
+            "ts": _utc(sample.ts),
+            "meta": {"drone_id": sample.drone_id},
+            "location": {"type": "Point", "coordinates": [sample.lon, sample.lat]},
+        }
+        for field in STATE_FIELDS:
+            if (value := getattr(sample, field)) is not None:
+                doc[field] = value
+        return doc
+
+    @staticmethod
+    def ingest(samples: Iterable[TelemetrySample]) -> int:
+        """
+        Buffer samples for the next flush; returns how many were accepted
+
+        Never touches Mongo. Raises TelemetryOverloaded when the buffer is full.
+        """
+        samples = list(samples)
+        if len(FlightController._samples) + len(samples) > FlightController.MAX_BUFFERED:
+            raise TelemetryOverloaded("Telemetry buffer is full, retry shortly")
+
+        for sample in samples:
+            doc = FlightController._document(sample)
+            FlightController._samples.append(doc)
+            drone_id = sample.drone_id
+            latest = FlightController._latest.get(drone_id)
+            # Batches may arrive out of order: the drone document only ever moves forward
+            if latest is None or doc["ts"] >= latest["ts"]:
+                FlightController._latest[drone_id] = doc
+
+        if len(FlightController._samples) >= FlightController.FLUSH_BATCH and FlightController._flush_requested:
+            FlightController._flush_requested.set()
+        return len(samples)
+
+    @staticmethod
+    async def flush_samples() -> int:
+        """
+        Write buffered samples to the time-series collection in one insert_many
+        """
+        if FlightController._flush_lock is None:
+            FlightController._flush_lock = asyncio.Lock()
+        async with FlightController._flush_lock:
+            batch, FlightController._samples = FlightController._samples, []
+            if not batch:
+                return 0
+            try:
+                await telemetry.insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # Unordered: everything but the failed documents was stored, so only those are retried
+                failed = [batch[error["index"]] for error in e.details.get("writeErrors", [])]
+                FlightController._samples[:0] = failed
+                raise
+            except Exception:
+                # Keep them for the next attempt, ahead of anything received meanwhile
+                FlightController._samples[:0] = batch
+                raise
+            return len(batch)
+
+    @staticmethod
+    async def flush_state() -> int:
+        """
+        Write each drone's newest position and readings to `drones` in one bulk_write
+        """
+        latest, FlightController._latest = FlightController._latest, {}
+        if not latest:
+            return 0
+        operations = []
+        for drone_id, doc in latest.items():
+            update = {
+                "position": doc["location"],
+                "last_telemetry_at": doc["ts"],
+                "updated_at": datetime.utcnow(),
+            }
+            update.update({field: doc[field] for field in STATE_FIELDS if field in doc})
+            operations.append(UpdateOne(
+                # Another API process may already have written a newer sample for this drone
+                {"id": drone_id, "$or": [
+                    {"last_telemetry_at": {"$lt": doc["ts"]}},
+                    {"last_telemetry_at": {"$exists": False}}
+                ]},
+                {"$set": update}
+            ))
+        try:
+            await drones.bulk_write(operations, ordered=False)
+        except Exception:
+            for drone_id, doc in latest.items():
+                newer = FlightController._latest.get(drone_id)
+                if newer is None or newer["ts"] < doc["ts"]:
+                    FlightController._latest[drone_id] = doc
+            raise
+        for drone_id, doc in latest.items():
+            EventHub.publish("drones", "drone.telemetry", {
+                "id": drone_id, "position": doc["location"], "last_telemetry_at": doc["ts"],
+                **{field: doc[field] for field in STATE_FIELDS if field in doc}
+            }, key=drone_id)
+        return len(operations)
+
+    @staticmethod
+    async def flush():
+        await FlightController.flush_samples()
+        await FlightController.flush_state()
+
+    @staticmethod
+    async def run_forever():
+        """
+        Background task: flush samples every FLUSH_SECONDS (or once FLUSH_BATCH are waiting)
+        and drone state every STATE_SECONDS; flushes what is left when cancelled
+        """
+        FlightController._flush_requested = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        next_state = loop.time() + FlightController.STATE_SECONDS
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(FlightController._flush_requested.wait(), FlightController.FLUSH_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                FlightController._flush_requested.clear()
+                try:
+                    await FlightController.flush_samples()
+                    if loop.time() >= next_state:
+                        next_state = loop.time() + FlightController.STATE_SECONDS
+                        await FlightController.flush_state()
+                except Exception as e:
+                    print(f"⚠️ Telemetry flush failed ({len(FlightController._samples)} samples waiting): {e}")
+        finally:
+            try:
+                await FlightController.flush()
+            except Exception as e:
+                print(f"⚠️ Final telemetry flush failed, {len(FlightController._samples)} samples lost: {e}")
+
+    @staticmethod
+    async def history(drone_id: str, since: Optional[datetime] = None, limit: int = 1000) -> List[dict]:
+        """
+        A drone's stored samples, oldest first (buffered ones appear after the next flush)
+        """
+        query = {"meta.drone_id": drone_id}
+        if since is not None:
+            query["ts"] = {"$gt": _utc(since)}
+        docs = await telemetry.find(query, {"_id": 0}).sort("ts", 1).limit(limit).to_list(limit)
+        return [
+            {
+                "drone_id": doc["meta"]["drone_id"], "ts": doc["ts"],
+                "lat": doc["location"]["coordinates"][1], "lon": doc["location"]["coordinates"][0],
+                **{field: doc[field] for field in STATE_FIELDS if field in doc}
+            }
+            for doc in docs
+        ]
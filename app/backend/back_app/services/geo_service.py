@@ -0,0 +1,339 @@
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from db.async_mongo import async_db, litter_images, litter_tiles
+from db.mongo import INDEXES
+
+# A detection counts as litter once a reviewer has confirmed it
+CONFIRMED_LITTER = {"review_status": "reviewed", "human_review.is_litter": True}
+
+# Grid levels kept in litter_tiles; a level-L cell is 360 / 2**L degrees square
+# (level 6 ~ 625 km, level 20 ~ 38 m at the equator)
+GRID_LEVELS = (6, 8, 10, 12, 14, 16, 18, 20)
+
+def cell_size(level: int) -> float:
+    return 360.0 / (1 << level)
+
+def cell_of(lon: float, lat: float, level: int) -> Tuple[int, int]:
+    """
+    Grid cell (x, y) holding a point; must agree with the rebuild pipeline's arithmetic
+    """
+    size = cell_size(level)
+    x = min(math.floor((lon + 180.0) / size), (1 << level) - 1)
+    y = min(math.floor((lat + 90.0) / size), (1 << (level - 1)) - 1)
+    return x, y
+
+def class_key(label: Optional[str]) -> str:
+    # Classes become field names in the aggregate documents, where "." would mean nesting
+    return (label or "unclassified").replace(".", "_")
+
+def _litter_point(location: Optional[dict], human_review: Optional[dict]) -> Optional[Tuple[float, float, str, int]]:
+    """
+    (lon, lat, class, weight) a document contributes to the tiles, or None if it is not confirmed litter
+    """
+    if not human_review or human_review.get("is_litter") is not True:
+        return None
+    coordinates = (location or {}).get("coordinates") or []
+    if len(coordinates) < 2:
+        return None
+    return (
+        coordinates[0], coordinates[1],
+        class_key(human_review.get("litter_class")),
+        human_review.get("weight_grams") or 0
+    )
+
+def _check_bbox(min_lon: float, min_lat: float, max_lon: float, max_lat: float):
+    if min_lon >= max_lon or min_lat >= max_lat:
+        raise ValueError("Bounding box must have min_lon < max_lon and min_lat < max_lat")
+
+class GeoService:
+
+    # Cells a heatmap response may hold; the grid level is chosen to stay under it
+    MAX_HEATMAP_CELLS = 4096
+
+    # Bulk tile updates sent per round trip
+    TILE_BULK_CHUNK = 1000
+
+    POINT_PROJECTION = {
+        "_id": 0, "id": 1, "mission_id": 1, "location": 1, "captured_at": 1,
+        "human_review.litter_class": 1, "human_review.weight_grams": 1
+    }
+
+    @staticmethod
+    def _point(doc: dict) -> dict:
+        human_review = doc.get("human_review") or {}
+        point = {
+            "id": doc["id"],
+            "mission_id": doc.get("mission_id"),
+            "lon": doc["location"]["coordinates"][0],
+            "lat": doc["location"]["coordinates"][1],
+            "litter_class": human_review.get("litter_class"),
+            "weight_grams": human_review.get("weight_grams"),
+            "captured_at": doc.get("captured_at")
+        }
+        if "distance_m" in doc:
+            point["distance_m"] = round(doc["distance_m"], 1)
+        return point
+
+    @staticmethod
+    async def litter_in_bbox(
+        min_lon: float,
+        min_lat: float,
+        max_lon: float,
+        max_lat: float,
+        limit: int = 500,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Confirmed litter inside a lon/lat box, paged by image id
+
+        Box edges are geodesic (GeoJSON polygon), which only matters for continent-sized boxes.
+        Returns the page and the cursor (last id) for the next one.
+        """
+        _check_bbox(min_lon, min_lat, max_lon, max_lat)
+        ring = [[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]]
+        query = {
+            **CONFIRMED_LITTER,
+            "location": {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [ring]}}}
+        }
+        if cursor:
+            query["id"] = {"$gt": cursor}
+
+        # Without the hint the planner may walk the id index over the whole collection to avoid the sort
+        docs = await litter_images.find(query, GeoService.POINT_PROJECTION).hint(
+            [("location", "2dsphere")]
+        ).sort("id", 1).limit(limit + 1).to_list(limit + 1)
+
+        next_cursor = docs[limit - 1]["id"] if len(docs) > limit else None
+        return [GeoService._point(doc) for doc in docs[:limit]], next_cursor
+
+    @staticmethod
+    async def litter_near(lon: float, lat: float, radius_m: float, limit: int = 500) -> List[dict]:
+        """
+        Confirmed litter within radius_m metres of a point, nearest first
+        """
+        docs = await litter_images.aggregate([
+            {"$geoNear": {
+                "near": {"type": "Point", "coordinates": [lon, lat]},
+                "key": "location",
+                "distanceField": "distance_m",
+                "maxDistance": radius_m,
+                "spherical": True,
+                "query": CONFIRMED_LITTER
+            }},
+            {"$limit": limit},
+            {"$project": {**GeoService.POINT_PROJECTION, "distance_m": 1}}
+        ]).to_list(limit)
+        return [GeoService._point(doc) for doc in docs]
+
+    @staticmethod
+    def heatmap_level(min_lon: float, min_lat: float, max_lon: float, max_lat: float, max_cells: int) -> int:
+        """
+        Finest grid level whose cells covering the box number at most max_cells
+        """
+        for level in reversed(GRID_LEVELS):
+            x0, y0 = cell_of(min_lon, min_lat, level)
+            x1, y1 = cell_of(max_lon, max_lat, level)
+            if (x1 - x0 + 1) * (y1 - y0 + 1) <= max_cells:
+                return level
+        return GRID_LEVELS[0]
+
+    @staticmethod
+    async def heatmap(
+        min_lon: float,
+        min_lat: float,
+        max_lon: float,
+        max_lat: float,
+        max_cells: int = None,
+        litter_class: Optional[str] = None
+    ) -> dict:
+        """
+        Per-cell confirmed litter counts and weights over a box, read from the precomputed litter_tiles
+
+        Cost depends on the number of cells returned (at most max_cells), not on how many detections they hold.
+        """
+        _check_bbox(min_lon, min_lat, max_lon, max_lat)
+        max_cells = min(max_cells or GeoService.MAX_HEATMAP_CELLS, GeoService.MAX_HEATMAP_CELLS)
+        level = GeoService.heatmap_level(min_lon, min_lat, max_lon, max_lat, max_cells)
+        size = cell_size(level)
+        x0, y0 = cell_of(min_lon, min_lat, level)
+        x1, y1 = cell_of(max_lon, max_lat, level)
+
+        prefix = f"classes.{class_key(litter_class)}." if litter_class else ""
+        tiles = await litter_tiles.find(
+            {
+                "level": level,
+                "x": {"$gte": x0, "$lte": x1},
+                "y": {"$gte": y0, "$lte": y1},
+                f"{prefix}count": {"$gt": 0}
+            },
+            {"_id": 0, "x": 1, "y": 1, f"{prefix}count": 1, f"{prefix}weight_grams": 1}
+        ).to_list(None)
+
+        cells = []
+        for tile in tiles:
+            counts = tile["classes"][class_key(litter_class)] if litter_class else tile
+            cells.append({
+                "lon": round((tile["x"] + 0.5) * size - 180.0, 7),
+                "lat": round((tile["y"] + 0.5) * size - 90.0, 7),
+                "count": counts["count"],
+                "weight_grams": counts.get("weight_grams", 0)
+            })
+
+        return {
+            "level": level,
+            "cell_size_deg": size,
+            "max_count": max((cell["count"] for cell in cells), default=0),
+            "cells": cells
+        }
+
+    @staticmethod
+    async def totals() -> dict:
+        """
+        Confirmed litter count, weight and per-class breakdown, summed over the coarsest grid level
+        """
+        tiles = await litter_tiles.find(
+            {"level": GRID_LEVELS[0], "count": {"$gt": 0}},
+            {"_id": 0, "count": 1, "weight_grams": 1, "classes": 1}
+        ).to_list(None)
+
+        classes = {}
+        for tile in tiles:
+            for label, counts in (tile.get("classes") or {}).items():
+                total = classes.setdefault(label, {"count": 0, "weight_grams": 0})
+                total["count"] += counts.get("count", 0)
+                total["weight_grams"] += counts.get("weight_grams", 0)
+
+        return {
+            "confirmed_litter": sum(tile["count"] for tile in tiles),
+            "weight_grams": sum(tile.get("weight_grams", 0) for tile in tiles),
+            "classes": {label: total for label, total in classes.items() if total["count"]}
+        }
+
+    @staticmethod
+    async def apply_review_changes(changes: List[Tuple[dict, dict]]):
+        """
+        Move confirmed litter between tiles after reviews were saved
+
+        `changes` pairs each reviewed document as it was before the review (location,
+        human_review) with the review that replaced it. A re-review first takes the old
+        contribution out, so approving, rejecting or reclassifying an image never double counts.
+        """
+        deltas: Dict[str, dict] = {}
+
+        def add(point, sign: int):
+            lon, lat, label, weight = point
+            for level in GRID_LEVELS:
+                x, y = cell_of(lon, lat, level)
+                delta = deltas.setdefault(f"{level}/{x}/{y}", {"level": level, "x": x, "y": y, "inc": {}})
+                for field, value in (
+                    ("count", sign), ("weight_grams", sign * weight),
+                    (f"classes.{label}.count", sign), (f"classes.{label}.weight_grams", sign * weight)
+                ):
+                    delta["inc"][field] = delta["inc"].get(field, 0) + value
+
+        for before, review in changes:
+            old = _litter_point(before.get("location"), before.get("human_review"))
+            new = _litter_point(before.get("location"), review)
+            if old == new:
+                continue
+            if old:
+                add(old, -1)
+            if new:
+                add(new, 1)
+
+        now = datetime.utcnow().isoformat() + "Z"
+        operations = [
+            UpdateOne(
+                {"_id": tile_id},
+                {
+                    "$inc": delta["inc"],
+                    "$set": {"updated_at": now},
+                    "$setOnInsert": {"level": delta["level"], "x": delta["x"], "y": delta["y"]}
+                },
+                upsert=True
+            )
+            for tile_id, delta in deltas.items()
+            if any(delta["inc"].values())
+        ]
+        for start in range(0, len(operations), GeoService.TILE_BULK_CHUNK):
+            await litter_tiles.bulk_write(operations[start:start + GeoService.TILE_BULK_CHUNK], ordered=False)
+
+    @staticmethod
+    def rebuild_pipeline(target: str) -> List[dict]:
+        """
+        Aggregation computing every tile from litter_images in one pass, written to `target` with $out
+        """
+        label = {"$ifNull": ["$human_review.litter_class", ""]}
+        lon = {"$arrayElemAt": ["$location.coordinates", 0]}
+        lat = {"$arrayElemAt": ["$location.coordinates", 1]}
+        grids = [
+            {"level": level, "size": cell_size(level), "max_x": (1 << level) - 1, "max_y": (1 << (level - 1)) - 1}
+            for level in GRID_LEVELS
+        ]
+
+        def index(coordinate, offset, bound):
+            return {"$toInt": {"$min": [
+                {"$floor": {"$divide": [{"$add": [coordinate, offset]}, "$$grid.size"]}}, bound
+            ]}}
+
+        return [
+            {"$match": {**CONFIRMED_LITTER, "location.coordinates.1": {"$exists": True}}},
+            {"$project": {
+                "_id": 0,
+                "label": {"$cond": [
+                    {"$eq": [label, ""]}, "unclassified",
+                    {"$replaceAll": {"input": label, "find": ".", "replacement": "_"}}
+                ]},
+                "weight": {"$ifNull": ["$human_review.weight_grams", 0]},
+                "cells": {"$map": {"input": grids, "as": "grid", "in": {
+                    "level": "$$grid.level",
+                    "x": index(lon, 180, "$$grid.max_x"),
+                    "y": index(lat, 90, "$$grid.max_y")
+                }}}
+            }},
+            {"$unwind": "$cells"},
+            {"$group": {
+                "_id": {"level": "$cells.level", "x": "$cells.x", "y": "$cells.y", "label": "$label"},
+                "count": {"$sum": 1},
+                "weight_grams": {"$sum": "$weight"}
+            }},
+            {"$group": {
+                "_id": {"level": "$_id.level", "x": "$_id.x", "y": "$_id.y"},
+                "count": {"$sum": "$count"},
+                "weight_grams": {"$sum": "$weight_grams"},
+                "classes": {"$push": {"k": "$_id.label", "v": {"count": "$count", "weight_grams": "$weight_grams"}}}
+            }},
+            {"$project": {
+                "_id": {"$concat": [
+                    {"$toString": "$_id.level"}, "/", {"$toString": "$_id.x"}, "/", {"$toString": "$_id.y"}
+                ]},
+                "level": "$_id.level",
+                "x": "$_id.x",
+                "y": "$_id.y",
+                "count": 1,
+                "weight_grams": 1,
+                "classes": {"$arrayToObject": "$classes"},
+                "updated_at": {"$literal": datetime.utcnow().isoformat() + "Z"}
+            }},
+            {"$out": target}
+        ]
+
+    @staticmethod
+    async def rebuild_tiles() -> int:
+        """
+        Recompute litter_tiles from litter_images (backfill, or to repair drift)
+
+        The tiles are built into a scratch collection and swapped in with a rename,
+        so heatmaps keep reading the old tiles until the new ones are complete.
+        Returns the number of tiles written.
+        """
+        scratch = async_db[f"{litter_tiles.name}_rebuild"]
+        await scratch.drop()
+        await scratch.create_indexes(INDEXES[litter_tiles.name])  # $out keeps the target's indexes
+        await litter_images.aggregate(
+            GeoService.rebuild_pipeline(scratch.name), allowDiskUse=True
+        ).to_list(None)
+        await scratch.rename(litter_tiles.name, dropTarget=True)
+        return await litter_tiles.count_documents({})
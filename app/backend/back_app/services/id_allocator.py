@@ -0,0 +1,106 @@
+import os
+import asyncio
+import re
+from typing import Dict, List, Tuple
+from pymongo import ReturnDocument
+from db.async_mongo import async_db, counters
+
+# Human-friendly id per collection: prefix + zero-padded sequence number + suffix
+ID_FORMATS: Dict[str, Tuple[str, str]] = {
+    "drones": ("D", ""),
+    "bases": ("B_", ""),
+    "routes": ("R_", "_N"),
+    "roles": ("R", ""),
+    "users": ("U", ""),
+}
+
+def format_id(collection: str, number: int) -> str:
+    prefix, suffix = ID_FORMATS[collection]
+    return f"{prefix}{str(number).zfill(3)}{suffix}"
+
+def _id_pattern(collection: str) -> str:
+    prefix, suffix = ID_FORMATS[collection]
+    return f"^{re.escape(prefix)}(\\d+){re.escape(suffix)}$"
+
+class IdAllocator:
+    """
+    Sequence numbers for human-friendly ids, from one counter document per collection
+
+    Each process reserves a block of numbers with a single atomic $inc and hands
+    them out from memory, so ids cost one round trip per block rather than a
+    count per insert, and two creates can never get the same number. Numbers
+    left in a block when a process exits are skipped, so ids may have gaps.
+    """
+
+    # Numbers reserved per round trip
+    BLOCK_SIZE = int(os.getenv("AEROWASTE_ID_BLOCK_SIZE", "20"))
+
+    # collection -> [last number handed out, last number reserved]
+    _blocks: Dict[str, List[int]] = {}
+
+    _refill_locks: Dict[str, asyncio.Lock] = {}
+
+    # Counters this process has checked against the ids already in their collection
+    _seeded = set()
+
+    @staticmethod
+    async def _seed(collection: str):
+        """
+        Start a new counter above the ids the collection already holds (seed data, older records)
+        """
+        if await counters.find_one({"_id": collection}, {"_id": 1}) is None:
+            pattern = re.compile(_id_pattern(collection))
+            existing = await async_db[collection].find(
+                {"id": {"$regex": pattern.pattern}}, {"_id": 0, "id": 1}
+            ).to_list(None)
+            highest = max((int(pattern.match(doc["id"]).group(1)) for doc in existing), default=0)
+            # $max: processes seeding at the same time agree, and a counter already in use never moves back
+            await counters.update_one({"_id": collection}, {"$max": {"seq": highest}}, upsert=True)
+        IdAllocator._seeded.add(collection)
+
+    @staticmethod
+    async def next_number(collection: str) -> int:
+        while True:
+            block = IdAllocator._blocks.get(collection)
+            if block is not None and block[0] < block[1]:
+                block[0] += 1
+                return block[0]
+            # One refill at a time per collection; creates waiting on it then draw from the new block
+            async with IdAllocator._refill_locks.setdefault(collection, asyncio.Lock()):
+                block = IdAllocator._blocks.get(collection)
+                if block is not None and block[0] < block[1]:
+                    continue
+                if collection not in IdAllocator._seeded:
+                    await IdAllocator._seed(collection)
+                size = IdAllocator.BLOCK_SIZE
+                counter = await counters.find_one_and_update(
+                    {"_id": collection}, {"$inc": {"seq": size}},
+                    upsert=True, return_document=ReturnDocument.AFTER
+                )
+                IdAllocator._blocks[collection] = [counter["seq"] - size, counter["seq"]]
+
+    @staticmethod
+    async def next_id(collection: str) -> str:
+        """
+        Next id for a new document in `collection` (D001, B_001, R_001_N, ...)
+        """
+        return format_id(collection, await IdAllocator.next_number(collection))
+
+    @staticmethod
+    async def reassign_duplicates(collection: str) -> List[Tuple[str, str]]:
+        """
+        Give fresh ids to documents that share one (left by count-based ids), so the unique
+        index can be built; the oldest document keeps the id. Returns (old id, new id) pairs.
+        """
+        groups = await async_db[collection].aggregate([
+            {"$match": {"id": {"$type": "string"}}},
+            {"$group": {"_id": "$id", "docs": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}}
+        ]).to_list(None)
+        changes = []
+        for group in groups:
+            for doc_id in sorted(group["docs"])[1:]:
+                new_id = await IdAllocator.next_id(collection)
+                await async_db[collection].update_one({"_id": doc_id}, {"$set": {"id": new_id}})
+                changes.append((group["_id"], new_id))
+        return changes
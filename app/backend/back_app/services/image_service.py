@@ -1,21 +1,145 @@
 import os
+import json
 import uuid
-from datetime import datetime
+import base64
+import asyncio
+import hashlib
+from io import BytesIO
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
 from fastapi import UploadFile
-from db.mongo import litter_images
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image, ImageOps
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+from db.async_mongo import litter_images
+from .storage import StorageBackend, StorageUpload, get_storage
+from .event_hub import EventHub
+from .geo_service import GeoService
+from .summary_service import SummaryService, insert_operations, review_operations
 from ..models.image_models import LitterImageCreate, LitterImageInDB
 
+class _UploadSink:
+    """
+    Hashes an upload chunk by chunk and sniffs the image dimensions from
+    its header in the same pass, while the bytes stream on to storage
+    """
+    
+    # JPEG SOF markers sit after EXIF/XMP; give up on dimensions past this point
+    HEADER_LIMIT = 2 * 1024 * 1024
+    
+    def __init__(self):
+        self.size = 0
+        self.width = None
+        self.height = None
+        self._sha256 = hashlib.sha256()
+        self._head = bytearray()
+    
+    @property
+    def content_hash(self) -> str:
+        return self._sha256.hexdigest()
+    
+    def update(self, chunk: bytes):
+        self._sha256.update(chunk)
+        self.size += len(chunk)
+        
+        if self.width is None and len(self._head) < self.HEADER_LIMIT:
+            self._head += chunk[:self.HEADER_LIMIT - len(self._head)]
+            self._sniff_dimensions()
+    
+    def _sniff_dimensions(self):
+        # Image.open only parses the header, so this never decodes pixels
+        try:
+            with Image.open(BytesIO(self._head)) as image:
+                self.width, self.height = image.size
+            self._head = bytearray()
+        except Exception:
+            pass  # header not complete yet
+
+def _encode_cursor(sort_value, image_id: str) -> str:
+    """Opaque keyset cursor for the last row of a page"""
+    return base64.urlsafe_b64encode(json.dumps([sort_value, image_id]).encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        sort_value, image_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return sort_value, image_id
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+def _keyset_filter(base: dict, field: str, cursor: Optional[str], direction: int) -> dict:
+    """
+    Restrict `base` to rows after `cursor` in (field, id) order, so every page
+    is a bounded index range scan however deep it is
+    """
+    if not cursor:
+        return base
+    sort_value, image_id = _decode_cursor(cursor)
+    op = "$gt" if direction > 0 else "$lt"
+    return {
+        **base,
+        "$or": [
+            {field: {op: sort_value}},
+            {field: sort_value, "id": {op: image_id}}
+        ]
+    }
+
+def _render_derivative(storage: StorageBackend, source_uri: str, target: Path, size: int, quality: int, image_format: str):
+    """Downscale an original to a WebP/JPEG no larger than size x size"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    part_path = target.with_name(target.name + ".part")
+    with Image.open(storage.open_uri(source_uri)) as image:
+        # JPEG can decode straight at 1/2, 1/4 or 1/8 scale, skipping most of the work
+        image.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image_format == "WEBP":
+            image.convert("RGB").save(part_path, "WEBP", quality=quality, method=4)
+        else:
+            image.convert("RGB").save(part_path, "JPEG", quality=quality, optimize=True, progressive=True)
+    os.replace(part_path, target)
+
 class ImageService:
     
-    # Local storage path for images
-    STORAGE_PATH = Path("C:/Users/flyin/AeroWaste/app/backend/back_app/ai/litter_images")
+    # Where originals live (local disk or S3-compatible, see services/storage.py)
+    storage = get_storage()
     
-    @staticmethod
-    def ensure_storage_directory():
-        """Create storage directory if it doesn't exist"""
-        ImageService.STORAGE_PATH.mkdir(parents=True, exist_ok=True)
+    # Per-replica disk cache for thumbnails/previews, generated on first request
+    DERIVATIVE_PATH = Path(os.getenv(
+        "AEROWASTE_DERIVATIVE_CACHE",
+        str(Path(__file__).resolve().parents[1] / "ai" / "litter_derivatives")
+    ))
+    
+    # Derivative name -> (longest edge in px, quality)
+    DERIVATIVES = {
+        "thumb": (384, 70),
+        "preview": (1280, 80),
+    }
+    
+    # Derivative encodings, picked per request from the Accept header: format -> (PIL format, media type)
+    DERIVATIVE_FORMATS = {
+        "webp": ("WEBP", "image/webp"),
+        "jpg": ("JPEG", "image/jpeg"),
+    }
+    
+    # Where clients reach this API; used to build image URLs
+    PUBLIC_BASE_URL = os.getenv("AEROWASTE_PUBLIC_BASE_URL", "http://127.0.0.1:8001")
+    
+    # Uploads are streamed in chunks of this size, so memory stays flat for any file size
+    CHUNK_SIZE = 1024 * 1024
+    
+    # Files written at once by upload_images; beyond this the disk is the bottleneck anyway
+    UPLOAD_CONCURRENCY = int(os.getenv("AEROWASTE_UPLOAD_CONCURRENCY", "8"))
+    
+    # Reviews sent to Mongo per bulk_write round trip
+    REVIEW_BULK_CHUNK = 1000
+    
+    # Times a review is sent while its image keeps changing between being read and written
+    REVIEW_WRITE_ATTEMPTS = 3
+    
+    # How long a reviewer holds the images handed to them before others can claim them
+    REVIEW_LEASE_SECONDS = int(os.getenv("AEROWASTE_REVIEW_LEASE_SECONDS", "600"))
     
     @staticmethod
     async def upload_image(
@@ -27,24 +151,124 @@ class ImageService:
         """
         Upload an image file and save metadata to MongoDB
         """
-        # Ensure storage directory exists
-        ImageService.ensure_storage_directory()
+        image_doc, created = await ImageService._store_upload(file, mission_id, drone_id, location)
+        
+        # Insert into MongoDB
+        try:
+            result = await litter_images.insert_one(image_doc)
+        except Exception:
+            if created:
+                await ImageService._release_blob(image_doc)
+            raise
+        image_doc["_id"] = result.inserted_id
+        await SummaryService.apply(insert_operations([image_doc]))
+        
+        return LitterImageInDB(**image_doc)
+    
+    @staticmethod
+    async def upload_images(
+        files: List[UploadFile],
+        mission_id: str = None,
+        drone_id: str = None,
+        extras: Optional[List[dict]] = None
+    ) -> List[Union[LitterImageInDB, Exception]]:
+        """
+        Upload many image files concurrently and save their metadata with one insert_many
+        
+        `extras` optionally holds per-file fields merged into each record (e.g. source_video).
+        Returns one entry per file, in order: the stored record, or the exception that stopped it
+        """
+        semaphore = asyncio.Semaphore(ImageService.UPLOAD_CONCURRENCY)
+        
+        async def store(file: UploadFile, extra: Optional[dict]):
+            async with semaphore:
+                return await ImageService._store_upload(file, mission_id, drone_id, extra=extra)
+        
+        outcomes = await asyncio.gather(
+            *(store(f, extra) for f, extra in zip(files, extras or [None] * len(files))),
+            return_exceptions=True
+        )
+        
+        stored = [(i, *outcome) for i, outcome in enumerate(outcomes) if not isinstance(outcome, BaseException)]
+        for i, doc, _ in stored:
+            outcomes[i] = doc
+        if stored:
+            docs = [doc for _, doc, _ in stored]
+            failed = set()
+            try:
+                await litter_images.insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                # Unordered: everything except the reported documents was inserted
+                for error in e.details.get("writeErrors", []):
+                    failed.add(error["index"])
+                    index, doc, created = stored[error["index"]]
+                    outcomes[index] = ValueError(error.get("errmsg", "Failed to save image metadata"))
+                    if created:
+                        await ImageService._release_blob(doc)
+            await SummaryService.apply(insert_operations(
+                doc for position, doc in enumerate(docs) if position not in failed
+            ))
+        
+        return [
+            outcome if isinstance(outcome, BaseException) else LitterImageInDB(**outcome)
+            for outcome in outcomes
+        ]
+    
+    @staticmethod
+    def _blob_key(content_hash: str, extension: str) -> str:
+        """
+        Content-addressed storage key of an original: <aa>/<bb>/<sha256><ext>
+        """
+        return f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{extension}"
+    
+    @staticmethod
+    async def _release_blob(image_doc: dict):
+        """
+        Delete a blob this upload created, unless another record already points at it
+        """
+        if not await litter_images.count_documents({"content_hash": image_doc["content_hash"]}, limit=1):
+            await ImageService.storage.delete(image_doc["storage_key"])
+    
+    @staticmethod
+    async def _store_upload(
+        file: UploadFile,
+        mission_id: str = None,
+        drone_id: str = None,
+        location: dict = None,
+        extra: Optional[dict] = None
+    ) -> Tuple[dict, bool]:
+        """
+        Validate and stream an upload to storage, returning its (not yet inserted) database document
         
-        # Generate unique filename
+        Identical bytes are stored once: the second return value is False when the blob already
+        existed, in which case any inference results cached for it are copied onto the new record.
+        """
         file_extension = Path(file.filename).suffix.lower()
         if file_extension not in ['.jpg', '.jpeg', '.png', '.bmp']:
             raise ValueError("Unsupported file format. Use JPG, PNG, or BMP.")
+        if file_extension == ".jpeg":
+            file_extension = ".jpg"
         
-        unique_filename = f"{uuid.uuid4().hex}{file_extension}"
-        file_path = ImageService.STORAGE_PATH / unique_filename
+        # The key depends on the hash, so the upload is staged and committed once it is known
+        upload = await ImageService.storage.open_upload()
+        try:
+            sink = await ImageService._stream_to_storage(file, upload)
+            storage_key = ImageService._blob_key(sink.content_hash, file_extension)
+            created = await upload.commit(storage_key)
+        except BaseException:
+            await upload.abort()
+            raise
         
-        # Save file to local storage
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # Served by the /media route from whichever backend holds it
+        image_url = f"{ImageService.PUBLIC_BASE_URL}/media/{storage_key}"
         
-        # Create image URL (relative to backend static serving)
-        image_url = f"http://127.0.0.1:8001/static/litter_images/{unique_filename}"
+        # A re-uploaded frame inherits the inference results of its first copy
+        source = None
+        if not created:
+            source = await litter_images.find_one(
+                {"content_hash": sink.content_hash, "inferred_at": {"$ne": None}},
+                {"_id": 0, "id": 1, "classification": 1, "bounding_boxes": 1, "inferred_at": 1}
+            )
         
         # Create database document
         image_doc = {
@@ -52,19 +276,26 @@ class ImageService:
             "mission_id": mission_id or f"mission_{uuid.uuid4().hex[:8]}",
             "drone_id": drone_id or f"drone_{uuid.uuid4().hex[:8]}",
             "image_url": image_url,
-            "local_path": str(file_path),
+            "storage_key": storage_key,
+            "local_path": ImageService.storage.uri(storage_key),
             "original_filename": file.filename,
+            "content_hash": sink.content_hash,
+            "file_size": sink.size,
+            "width": sink.width,
+            "height": sink.height,
+            "duplicate_of": source["id"] if source else None,
             "captured_at": datetime.utcnow().isoformat() + "Z",
             "location": location or {
                 "type": "Point",
                 "coordinates": [-0.12345, 51.56789]  # Default London coordinates
             },
-            "classification": {
+            "classification": source["classification"] if source else {
                 "label": None,
                 "confidence": None
             },
+            "inferred_at": source["inferred_at"] if source else None,
             "review_status": "pending",
-            "bounding_boxes": [],
+            "bounding_boxes": source.get("bounding_boxes", []) if source else [],
             "human_review": {
                 "is_litter": None,
                 "litter_class": None,
@@ -79,68 +310,312 @@ class ImageService:
             "created_at": datetime.utcnow().isoformat() + "Z",
             "updated_at": datetime.utcnow().isoformat() + "Z"
         }
+        if extra:
+            image_doc.update(extra)
         
-        # Insert into MongoDB
-        result = litter_images.insert_one(image_doc)
-        image_doc["_id"] = result.inserted_id
+        return image_doc, created
+    
+    @staticmethod
+    async def _stream_to_storage(file: UploadFile, upload: StorageUpload) -> _UploadSink:
+        """
+        Copy an upload to storage in CHUNK_SIZE pieces, hashing it on the way
+        """
+        sink = _UploadSink()
+        while chunk := await file.read(ImageService.CHUNK_SIZE):
+            await run_in_threadpool(sink.update, chunk)
+            await upload.write(chunk)
+        return sink
+    
+    @staticmethod
+    def derivative_url(image_id: str, variant: str) -> str:
+        return f"{ImageService.PUBLIC_BASE_URL}/ai/image/{image_id}/{variant}"
+    
+    # Derivatives being rendered right now, so concurrent requests share one render
+    _rendering = {}
+    
+    @staticmethod
+    async def get_derivative(image_id: str, variant: str, image_format: str = "webp") -> Optional[Path]:
+        """
+        Path of a cached thumbnail/preview for an image, rendering it on first request
         
-        return LitterImageInDB(**image_doc)
+        Returns None if the image does not exist; raises ValueError for an unknown variant.
+        """
+        if variant not in ImageService.DERIVATIVES:
+            raise ValueError(f"Unknown image variant '{variant}'. Use one of: {', '.join(ImageService.DERIVATIVES)}")
+        
+        image_doc = await litter_images.find_one({"id": image_id}, {"_id": 0, "local_path": 1, "content_hash": 1})
+        if not image_doc:
+            return None
+        
+        # Keyed by content, so the cache stays valid for as long as the original does
+        key = image_doc.get("content_hash") or image_id
+        target = ImageService.DERIVATIVE_PATH / key[:2] / f"{key}_{variant}.{image_format}"
+        if target.exists():
+            return target
+        
+        render = ImageService._rendering.get(target)
+        if render is None:
+            size, quality = ImageService.DERIVATIVES[variant]
+            render = asyncio.ensure_future(run_in_threadpool(
+                _render_derivative, ImageService.storage, image_doc["local_path"], target, size, quality,
+                ImageService.DERIVATIVE_FORMATS[image_format][0]
+            ))
+            ImageService._rendering[target] = render
+            render.add_done_callback(lambda _: ImageService._rendering.pop(target, None))
+        await asyncio.shield(render)
+        return target
+    
+    # Only the fields the queue/history responses use
+    QUEUE_PROJECTION = {"_id": 0, "id": 1, "image_url": 1, "classification": 1, "mission_id": 1, "captured_at": 1}
+    HISTORY_PROJECTION = {"_id": 0, "id": 1, "mission_id": 1, "classification": 1, "human_review": 1}
+    
+    @staticmethod
+    def _queue_item(doc: dict) -> dict:
+        return {
+            "id": doc["id"],
+            "image_url": doc["image_url"],
+            "thumbnail_url": ImageService.derivative_url(doc["id"], "thumb"),
+            "preview_url": ImageService.derivative_url(doc["id"], "preview"),
+            "ai_class": doc["classification"]["label"] or "unknown",
+            "ai_conf": doc["classification"]["confidence"] or 0.0,
+            "mission_id": doc["mission_id"],
+            "ts": doc["captured_at"]
+        }
     
     @staticmethod
     async def get_pending_images(limit: int = 6, reviewer: str = "admin") -> List[dict]:
         """
-        Get images pending review for the validation queue
+        Claim up to `limit` images for `reviewer`, oldest first
+        
+        Claimed images move to "in_review" with a lease, so concurrent reviewers never
+        get the same image. Images this reviewer already holds are handed back first (and
+        their lease renewed); expired leases are claimable by anyone.
         """
-        cursor = litter_images.find(
-            {"review_status": "pending"}
-        ).limit(limit)
+        now = datetime.utcnow()
+        now_iso = now.isoformat() + "Z"
+        lease = {
+            "reviewer": reviewer,
+            "expires_at": (now + timedelta(seconds=ImageService.REVIEW_LEASE_SECONDS)).isoformat() + "Z"
+        }
         
-        images = []
-        for doc in cursor:
-            images.append({
-                "id": doc["id"],
-                "image_url": doc["image_url"],
-                "ai_class": doc["classification"]["label"] or "unknown",
-                "ai_conf": doc["classification"]["confidence"] or 0.0,
-                "mission_id": doc["mission_id"],
-                "ts": doc["captured_at"]
-            })
+        held_query = {"review_status": "in_review", "lease.reviewer": reviewer, "lease.expires_at": {"$gt": now_iso}}
+        docs = await litter_images.find(
+            held_query, ImageService.QUEUE_PROJECTION
+        ).sort([("captured_at", 1), ("id", 1)]).limit(limit).to_list(limit)
+        if docs:
+            await litter_images.update_many(
+                {**held_query, "id": {"$in": [doc["id"] for doc in docs]}},
+                {"$set": {"lease": lease}}
+            )
+        
+        # Each claim is a single atomic find_one_and_update, so two reviewers can't win the same image
+        claimable = {"$or": [
+            {"review_status": "pending"},
+            {"review_status": "in_review", "lease.expires_at": {"$lte": now_iso}}
+        ]}
+        while len(docs) < limit:
+            doc = await litter_images.find_one_and_update(
+                claimable,
+                {"$set": {"review_status": "in_review", "lease": lease, "updated_at": now_iso}},
+                projection=ImageService.QUEUE_PROJECTION,
+                sort=[("captured_at", 1), ("id", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if doc is None:
+                break
+            docs.append(doc)
+        
+        return [ImageService._queue_item(doc) for doc in docs]
+    
+    @staticmethod
+    async def release_expired_leases() -> int:
+        """
+        Return images whose review lease has run out to the pending queue
+        """
+        now_iso = datetime.utcnow().isoformat() + "Z"
+        result = await litter_images.update_many(
+            {"review_status": "in_review", "lease.expires_at": {"$lte": now_iso}},
+            {"$set": {"review_status": "pending", "updated_at": now_iso}, "$unset": {"lease": ""}}
+        )
+        return result.modified_count
+    
+    @staticmethod
+    async def reclaim_leases_forever(interval: float = 60.0):
+        """
+        Background task: periodically release expired review leases
+        """
+        while True:
+            try:
+                released = await ImageService.release_expired_leases()
+                if released:
+                    print(f"♻️ Released {released} expired review leases")
+            except Exception as e:
+                print(f"⚠️ Lease reclamation failed: {e}")
+            await asyncio.sleep(interval)
+    
+    @staticmethod
+    async def list_pending_images(
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Browse images pending review, oldest first, without claiming them
         
-        return images
+        Returns the page and the cursor for the next one (None on the last page)
+        """
+        query = _keyset_filter({"review_status": "pending"}, "captured_at", cursor, 1)
+        docs = await litter_images.find(
+            query, ImageService.QUEUE_PROJECTION
+        ).sort([("captured_at", 1), ("id", 1)]).limit(limit + 1).to_list(limit + 1)
+        
+        next_cursor = None
+        if len(docs) > limit:
+            next_cursor = _encode_cursor(docs[limit - 1]["captured_at"], docs[limit - 1]["id"])
+        
+        return [ImageService._queue_item(doc) for doc in docs[:limit]], next_cursor
+    
+    @staticmethod
+    def _review_update(review_data: dict, now: Optional[str] = None) -> dict:
+        """
+        Update document recording a human review (and ending any review lease)
+        """
+        now = now or datetime.utcnow().isoformat() + "Z"
+        return {
+            "$set": {
+                "human_review.is_litter": review_data.get("is_litter"),
+                "human_review.litter_class": review_data.get("litter_class"),
+                "human_review.weight_grams": review_data.get("weight_grams"),
+                "human_review.reviewer": review_data.get("reviewer", "admin"),
+                "human_review.reviewed_at": now,
+                "review_status": "reviewed",
+                "updated_at": now
+            },
+            # Kept across re-reviews: when the image first entered the training set
+            "$min": {"human_review.first_reviewed_at": now},
+            "$unset": {"lease": ""}
+        }
     
     @staticmethod
     async def update_human_review(image_id: str, review_data: dict) -> bool:
         """
         Update human review data for an image
         """
-        update_doc = {
-            "human_review.is_litter": review_data.get("is_litter"),
-            "human_review.litter_class": review_data.get("litter_class"),
-            "human_review.weight_grams": review_data.get("weight_grams"),
-            "human_review.reviewer": review_data.get("reviewer", "admin"),
-            "human_review.reviewed_at": datetime.utcnow().isoformat() + "Z",
-            "review_status": "reviewed",
-            "updated_at": datetime.utcnow().isoformat() + "Z"
-        }
+        outcomes, _ = await ImageService.update_human_reviews([{**review_data, "id": image_id}])
+        return outcomes[0]["saved"]
+    
+    @staticmethod
+    async def update_human_reviews(reviews: List[dict]) -> Tuple[List[dict], int]:
+        """
+        Save many human reviews with one bulk_write per REVIEW_BULK_CHUNK items
         
-        result = litter_images.update_one(
-            {"id": image_id},
-            {"$set": update_doc}
-        )
+        Each review is a review_data dict that also carries the image "id".
+        Returns a per-item outcome ({"id", "saved", "error"?}) in input order and the saved count.
+        
+        Each update only applies if the image's review state is still what was read before
+        it, so the heatmap tiles and summaries are adjusted from what the review replaced.
+        When another request got there first, only those images are read and sent again.
+        Drift is still possible if the process dies between the writes, if another review
+        overwrites one of ours before we check it, or when the last of REVIEW_WRITE_ATTEMPTS
+        writes regardless; rebuild-tiles and rebuild-summaries repair it.
+        """
+        outcomes = []
         
-        return result.modified_count > 0
+        for start in range(0, len(reviews), ImageService.REVIEW_BULK_CHUNK):
+            chunk = reviews[start:start + ImageService.REVIEW_BULK_CHUNK]
+            now = datetime.utcnow().isoformat() + "Z"
+            
+            # If an image is reviewed twice in one request, the last review is what is stored
+            pending = {review["id"]: review for review in chunk}
+            errors = {}
+            changes = []
+            for attempt in range(ImageService.REVIEW_WRITE_ATTEMPTS):
+                # One indexed lookup tells us which ids exist, so misses are reported per item,
+                # and what each review replaces
+                found = await litter_images.find(
+                    {"id": {"$in": list(pending)}},
+                    {"_id": 0, "id": 1, "mission_id": 1, "captured_at": 1, "location": 1, "review_status": 1, "human_review": 1}
+                ).to_list(None)
+                existing = {doc["id"]: doc for doc in found}
+                for image_id in [image_id for image_id in pending if image_id not in existing]:
+                    errors[image_id] = "Image not found"
+                    del pending[image_id]
+                if not pending:
+                    break
+                
+                # The last attempt saves the review regardless, accepting that its counts may drift
+                guarded = attempt < ImageService.REVIEW_WRITE_ATTEMPTS - 1
+                operations = [
+                    (image_id, UpdateOne(
+                        {
+                            "id": image_id,
+                            "review_status": existing[image_id].get("review_status"),
+                            "human_review.reviewed_at": (existing[image_id].get("human_review") or {}).get("reviewed_at")
+                        } if guarded else {"id": image_id},
+                        ImageService._review_update(review, now)
+                    ))
+                    for image_id, review in pending.items()
+                ]
+                try:
+                    result = await litter_images.bulk_write([op for _, op in operations], ordered=False)
+                    matched = result.matched_count
+                except BulkWriteError as e:
+                    matched = e.details.get("nMatched", 0)
+                    for error in e.details.get("writeErrors", []):
+                        image_id = operations[error["index"]][0]
+                        errors[image_id] = error.get("errmsg", "Failed to save review")
+                        del pending[image_id]
+                
+                if matched == len(pending):
+                    stored = list(pending)
+                else:
+                    # Some images changed since they were read: find which of our writes landed
+                    stored = [doc["id"] for doc in await litter_images.find(
+                        {"id": {"$in": list(pending)}, "human_review.reviewed_at": now}, {"_id": 0, "id": 1}
+                    ).to_list(None)]
+                for image_id in stored:
+                    changes.append((existing[image_id], pending.pop(image_id)))
+                if not pending:
+                    break
+            # Only deleted images are left once the last, unconditional attempt is done
+            for image_id in pending:
+                errors[image_id] = "Image not found"
+            
+            for review in chunk:
+                if review["id"] in errors:
+                    outcomes.append({"id": review["id"], "saved": False, "error": errors[review["id"]]})
+                else:
+                    outcomes.append({"id": review["id"], "saved": True})
+            
+            await GeoService.apply_review_changes(changes)
+            await SummaryService.apply(review_operations(changes))
+            for _, review in changes:
+                EventHub.publish("reviews", "review.saved", {
+                    "id": review["id"],
+                    "is_litter": review.get("is_litter"),
+                    "litter_class": review.get("litter_class"),
+                    "weight_grams": review.get("weight_grams"),
+                    "reviewer": review.get("reviewer", "admin")
+                }, key=review["id"])
+        
+        return outcomes, sum(1 for outcome in outcomes if outcome["saved"])
     
     @staticmethod
-    async def get_review_history(limit: int = 20) -> List[dict]:
+    async def get_review_history(
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
         """
-        Get history of reviewed images
+        Get a page of reviewed images, most recent review first
+        
+        Returns the page and the cursor for the next one (None on the last page)
         """
-        cursor = litter_images.find(
-            {"review_status": "reviewed"}
-        ).sort("human_review.reviewed_at", -1).limit(limit)
+        query = _keyset_filter({"review_status": "reviewed"}, "human_review.reviewed_at", cursor, -1)
+        docs = await litter_images.find(
+            query, ImageService.HISTORY_PROJECTION
+        ).sort([("human_review.reviewed_at", -1), ("id", -1)]).limit(limit + 1).to_list(limit + 1)
         
         history = []
-        for doc in cursor:
+        for doc in docs[:limit]:
             history.append({
                 "id": doc["id"],
                 "ts": doc["human_review"]["reviewed_at"],
@@ -150,14 +625,19 @@ class ImageService:
                 "decision": "approved" if doc["human_review"]["is_litter"] else "rejected"
             })
         
-        return history
+        next_cursor = None
+        if len(docs) > limit:
+            last = docs[limit - 1]
+            next_cursor = _encode_cursor(last["human_review"]["reviewed_at"], last["id"])
+        
+        return history, next_cursor
     
     @staticmethod
     async def update_bounding_boxes(image_id: str, bounding_boxes: List[dict]) -> bool:
         """
         Update bounding boxes for an image
         """
-        result = litter_images.update_one(
+        result = await litter_images.update_one(
             {"id": image_id},
             {
                 "$set": {
@@ -0,0 +1,370 @@
+import json
+import multiprocessing as mp
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# SQLite file shared by the API process (producer) and the worker processes (consumers)
+JOB_DB_PATH = Path(os.getenv(
+    "AEROWASTE_JOB_DB",
+    str(Path(__file__).resolve().parents[1] / "ai" / "inference_jobs.db")
+))
+WORKER_COUNT = int(os.getenv("AEROWASTE_INFERENCE_WORKERS", "1"))
+BATCH_SIZE = int(os.getenv("AEROWASTE_INFERENCE_BATCH", "16"))
+
+POLL_INTERVAL_SECONDS = 0.5
+STALE_AFTER_SECONDS = 600      # running jobs older than this belong to a dead worker
+MAX_ATTEMPTS = 3
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+
+class JobQueue:
+    """
+    SQLite-backed inference job queue
+
+    Claims are made inside BEGIN IMMEDIATE transactions, so any number of
+    worker processes can pull micro-batches without handing out a job twice.
+    """
+
+    def __init__(self, db_path: Path = JOB_DB_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                image_id TEXT NOT NULL,
+                image_path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+        # Completed jobs in the order they finished, for the detection events
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_updated ON jobs (status, updated_at, id)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread: the API calls us from Starlette's threadpool
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def enqueue(self, items: List[Tuple[str, str]]) -> List[str]:
+        """
+        Queue inference for (image_id, image_path) pairs and return the job ids
+        """
+        now = time.time()
+        rows = [
+            (f"job_{uuid.uuid4().hex[:12]}", image_id, str(image_path), "queued", now, now)
+            for image_id, image_path in items
+        ]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO jobs (id, image_id, image_path, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return [row[0] for row in rows]
+
+    def claim_batch(self, worker: str, limit: int) -> List[Dict]:
+        """
+        Atomically move up to `limit` queued jobs to running for this worker
+
+        Jobs that already used MAX_ATTEMPTS are never handed out again.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, image_id, image_path, attempts FROM jobs "
+                "WHERE status = 'queued' AND attempts < ? ORDER BY created_at LIMIT ?",
+                (MAX_ATTEMPTS, limit)
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, updated_at = ? "
+                    "WHERE id = ?",
+                    [(worker, now, row["id"]) for row in rows]
+                )
+        return [dict(row) for row in rows]
+
+    def complete(self, results: Dict[str, dict]):
+        """
+        Mark jobs done and store their results
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, updated_at = ? WHERE id = ?",
+                [(json.dumps(result), now, job_id) for job_id, result in results.items()]
+            )
+
+    def fail(self, job_ids: List[str], error: str):
+        """
+        Requeue failed jobs, or mark them failed once they run out of attempts
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "error = ?, updated_at = ? WHERE id = ?",
+                [(MAX_ATTEMPTS, error, now, job_id) for job_id in job_ids]
+            )
+
+    def requeue_stale(self, older_than: float = STALE_AFTER_SECONDS) -> int:
+        """
+        Hand running jobs from crashed workers back to the queue
+
+        A job that has used MAX_ATTEMPTS is marked failed instead, so an image that
+        crashes its worker every time is not retried forever. Also fails any queued
+        job already past the limit. Returns how many jobs were requeued or failed.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "error = CASE WHEN attempts >= ? THEN 'worker stopped responding' ELSE error END, "
+                "worker = NULL, updated_at = ? "
+                "WHERE (status = 'running' AND updated_at < ?) OR (status = 'queued' AND attempts >= ?)",
+                (MAX_ATTEMPTS, MAX_ATTEMPTS, now, now - older_than, MAX_ATTEMPTS)
+            )
+        return cursor.rowcount
+
+    def last_completed(self) -> Optional[Tuple[float, str]]:
+        """
+        (updated_at, id) of the most recently completed job
+        """
+        row = self._connect().execute(
+            "SELECT updated_at, id FROM jobs WHERE status = 'done' ORDER BY updated_at DESC, id DESC LIMIT 1"
+        ).fetchone()
+        return (row["updated_at"], row["id"]) if row else None
+
+    def completed_since(self, after: Tuple[float, str], limit: int = 500) -> List[Dict]:
+        """
+        Jobs completed after the (updated_at, id) position, in the order they completed
+        """
+        rows = self._connect().execute(
+            "SELECT id, image_id, result, updated_at FROM jobs "
+            "WHERE status = 'done' AND (updated_at > ? OR (updated_at = ? AND id > ?)) "
+            "ORDER BY updated_at, id LIMIT ?",
+            (after[0], after[0], after[1], limit)
+        ).fetchall()
+        return [{**dict(row), "result": json.loads(row["result"]) if row["result"] else None} for row in rows]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+@lru_cache(maxsize=None)
+def get_job_queue() -> JobQueue:
+    """Process-wide JobQueue on the default database file"""
+    return JobQueue()
+
+
+def _write_results(
+    litter_images,
+    jobs: List[Dict],
+    outputs: List[Dict],
+    detections_summary=None
+) -> Tuple[Dict[str, dict], List[Tuple[str, str]]]:
+    from datetime import datetime
+    from pymongo import UpdateOne
+    from back_app.ai.yolo_detection import to_bounding_boxes, to_classification
+    from back_app.services.summary_service import inference_operations
+
+    completed, failed, latest = {}, [], {}
+    now = datetime.utcnow().isoformat() + "Z"
+
+    # What each record held before, so re-inference replaces its summary counts instead of adding to them
+    before = {}
+    if detections_summary is not None:
+        before = {
+            doc["id"]: doc for doc in litter_images.find(
+                {"id": {"$in": [job["image_id"] for job in jobs]}},
+                {"_id": 0, "id": 1, "mission_id": 1, "captured_at": 1, "classification": 1, "inferred_at": 1}
+            )
+        }
+
+    for job, output in zip(jobs, outputs):
+        if output["status"] != "success":
+            failed.append((job["id"], output.get("error", "inference failed")))
+            continue
+
+        result = {
+            "classification": to_classification(output["detections"]),
+            "bounding_boxes": to_bounding_boxes(output["detections"]),
+            "detection_count": output["detection_count"],
+        }
+        completed[job["id"]] = result
+        # An image queued twice in one batch stores its last result
+        latest[job["image_id"]] = result
+
+    operations = []
+    for image_id, result in latest.items():
+        query = {"id": image_id}
+        if image_id in before:
+            # Only over the result the summary delta was computed from: if another worker (or
+            # a retry of this job) wrote the image since, that write already adjusted the counts
+            query["inferred_at"] = before[image_id].get("inferred_at")
+        operations.append(UpdateOne(query, {"$set": {
+            "classification": result["classification"],
+            "bounding_boxes": result["bounding_boxes"],
+            "inferred_at": now,
+            "updated_at": now
+        }}))
+
+    landed = [image_id for image_id in latest if image_id in before]
+    if operations:
+        written = litter_images.bulk_write(operations, ordered=False)
+        if landed and written.matched_count < len(operations):
+            landed = [doc["id"] for doc in litter_images.find(
+                {"id": {"$in": landed}, "inferred_at": now}, {"_id": 0, "id": 1}
+            )]
+    changes = [
+        (before[image_id], {"classification": latest[image_id]["classification"], "inferred_at": now})
+        for image_id in landed
+    ]
+    if changes:
+        # Written after the records: if the worker dies in between, the retried job reads the
+        # stored result as its before-image, so nothing is counted twice; rebuild-summaries
+        # restores the counts that were lost
+        summary_operations = inference_operations(changes)
+        if summary_operations:
+            detections_summary.bulk_write(summary_operations, ordered=False)
+    return completed, failed
+
+
+def _worker_main(db_path: str, batch_size: int, threads: int, stop_event):
+    """
+    Worker process loop: claim a micro-batch, run it through the warm model,
+    write the results back to litter_images, repeat.
+    """
+    from back_app.ai.yolo_detection import LitterDetector
+    from back_app.services.storage import read_image
+    from back_app.services.threshold_service import ThresholdWatcher, class_thresholds
+    from db.mongo import litter_images, detections_summary, ai_settings
+
+    queue = JobQueue(Path(db_path))
+    # Jobs carry storage uris: file paths for local storage, s3:// for object storage
+    detector = LitterDetector(batch_size=batch_size, threads=threads, read_image=read_image)
+    thresholds = ThresholdWatcher(ai_settings)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    last_reclaim = 0.0
+
+    while not stop_event.is_set():
+        config = thresholds.poll()
+        if config is not None:
+            detector.set_class_thresholds(class_thresholds(config))
+
+        if time.time() - last_reclaim > STALE_AFTER_SECONDS / 10:
+            queue.requeue_stale()
+            last_reclaim = time.time()
+
+        jobs = queue.claim_batch(worker, batch_size)
+        if not jobs:
+            stop_event.wait(POLL_INTERVAL_SECONDS)
+            continue
+
+        try:
+            outputs = detector.detect_batch([job["image_path"] for job in jobs])
+            completed, failed = _write_results(litter_images, jobs, outputs, detections_summary)
+        except Exception as e:
+            queue.fail([job["id"] for job in jobs], str(e))
+            continue
+
+        if completed:
+            queue.complete(completed)
+        for job_id, error in failed:
+            queue.fail([job_id], error)
+
+
+class InferenceWorkerPool:
+    """
+    Pool of inference worker processes pulling from the shared JobQueue
+
+    Each worker loads the model once and gets an equal share of the CPU
+    threads, so throughput scales with `workers` up to the core count.
+    """
+
+    def __init__(self, workers: int = WORKER_COUNT, batch_size: int = BATCH_SIZE, db_path: Path = JOB_DB_PATH):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.db_path = Path(db_path)
+        self._ctx = mp.get_context("spawn")
+        self._stop = None
+        self._processes = []
+
+    def start(self):
+        if self.workers <= 0 or self._processes:
+            return
+
+        JobQueue(self.db_path)  # create the schema before the workers race for it
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._stop = self._ctx.Event()
+        for i in range(self.workers):
+            process = self._ctx.Process(
+                target=_worker_main,
+                args=(str(self.db_path), self.batch_size, threads, self._stop),
+                name=f"inference-worker-{i}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+
+    def stop(self, timeout: float = 10.0):
+        if not self._processes:
+            return
+
+        self._stop.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+
+if __name__ == "__main__":
+    # Run workers without the API: python -m back_app.services.inference_queue
+    pool = InferenceWorkerPool()
+    pool.start()
+    print(f"🚀 {pool.workers} inference worker(s) running on {pool.db_path}")
+    try:
+        for process in pool._processes:
+            process.join()
+    except KeyboardInterrupt:
+        pool.stop()
@@ -0,0 +1,167 @@
+import os
+import hmac
+import time
+import asyncio
+import hashlib
+import secrets
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional, Tuple
+from passlib.hash import bcrypt
+
+class HashingOverloaded(Exception):
+    """
+    More password hashes are waiting than PasswordService.MAX_PENDING allows
+    """
+
+class LoginThrottle:
+    """
+    Failed-login counters per key (account, client address), checked before any hashing
+
+    After `free_attempts` failures within `window` seconds a key is locked out for
+    2, 4, 8, ... seconds (capped at `max_lockout`) past its latest failure, so a
+    brute-force run is refused with a dict lookup instead of a bcrypt verify.
+    Counters live in this process only.
+    """
+
+    def __init__(self, free_attempts: int, window: float, max_lockout: float, max_keys: int = 100_000):
+        self.free_attempts = free_attempts
+        self.window = window
+        self.max_lockout = max_lockout
+        self.max_keys = max_keys
+        # key -> (failures, first failure, last failure), oldest first
+        self._failures: "OrderedDict[str, Tuple[int, float, float]]" = OrderedDict()
+
+    def _lockout(self, failures: int) -> float:
+        over = failures - self.free_attempts
+        return 0.0 if over < 0 else min(self.max_lockout, 2.0 ** (over + 1))
+
+    def retry_after(self, keys: Iterable[str]) -> float:
+        """
+        Seconds until these keys may try again (0 if they may try now)
+        """
+        now = time.monotonic()
+        wait = 0.0
+        for key in keys:
+            entry = self._failures.get(key)
+            if entry is None:
+                continue
+            failures, first, last = entry
+            if now - first > self.window and now - last > self._lockout(failures):
+                del self._failures[key]
+                continue
+            wait = max(wait, last + self._lockout(failures) - now)
+        return max(0.0, wait)
+
+    def failed(self, keys: Iterable[str]):
+        now = time.monotonic()
+        for key in keys:
+            failures, first, _ = self._failures.pop(key, (0, now, now))
+            if now - first > self.window:
+                failures, first = 0, now
+            self._failures[key] = (failures + 1, first, now)
+        while len(self._failures) > self.max_keys:
+            self._failures.popitem(last=False)
+
+    def succeeded(self, keys: Iterable[str]):
+        for key in keys:
+            self._failures.pop(key, None)
+
+class PasswordService:
+
+    # bcrypt cost factor for new hashes; stored hashes with another cost are rehashed on login
+    ROUNDS = int(os.getenv("AEROWASTE_BCRYPT_ROUNDS", "12"))
+
+    # Threads doing bcrypt work (it releases the GIL); sized to the cores so hashing never starves the API
+    WORKERS = int(os.getenv("AEROWASTE_HASH_WORKERS", "0")) or (os.cpu_count() or 1)
+
+    # Hashes allowed to wait for a worker; beyond this logins are refused (503) rather than queued
+    MAX_PENDING = int(os.getenv("AEROWASTE_HASH_MAX_PENDING", "256"))
+
+    # Successful (password, stored hash) checks remembered, so repeat logins skip bcrypt; 0 disables
+    VERIFY_CACHE_SECONDS = float(os.getenv("AEROWASTE_LOGIN_CACHE_SECONDS", "300"))
+    VERIFY_CACHE_SIZE = 10_000
+
+    # Failed logins per account, and per client address (looser: an ops centre shares one address)
+    account_throttle = LoginThrottle(
+        free_attempts=int(os.getenv("AEROWASTE_LOGIN_FREE_ATTEMPTS", "5")),
+        window=float(os.getenv("AEROWASTE_LOGIN_WINDOW_SECONDS", "900")),
+        max_lockout=float(os.getenv("AEROWASTE_LOGIN_MAX_LOCKOUT_SECONDS", "900"))
+    )
+    client_throttle = LoginThrottle(
+        free_attempts=int(os.getenv("AEROWASTE_LOGIN_CLIENT_FREE_ATTEMPTS", "50")),
+        window=float(os.getenv("AEROWASTE_LOGIN_WINDOW_SECONDS", "900")),
+        max_lockout=float(os.getenv("AEROWASTE_LOGIN_MAX_LOCKOUT_SECONDS", "900"))
+    )
+
+    _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="password-hash")
+    _pending = 0
+
+    # HMAC key for the verification cache; never leaves the process, so cache entries are useless elsewhere
+    _cache_key = secrets.token_bytes(32)
+    _verified: "OrderedDict[bytes, float]" = OrderedDict()
+
+    # Verified when the account does not exist, so unknown usernames take as long as wrong passwords
+    _dummy_hash: Optional[str] = None
+
+    @staticmethod
+    def _hasher():
+        return bcrypt.using(rounds=PasswordService.ROUNDS)
+
+    @staticmethod
+    async def _run(fn, *args):
+        if PasswordService._pending >= PasswordService.MAX_PENDING:
+            raise HashingOverloaded("Too many logins in progress, try again shortly")
+        PasswordService._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(PasswordService._executor, fn, *args)
+        finally:
+            PasswordService._pending -= 1
+
+    @staticmethod
+    async def hash_password(plain: str) -> str:
+        """
+        bcrypt hash at the configured cost, computed off the event loop
+        """
+        return await PasswordService._run(PasswordService._hasher().hash, plain)
+
+    @staticmethod
+    def _cache_entry(plain: str, hashed: str) -> bytes:
+        return hmac.new(PasswordService._cache_key, f"{hashed}\0{plain}".encode(), hashlib.sha256).digest()
+
+    @staticmethod
+    def _check(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        hasher = PasswordService._hasher()
+        if not hasher.verify(plain, hashed):
+            return False, None
+        return True, hasher.hash(plain) if hasher.needs_update(hashed) else None
+
+    @staticmethod
+    async def verify_password(plain: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password against its stored hash
+
+        Returns (valid, new hash); the new hash is set when the stored one was made
+        with a different cost factor and should replace it.
+        """
+        if not hashed:
+            if PasswordService._dummy_hash is None:
+                PasswordService._dummy_hash = await PasswordService.hash_password(secrets.token_urlsafe(16))
+            await PasswordService._run(PasswordService._hasher().verify, plain, PasswordService._dummy_hash)
+            return False, None
+
+        entry = PasswordService._cache_entry(plain, hashed)
+        expires = PasswordService._verified.get(entry)
+        if expires is not None and expires > time.monotonic() and not PasswordService._hasher().needs_update(hashed):
+            return True, None
+
+        valid, new_hash = await PasswordService._run(PasswordService._check, plain, hashed)
+        PasswordService._verified.pop(entry, None)
+        if valid and PasswordService.VERIFY_CACHE_SECONDS > 0:
+            # Keyed on the stored hash too: a password change or rehash makes old entries unreachable
+            PasswordService._verified[PasswordService._cache_entry(plain, new_hash or hashed)] = (
+                time.monotonic() + PasswordService.VERIFY_CACHE_SECONDS
+            )
+            while len(PasswordService._verified) > PasswordService.VERIFY_CACHE_SIZE:
+                PasswordService._verified.popitem(last=False)
+        return valid, new_hash
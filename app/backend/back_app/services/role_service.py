@@ -1,4 +1,7 @@
-from db.mongo import roles
+from db.async_mongo import roles
+from pymongo import ReturnDocument
+from .auth_service import AuthService
+from .id_allocator import IdAllocator
 from back_app.models.role_models import RoleCreate, RoleUpdate, RoleInDB
 
 class RoleService:
@@ -6,7 +9,7 @@ class RoleService:
     async def get_roles():
         cursor = roles.find({})
         docs = []
-        for doc in cursor:
+        async for doc in cursor:
             # Convert MongoDB _id to string id if needed
             if "_id" in doc and "id" not in doc:
                 doc["id"] = str(doc["_id"])
@@ -15,7 +18,7 @@ class RoleService:
 
     @staticmethod
     async def get_role(role_id: str):
-        if (role := roles.find_one({"id": role_id})):
+        if (role := await roles.find_one({"id": role_id})):
             if "_id" in role and "id" not in role:
                 role["id"] = str(role["_id"])
             return RoleInDB(**role)
@@ -24,23 +27,35 @@ class RoleService:
     @staticmethod
     async def create_role(role: RoleCreate):
         role_dict = role.dict()
-        role_dict["id"] = f"R{str(roles.count_documents({}) + 1).zfill(3)}"
+        role_dict["id"] = await IdAllocator.next_id("roles")
         
-        roles.insert_one(role_dict)
+        await roles.insert_one(role_dict)
         return RoleInDB(**role_dict)
 
     @staticmethod
     async def update_role(role_id: str, role: RoleUpdate):
         update_data = role.dict(exclude_unset=True)
-        result = roles.update_one(
+        before = await roles.find_one_and_update(
             {"id": role_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection={"_id": 0, "name": 1, "permissions": 1},
+            return_document=ReturnDocument.BEFORE
         )
-        if result.modified_count:
-            return await RoleService.get_role(role_id)
-        return None
+        if before is None:
+            return None
+        # Sessions hold permissions by role name: update what this process authorises with
+        if "name" in update_data and update_data["name"] != before["name"]:
+            AuthService.role_deleted(before["name"])
+        AuthService.role_updated(
+            update_data.get("name", before["name"]),
+            update_data.get("permissions", before.get("permissions"))
+        )
+        return await RoleService.get_role(role_id)
 
     @staticmethod
     async def delete_role(role_id: str):
-        result = roles.delete_one({"id": role_id})
-        return result.deleted_count > 0
\ No newline at end of file
+        deleted = await roles.find_one_and_delete({"id": role_id}, projection={"_id": 0, "name": 1})
+        if deleted is None:
+            return False
+        AuthService.role_deleted(deleted["name"])
+        return True
\ No newline at end of file
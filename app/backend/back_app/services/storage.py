@@ -0,0 +1,430 @@
+"""
+Pluggable blob storage for litter images.
+
+Every backend speaks in keys ("85/4a/<sha256>.jpg") and offers the same
+async API: staged uploads that are committed under their final key once
+the content hash is known, existence checks, whole-object and ranged
+reads. LocalStorage keeps blobs on disk; S3Storage talks to any
+S3-compatible service (AWS, MinIO, moto), so several API replicas can
+share images without sharing a filesystem.
+
+Pick one with AEROWASTE_STORAGE_BACKEND=local|s3.
+"""
+import asyncio
+import os
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple, Union
+
+from fastapi.concurrency import run_in_threadpool
+
+STORAGE_BACKEND = os.getenv("AEROWASTE_STORAGE_BACKEND", "local")
+STORAGE_PATH = Path(os.getenv(
+    "AEROWASTE_STORAGE_PATH",
+    str(Path(__file__).resolve().parents[1] / "ai" / "litter_images")
+))
+
+S3_BUCKET = os.getenv("AEROWASTE_S3_BUCKET", "aerowaste-litter-images")
+S3_PREFIX = os.getenv("AEROWASTE_S3_PREFIX", "")
+S3_ENDPOINT_URL = os.getenv("AEROWASTE_S3_ENDPOINT_URL")  # e.g. http://localhost:9000 for MinIO
+S3_REGION = os.getenv("AEROWASTE_S3_REGION", "us-east-1")
+S3_PART_SIZE = int(os.getenv("AEROWASTE_S3_PART_SIZE_MB", "8")) * 1024 * 1024
+S3_UPLOAD_CONCURRENCY = int(os.getenv("AEROWASTE_S3_UPLOAD_CONCURRENCY", "4"))
+
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# Staged uploads live under this prefix until they are committed
+INCOMING = "_incoming"
+
+
+class StorageUpload(ABC):
+    """
+    An upload in progress: write() chunks, then commit(key) or abort()
+    """
+
+    @abstractmethod
+    async def write(self, chunk: bytes):
+        ...
+
+    @abstractmethod
+    async def commit(self, key: str) -> bool:
+        """Store the upload under `key`; False if that key already held these bytes"""
+
+    @abstractmethod
+    async def abort(self):
+        ...
+
+
+class StorageBackend(ABC):
+    """
+    Interface shared by all blob stores
+
+    Keys are content addresses, so an object never changes once written.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def open_upload(self) -> StorageUpload:
+        ...
+
+    @abstractmethod
+    async def put_file(self, key: str, source: Path) -> bool:
+        """Copy a local file to `key`; False if the key already existed"""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def size(self, key: str) -> Optional[int]:
+        """Object size in bytes, None if it does not exist"""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    def stream(
+        self, key: str, start: int = 0, end: Optional[int] = None, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """Yield bytes start..end (inclusive, like an HTTP Range) of an object; an async generator"""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def uri(self, key: str) -> str:
+        """Location handed to inference workers and stored as local_path"""
+
+    @abstractmethod
+    def open_uri(self, uri: str) -> Union[str, BytesIO]:
+        """Something PIL/cv2 can read for a uri from uri(); blocking"""
+
+
+class _LocalUpload(StorageUpload):
+
+    def __init__(self, storage: "LocalStorage"):
+        self._storage = storage
+        self._part = storage.root / INCOMING / f"{uuid.uuid4().hex}.part"
+        self._part.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = open(self._part, "wb")
+
+    async def write(self, chunk: bytes):
+        await run_in_threadpool(self._handle.write, chunk)
+
+    def _commit(self, key: str) -> bool:
+        self._handle.close()
+        target = self._storage.path(key)
+        if target.exists():
+            self._part.unlink(missing_ok=True)
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self._part, target)
+        return True
+
+    async def commit(self, key: str) -> bool:
+        return await run_in_threadpool(self._commit, key)
+
+    def _abort(self):
+        self._handle.close()
+        self._part.unlink(missing_ok=True)
+
+    async def abort(self):
+        await run_in_threadpool(self._abort)
+
+
+class LocalStorage(StorageBackend):
+    """
+    Blobs on a local (or mounted) filesystem under `root`
+    """
+
+    name = "local"
+
+    def __init__(self, root: Path = STORAGE_PATH):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Invalid storage key '{key}'")
+        return path
+
+    async def open_upload(self) -> StorageUpload:
+        return await run_in_threadpool(_LocalUpload, self)
+
+    def _put_file(self, key: str, source: Path) -> bool:
+        target = self.path(key)
+        if target.exists():
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        part = target.with_name(target.name + f".{uuid.uuid4().hex}.part")
+        try:
+            # Hardlink when we can (same filesystem), copy otherwise
+            os.link(source, part)
+        except OSError:
+            shutil.copyfile(source, part)
+        os.replace(part, target)
+        return True
+
+    async def put_file(self, key: str, source: Path) -> bool:
+        return await run_in_threadpool(self._put_file, key, Path(source))
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self.path(key).is_file)
+
+    def _size(self, key: str) -> Optional[int]:
+        try:
+            return self.path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    async def size(self, key: str) -> Optional[int]:
+        return await run_in_threadpool(self._size, key)
+
+    async def get(self, key: str) -> bytes:
+        return await run_in_threadpool(self.path(key).read_bytes)
+
+    async def stream(
+        self, key: str, start: int = 0, end: Optional[int] = None, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        handle = await run_in_threadpool(open, self.path(key), "rb")
+        try:
+            await run_in_threadpool(handle.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = await run_in_threadpool(
+                    handle.read, chunk_size if remaining is None else min(chunk_size, remaining)
+                )
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await run_in_threadpool(handle.close)
+
+    async def delete(self, key: str):
+        await run_in_threadpool(self.path(key).unlink, missing_ok=True)
+
+    def uri(self, key: str) -> str:
+        return str(self.path(key))
+
+    def open_uri(self, uri: str) -> Union[str, BytesIO]:
+        return uri
+
+
+class _S3Upload(StorageUpload):
+    """
+    Streams an upload into a multipart upload under INCOMING/, keeping up to
+    S3_UPLOAD_CONCURRENCY parts in flight; small uploads become a single PUT
+    """
+
+    def __init__(self, storage: "S3Storage"):
+        self._storage = storage
+        self._staging = storage.object_key(f"{INCOMING}/{uuid.uuid4().hex}")
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+        self._in_flight = []
+
+    async def _send_part(self, data: bytes):
+        s3 = self._storage.client
+        if self._upload_id is None:
+            created = await run_in_threadpool(
+                s3.create_multipart_upload, Bucket=self._storage.bucket, Key=self._staging
+            )
+            self._upload_id = created["UploadId"]
+
+        # Bound the memory held by parts still uploading
+        if len(self._in_flight) >= self._storage.upload_concurrency:
+            await self._in_flight.pop(0)
+
+        number = len(self._parts) + 1
+        future = asyncio.wrap_future(self._storage.pool.submit(
+            s3.upload_part, Bucket=self._storage.bucket, Key=self._staging,
+            UploadId=self._upload_id, PartNumber=number, Body=data
+        ))
+        self._parts.append((number, future))
+        self._in_flight.append(future)
+
+    async def write(self, chunk: bytes):
+        self._buffer += chunk
+        while len(self._buffer) >= self._storage.part_size:
+            data = bytes(self._buffer[:self._storage.part_size])
+            del self._buffer[:self._storage.part_size]
+            await self._send_part(data)
+
+    async def commit(self, key: str) -> bool:
+        s3 = self._storage.client
+        bucket = self._storage.bucket
+        target = self._storage.object_key(key)
+
+        if self._upload_id is None:
+            # Fits in one part: skip the staging object entirely
+            if await self._storage.exists(key):
+                return False
+            await run_in_threadpool(s3.put_object, Bucket=bucket, Key=target, Body=bytes(self._buffer))
+            return True
+
+        if self._buffer:
+            await self._send_part(bytes(self._buffer))
+            self._buffer = bytearray()
+        parts = [{"PartNumber": number, "ETag": (await future)["ETag"]} for number, future in self._parts]
+        await run_in_threadpool(
+            s3.complete_multipart_upload, Bucket=bucket, Key=self._staging,
+            UploadId=self._upload_id, MultipartUpload={"Parts": parts}
+        )
+
+        try:
+            if await self._storage.exists(key):
+                return False
+            # Server-side copy: the bytes never come back through the API
+            await run_in_threadpool(
+                s3.copy_object, Bucket=bucket, Key=target, CopySource={"Bucket": bucket, "Key": self._staging}
+            )
+            return True
+        finally:
+            await run_in_threadpool(s3.delete_object, Bucket=bucket, Key=self._staging)
+
+    async def abort(self):
+        for future in self._in_flight:
+            future.cancel()
+        if self._upload_id is not None:
+            await run_in_threadpool(
+                self._storage.client.abort_multipart_upload,
+                Bucket=self._storage.bucket, Key=self._staging, UploadId=self._upload_id
+            )
+
+
+class S3Storage(StorageBackend):
+    """
+    Blobs in an S3-compatible bucket (AWS S3, MinIO, moto)
+
+    Credentials come from the usual AWS environment/config chain.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str = S3_BUCKET,
+        prefix: str = S3_PREFIX,
+        endpoint_url: Optional[str] = S3_ENDPOINT_URL,
+        region: str = S3_REGION,
+        part_size: int = S3_PART_SIZE,
+        upload_concurrency: int = S3_UPLOAD_CONCURRENCY,
+    ):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError:
+            raise RuntimeError("S3 storage needs boto3: pip install boto3")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.part_size = max(part_size, 5 * 1024 * 1024)  # S3's minimum part size
+        self.upload_concurrency = max(1, upload_concurrency)
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            config=Config(max_pool_connections=max(10, self.upload_concurrency * 4)),
+        )
+        self.pool = ThreadPoolExecutor(max_workers=self.upload_concurrency * 4, thread_name_prefix="s3-parts")
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    async def open_upload(self) -> StorageUpload:
+        return _S3Upload(self)
+
+    async def put_file(self, key: str, source: Path) -> bool:
+        from boto3.s3.transfer import TransferConfig
+
+        if await self.exists(key):
+            return False
+        config = TransferConfig(multipart_chunksize=self.part_size, max_concurrency=self.upload_concurrency)
+        await run_in_threadpool(
+            self.client.upload_file, str(source), self.bucket, self.object_key(key), Config=config
+        )
+        return True
+
+    def _head(self, key: str) -> Optional[dict]:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self._head, key) is not None
+
+    async def size(self, key: str) -> Optional[int]:
+        head = await run_in_threadpool(self._head, key)
+        return head["ContentLength"] if head else None
+
+    async def get(self, key: str) -> bytes:
+        response = await run_in_threadpool(self.client.get_object, Bucket=self.bucket, Key=self.object_key(key))
+        return await run_in_threadpool(response["Body"].read)
+
+    async def stream(
+        self, key: str, start: int = 0, end: Optional[int] = None, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = await run_in_threadpool(
+            self.client.get_object, Bucket=self.bucket, Key=self.object_key(key), Range=byte_range
+        )
+        body = response["Body"]
+        try:
+            while chunk := await run_in_threadpool(body.read, chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    async def delete(self, key: str):
+        await run_in_threadpool(self.client.delete_object, Bucket=self.bucket, Key=self.object_key(key))
+
+    def uri(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self.object_key(key)}"
+
+    def _split_uri(self, uri: str) -> Tuple[str, str]:
+        bucket, _, key = uri[len("s3://"):].partition("/")
+        return bucket, key
+
+    def open_uri(self, uri: str) -> Union[str, BytesIO]:
+        if not uri.startswith("s3://"):
+            return uri  # records written before the move to object storage
+        bucket, key = self._split_uri(uri)
+        return BytesIO(self.client.get_object(Bucket=bucket, Key=key)["Body"].read())
+
+
+@lru_cache(maxsize=None)
+def get_storage() -> StorageBackend:
+    """Process-wide storage backend chosen by AEROWASTE_STORAGE_BACKEND"""
+    if STORAGE_BACKEND == "s3":
+        return S3Storage()
+    if STORAGE_BACKEND == "local":
+        return LocalStorage()
+    raise RuntimeError(f"Unknown AEROWASTE_STORAGE_BACKEND '{STORAGE_BACKEND}'. Use 'local' or 's3'.")
+
+
+def read_image(uri: str):
+    """Decode an image for inference from a uri produced by StorageBackend.uri()"""
+    import cv2
+    import numpy as np
+
+    source = get_storage().open_uri(uri)
+    if isinstance(source, str):
+        return cv2.imread(source)
+    return cv2.imdecode(np.frombuffer(source.getbuffer(), np.uint8), cv2.IMREAD_COLOR)
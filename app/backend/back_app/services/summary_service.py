@@ -0,0 +1,223 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from pymongo import UpdateOne
+from db.async_mongo import async_db, detections_summary, litter_images
+from db.mongo import INDEXES
+from .geo_service import class_key
+
+# Counters every summary document carries (classes/detections are per-label maps next to them)
+COUNTERS = ("images", "pending", "reviewed", "confirmed", "rejected", "weight_grams", "inferred")
+
+def _summary_keys(doc: dict) -> List[Tuple[str, str]]:
+    # Every litter_images record is counted in three summaries: its mission, its capture day and the overall total
+    return [
+        ("mission", doc.get("mission_id") or "unknown"),
+        ("day", (doc.get("captured_at") or "unknown")[:10]),
+        ("all", "all")
+    ]
+
+def _verdict(human_review: Optional[dict]) -> Dict[str, int]:
+    """
+    Counters a saved human review contributes
+    """
+    if not human_review or human_review.get("is_litter") is None:
+        return {}
+    if human_review.get("is_litter"):
+        weight = human_review.get("weight_grams") or 0
+        label = class_key(human_review.get("litter_class"))
+        return {
+            "confirmed": 1, "weight_grams": weight,
+            f"classes.{label}.count": 1, f"classes.{label}.weight_grams": weight
+        }
+    return {"rejected": 1}
+
+def _detection(doc: dict) -> Dict[str, int]:
+    """
+    Counters an inference result (the top class, if any) contributes
+    """
+    if not doc.get("inferred_at"):
+        return {}
+    label = (doc.get("classification") or {}).get("label")
+    return {"inferred": 1, **({f"detections.{class_key(label)}": 1} if label else {})}
+
+class _Deltas:
+    """
+    $inc documents for the summaries touched by a batch of changes, merged per summary
+    """
+
+    def __init__(self):
+        self.summaries: Dict[Tuple[str, str], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add(self, doc: dict, counters: Dict[str, int], sign: int = 1):
+        for summary in _summary_keys(doc):
+            for field, value in counters.items():
+                self.summaries[summary][field] += sign * value
+
+    def operations(self) -> List[UpdateOne]:
+        now = datetime.utcnow().isoformat() + "Z"
+        return [
+            UpdateOne(
+                {"_id": f"{scope}:{key}"},
+                {
+                    "$inc": {field: value for field, value in inc.items() if value},
+                    "$set": {"updated_at": now},
+                    "$setOnInsert": {"scope": scope, "key": key}
+                },
+                upsert=True
+            )
+            for (scope, key), inc in self.summaries.items()
+            if any(inc.values())
+        ]
+
+def insert_operations(docs: Iterable[dict]) -> List[UpdateOne]:
+    """
+    Summary updates for newly inserted litter_images records
+    """
+    deltas = _Deltas()
+    for doc in docs:
+        deltas.add(doc, {"images": 1, "pending": 1, **_detection(doc)})
+    return deltas.operations()
+
+def inference_operations(changes: Iterable[Tuple[dict, dict]]) -> List[UpdateOne]:
+    """
+    Summary updates for inference results; `changes` pairs each record as it was
+    (mission_id, captured_at, classification, inferred_at) with the fields just written.
+    Re-running inference replaces the old top class rather than adding to it.
+
+    Each "before" must come from the write itself (find_one_and_update returning the
+    document as it was): one read separately could already be stale and count twice.
+    Counts that drift anyway are repaired by `python -m back_app.maintenance rebuild-summaries`.
+    """
+    deltas = _Deltas()
+    for before, result in changes:
+        deltas.add(before, _detection(before), -1)
+        deltas.add(before, _detection({**before, **result}))
+    return deltas.operations()
+
+def review_operations(changes: Iterable[Tuple[dict, dict]]) -> List[UpdateOne]:
+    """
+    Summary updates for saved human reviews; `changes` pairs each record as it was
+    (mission_id, captured_at, review_status, human_review) with the review that replaced it,
+    as returned by the write itself (see inference_operations); rebuild-summaries repairs drift
+    """
+    deltas = _Deltas()
+    for before, review in changes:
+        if before.get("review_status") != "reviewed":
+            deltas.add(before, {"pending": -1, "reviewed": 1})
+        else:
+            deltas.add(before, _verdict(before.get("human_review")), -1)
+        deltas.add(before, _verdict(review))
+    return deltas.operations()
+
+class SummaryService:
+
+    # Summary updates sent per round trip
+    SUMMARY_BULK_CHUNK = 1000
+
+    # Longest date range a daily report may cover
+    MAX_REPORT_DAYS = 366
+
+    @staticmethod
+    async def apply(operations: List[UpdateOne]):
+        for start in range(0, len(operations), SummaryService.SUMMARY_BULK_CHUNK):
+            await detections_summary.bulk_write(
+                operations[start:start + SummaryService.SUMMARY_BULK_CHUNK], ordered=False
+            )
+
+    @staticmethod
+    def _report(doc: Optional[dict]) -> dict:
+        doc = doc or {}
+        report = {counter: doc.get(counter, 0) for counter in COUNTERS}
+        report["classes"] = {
+            label: counts for label, counts in (doc.get("classes") or {}).items() if counts.get("count")
+        }
+        report["detections"] = {label: n for label, n in (doc.get("detections") or {}).items() if n}
+        report["updated_at"] = doc.get("updated_at")
+        return report
+
+    @staticmethod
+    async def get_summary(scope: str, key: str) -> dict:
+        """
+        One mission's, day's or the overall counters (zeros if nothing was recorded yet)
+        """
+        return SummaryService._report(await detections_summary.find_one({"_id": f"{scope}:{key}"}))
+
+    @staticmethod
+    async def get_daily(start: str, end: str) -> List[dict]:
+        """
+        Per-day counters for start..end (YYYY-MM-DD, inclusive), oldest first; days without images are omitted
+        """
+        if start > end:
+            raise ValueError("start must not be after end")
+        if (datetime.fromisoformat(end) - datetime.fromisoformat(start)).days >= SummaryService.MAX_REPORT_DAYS:
+            raise ValueError(f"Date range may cover at most {SummaryService.MAX_REPORT_DAYS} days")
+        docs = await detections_summary.find(
+            {"scope": "day", "key": {"$gte": start, "$lte": end}}
+        ).sort("key", 1).to_list(SummaryService.MAX_REPORT_DAYS)
+        return [{"day": doc["key"], **SummaryService._report(doc)} for doc in docs]
+
+    @staticmethod
+    async def rebuild() -> int:
+        """
+        Recompute detections_summary from litter_images (backfill, or to repair drift)
+
+        Three grouped aggregations do the scanning server-side, per (mission, day); only
+        those groups reach Python, where they are rolled up into mission, day and overall
+        summaries. The result is swapped in with a rename. Returns the summaries written.
+        """
+        group_key = {"mission_id": "$mission_id", "day": {"$substrCP": ["$captured_at", 0, 10]}}
+        reviewed = {"$eq": ["$review_status", "reviewed"]}
+        is_litter = {"$eq": ["$human_review.is_litter", True]}
+
+        counters = await litter_images.aggregate([
+            {"$group": {
+                "_id": group_key,
+                "images": {"$sum": 1},
+                "reviewed": {"$sum": {"$cond": [reviewed, 1, 0]}},
+                "confirmed": {"$sum": {"$cond": [{"$and": [reviewed, is_litter]}, 1, 0]}},
+                "rejected": {"$sum": {"$cond": [
+                    {"$and": [reviewed, {"$eq": ["$human_review.is_litter", False]}]}, 1, 0
+                ]}},
+                "weight_grams": {"$sum": {"$cond": [
+                    {"$and": [reviewed, is_litter]}, {"$ifNull": ["$human_review.weight_grams", 0]}, 0
+                ]}},
+                "inferred": {"$sum": {"$cond": [{"$ifNull": ["$inferred_at", False]}, 1, 0]}}
+            }}
+        ], allowDiskUse=True).to_list(None)
+        classes = await litter_images.aggregate([
+            {"$match": {"review_status": "reviewed", "human_review.is_litter": True}},
+            {"$group": {
+                "_id": {**group_key, "label": "$human_review.litter_class"},
+                "count": {"$sum": 1},
+                "weight_grams": {"$sum": {"$ifNull": ["$human_review.weight_grams", 0]}}
+            }}
+        ], allowDiskUse=True).to_list(None)
+        detections = await litter_images.aggregate([
+            {"$match": {"inferred_at": {"$ne": None}, "classification.label": {"$ne": None}}},
+            {"$group": {"_id": {**group_key, "label": "$classification.label"}, "count": {"$sum": 1}}}
+        ], allowDiskUse=True).to_list(None)
+
+        deltas = _Deltas()
+        for row in counters:
+            doc = {"mission_id": row["_id"].get("mission_id"), "captured_at": row["_id"].get("day")}
+            deltas.add(doc, {
+                **{counter: row[counter] for counter in COUNTERS if counter in row},
+                "pending": row["images"] - row["reviewed"]
+            })
+        for row in classes:
+            doc = {"mission_id": row["_id"].get("mission_id"), "captured_at": row["_id"].get("day")}
+            label = class_key(row["_id"].get("label"))
+            deltas.add(doc, {f"classes.{label}.count": row["count"], f"classes.{label}.weight_grams": row["weight_grams"]})
+        for row in detections:
+            doc = {"mission_id": row["_id"].get("mission_id"), "captured_at": row["_id"].get("day")}
+            deltas.add(doc, {f"detections.{class_key(row['_id']['label'])}": row["count"]})
+
+        scratch = async_db[f"{detections_summary.name}_rebuild"]
+        await scratch.drop()
+        await scratch.create_indexes(INDEXES[detections_summary.name])
+        operations = deltas.operations()
+        for start in range(0, len(operations), SummaryService.SUMMARY_BULK_CHUNK):
+            await scratch.bulk_write(operations[start:start + SummaryService.SUMMARY_BULK_CHUNK], ordered=False)
+        await scratch.rename(detections_summary.name, dropTarget=True)
+        return len(operations)
@@ -0,0 +1,103 @@
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from pymongo import ReturnDocument
+from db.async_mongo import ai_settings
+
+# ai_settings document holding the per-class thresholds and return-to-base limits
+INITIATION_ID = "initiation"
+
+# Served until the first PUT /ai/initiation
+DEFAULT_INITIATION = {
+    "classes": [
+        {"class": "plastic", "conf": 0.85},
+        {"class": "glass", "conf": 0.75},
+        {"class": "paper", "conf": 0.65},
+        {"class": "cardboard", "conf": 0.70},
+        {"class": "cigarette", "conf": 0.80},
+        {"class": "tyre", "conf": 0.75}
+    ],
+    "rtb": {"battery_pct": 20, "hold_pct": 80},
+    "version": 0
+}
+
+# How stale a process's cached copy may get before it checks the version in Mongo
+REFRESH_SECONDS = float(os.getenv("AEROWASTE_THRESHOLD_REFRESH_SECONDS", "5"))
+
+def class_thresholds(config: dict) -> Dict[str, float]:
+    """
+    Class name -> minimum confidence, as LitterDetector.set_class_thresholds takes them
+    """
+    return {item["class"]: float(item["conf"]) for item in config.get("classes", [])}
+
+def _config(doc: Optional[dict]) -> dict:
+    if not doc:
+        return dict(DEFAULT_INITIATION)
+    return {"classes": doc["classes"], "rtb": doc["rtb"], "version": doc.get("version", 0)}
+
+class ThresholdWatcher:
+    """
+    Version-polled copy of the initiation config for processes on the sync driver (the inference workers)
+
+    poll() costs one _id lookup every `refresh_seconds` and returns the new config
+    only when a PUT has bumped its version, so callers push thresholds into the model
+    on change instead of on every batch.
+    """
+
+    def __init__(self, collection, refresh_seconds: float = REFRESH_SECONDS):
+        self.collection = collection
+        self.refresh_seconds = refresh_seconds
+        self.version = None
+        self._checked_at = 0.0
+
+    def poll(self) -> Optional[dict]:
+        if time.monotonic() - self._checked_at < self.refresh_seconds:
+            return None
+        self._checked_at = time.monotonic()
+        doc = self.collection.find_one({"_id": INITIATION_ID}, {"version": 1})
+        if (doc or {}).get("version", 0) == self.version:
+            return None
+        config = _config(self.collection.find_one({"_id": INITIATION_ID}))
+        self.version = config["version"]
+        return config
+
+class ThresholdService:
+
+    # This process's copy of the config, and when its version was last checked
+    _config: Optional[dict] = None
+    _checked_at = 0.0
+
+    @staticmethod
+    async def get_config() -> dict:
+        """
+        Per-class thresholds and RTB limits, served from the in-process copy while it is fresh
+        """
+        cached = ThresholdService._config
+        if cached is not None and time.monotonic() - ThresholdService._checked_at < REFRESH_SECONDS:
+            return cached
+        doc = await ai_settings.find_one({"_id": INITIATION_ID}, {"version": 1})
+        if cached is None or (doc or {}).get("version", 0) != cached["version"]:
+            cached = _config(await ai_settings.find_one({"_id": INITIATION_ID}))
+        ThresholdService._config, ThresholdService._checked_at = cached, time.monotonic()
+        return cached
+
+    @staticmethod
+    async def update_config(classes: List[dict], rtb: dict) -> dict:
+        """
+        Store new thresholds; the version bump is what other processes poll for
+        """
+        names = [item["class"].strip().lower() for item in classes]
+        if len(set(names)) != len(names):
+            raise ValueError("Each class may only be listed once")
+        doc = await ai_settings.find_one_and_update(
+            {"_id": INITIATION_ID},
+            {
+                "$set": {"classes": classes, "rtb": rtb, "updated_at": datetime.utcnow().isoformat() + "Z"},
+                "$inc": {"version": 1}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        ThresholdService._config, ThresholdService._checked_at = _config(doc), time.monotonic()
+        return ThresholdService._config
@@ -1,6 +1,9 @@
-from db.mongo import users, roles
+from db.async_mongo import users, roles
+from pymongo import ReturnDocument
+from .auth_service import AuthService
+from .id_allocator import IdAllocator
 from back_app.models.user_models import UserCreate, UserUpdate, UserInDB
-from passlib.hash import bcrypt
+from .password_service import PasswordService
 from datetime import datetime
 
 class UserService:
@@ -8,7 +11,7 @@ class UserService:
     async def get_users():
         cursor = users.find({})
         docs = []
-        for doc in cursor:
+        async for doc in cursor:
             # Convert MongoDB _id to string id if needed
             if "_id" in doc and "id" not in doc:
                 doc["id"] = str(doc["_id"])
@@ -20,7 +23,7 @@ class UserService:
 
     @staticmethod
     async def get_user(user_id: str):
-        user = users.find_one({"id": user_id})
+        user = await users.find_one({"id": user_id})
         if user:
             # Convert MongoDB _id to string id if needed
             if "_id" in user and "id" not in user:
@@ -31,34 +34,35 @@ class UserService:
             return UserInDB(**user)
         return None
 
-@staticmethod
-async def create_user(user: UserCreate):
-    data = user.dict()
+    @staticmethod
+    async def create_user(user: UserCreate):
+        data = user.dict()
     
-    # Ensure password is provided for new users
-    if "password" not in data or not data["password"]:
-        raise ValueError("Password is required for new users")
+        # Ensure password is provided for new users
+        if "password" not in data or not data["password"]:
+            raise ValueError("Password is required for new users")
     
-    plain = data.pop("password")
-    data["hashed_password"] = bcrypt.hash(plain)
+        plain = data.pop("password")
+        data["hashed_password"] = await PasswordService.hash_password(plain)
 
-    # Map access_rights to role_id
-    if "access_rights" in data and data["access_rights"]:
-        role = roles.find_one({"name": data["access_rights"]})
-        if role:
-            data["role_id"] = role["_id"]
+        # Map access_rights to role_id
+        if "access_rights" in data and data["access_rights"]:
+            role = await roles.find_one({"name": data["access_rights"]})
+            if role:
+                data["role_id"] = role["_id"]
+            else:
+                raise ValueError(f"Role '{data['access_rights']}' does not exist.")
         else:
-            raise ValueError(f"Role '{data['access_rights']}' does not exist.")
-    else:
-        raise ValueError("access_rights is required to assign role")
+            raise ValueError("access_rights is required to assign role")
 
-    data["id"] = f"U{str(users.count_documents({}) + 1).zfill(3)}"
-    data["last_login"] = None
-    data["created_at"] = datetime.utcnow()
-    data["updated_at"] = datetime.utcnow()
+        data["id"] = await IdAllocator.next_id("users")
+        data["last_login"] = None
+        data["created_at"] = datetime.utcnow()
+        data["updated_at"] = datetime.utcnow()
 
-    users.insert_one(data)
-    return UserInDB(**data)
+        await users.insert_one(data)
+        data["role_id"] = str(data["role_id"])
+        return UserInDB(**data)
 
     @staticmethod
     async def update_user(user_id: str, user: UserUpdate):
@@ -66,13 +70,13 @@ async def create_user(user: UserCreate):
 
         if "password" in update_data:
             if update_data["password"]:
-                update_data["hashed_password"] = bcrypt.hash(update_data.pop("password"))
+                update_data["hashed_password"] = await PasswordService.hash_password(update_data.pop("password"))
             else:
                 update_data.pop("password")
 
         # 🔁 Update role_id if access_rights is changing
         if "access_rights" in update_data and update_data["access_rights"]:
-            role = roles.find_one({"name": update_data["access_rights"]})
+            role = await roles.find_one({"name": update_data["access_rights"]})
             if role:
                 update_data["role_id"] = role["_id"]
             else:
@@ -80,22 +84,30 @@ async def create_user(user: UserCreate):
 
         update_data["updated_at"] = datetime.utcnow()
 
-        result = users.update_one(
+        after = await users.find_one_and_update(
             {"id": user_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection={"access_rights": 1, "is_active": 1},
+            return_document=ReturnDocument.AFTER
         )
-        if result.modified_count:
-            return await UserService.get_user(user_id)
-        return None
+        if after is None:
+            return None
+        if "access_rights" in update_data or "is_active" in update_data:
+            # Sessions are keyed by _id; role changes and deactivation apply to them at once
+            AuthService.user_updated(str(after["_id"]), after.get("access_rights"), after.get("is_active", True))
+        return await UserService.get_user(user_id)
 
     @staticmethod
     async def delete_user(user_id: str):
-        result = users.delete_one({"id": user_id})
-        return result.deleted_count > 0
+        deleted = await users.find_one_and_delete({"id": user_id}, projection={"_id": 1})
+        if deleted is None:
+            return False
+        AuthService.user_deleted(str(deleted["_id"]))
+        return True
 
     @staticmethod
     async def update_last_login(user_id: str):
-        users.update_one(
+        await users.update_one(
             {"id": user_id},
             {"$set": {"last_login": datetime.utcnow()}}
         )
@@ -0,0 +1,224 @@
+import os
+import uuid
+import asyncio
+import tempfile
+from io import BytesIO
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+import cv2
+import numpy as np
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from db.async_mongo import video_ingests
+from .image_service import ImageService
+from .inference_queue import get_job_queue
+
+def dhash(image: np.ndarray, size: int = 8) -> int:
+    """
+    64-bit difference hash: brightness gradients of a 9x8 thumbnail, robust to
+    compression noise and small exposure changes, sensitive to real scene changes
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def iter_keyframes(
+    video_path: str,
+    vid_stride: int,
+    threshold: int,
+    stats: dict
+) -> Iterator[Tuple[int, float, np.ndarray]]:
+    """
+    Decode a video one sampled frame at a time and yield (frame_index, seconds, frame)
+    for frames that differ from the last kept one by more than `threshold` dHash bits
+
+    Only the current frame and the last keyframe's hash are held, so memory does not
+    grow with the length of the flight. `stats` is updated in place as frames are read.
+    """
+    from ultralytics.data.loaders import LoadImagesAndVideos
+
+    loader = LoadImagesAndVideos(video_path, batch=1, vid_stride=vid_stride)
+    fps = loader.fps or 30
+    last_hash = None
+    try:
+        for _, images, _ in loader:
+            stats["frames_read"] += 1
+            frame_index = loader.frame * vid_stride - 1  # index in the original footage
+            frame_hash = dhash(images[0])
+            if last_hash is not None and bin(frame_hash ^ last_hash).count("1") <= threshold:
+                continue
+            last_hash = frame_hash
+            yield frame_index, frame_index / fps, images[0]
+    finally:
+        if loader.cap:
+            loader.cap.release()
+
+class VideoService:
+
+    # Containers LoadImagesAndVideos can decode that drones actually record
+    VIDEO_FORMATS = ['.mp4', '.mov', '.avi', '.mkv']
+
+    # Sample every Nth frame (15 -> 2 frames/s from 30 fps footage)
+    VIDEO_STRIDE = int(os.getenv("AEROWASTE_VIDEO_STRIDE", "15"))
+
+    # Max dHash bit difference (of 64) for a frame to count as a near-duplicate of the last keyframe
+    DEDUPE_THRESHOLD = int(os.getenv("AEROWASTE_VIDEO_DHASH_THRESHOLD", "10"))
+
+    # Keyframes persisted per upload_images/insert_many round; bounds the JPEGs held in memory
+    KEYFRAME_BATCH = 16
+
+    JPEG_QUALITY = 92
+
+    # Videos are staged on local disk while they are decoded, then deleted
+    STAGING_PATH = Path(os.getenv("AEROWASTE_VIDEO_STAGING", str(Path(tempfile.gettempdir()) / "aerowaste_videos")))
+
+    # Running ingests, so they are not garbage collected mid-flight
+    _tasks = set()
+
+    @staticmethod
+    async def start_ingest(
+        file: UploadFile,
+        mission_id: str = None,
+        drone_id: str = None,
+        vid_stride: int = None,
+        threshold: int = None
+    ) -> dict:
+        """
+        Stage an uploaded flight recording and extract its keyframes in the background
+        """
+        file_extension = Path(file.filename).suffix.lower()
+        if file_extension not in VideoService.VIDEO_FORMATS:
+            raise ValueError(f"Unsupported video format. Use {', '.join(VideoService.VIDEO_FORMATS)}.")
+
+        ingest_id = f"vid_{uuid.uuid4().hex[:8]}"
+        video_path = VideoService.STAGING_PATH / f"{ingest_id}{file_extension}"
+        await run_in_threadpool(VideoService.STAGING_PATH.mkdir, parents=True, exist_ok=True)
+
+        handle = await run_in_threadpool(open, video_path, "wb")
+        try:
+            while chunk := await file.read(ImageService.CHUNK_SIZE):
+                await run_in_threadpool(handle.write, chunk)
+        except BaseException:
+            await run_in_threadpool(handle.close)
+            await run_in_threadpool(video_path.unlink, missing_ok=True)
+            raise
+        await run_in_threadpool(handle.close)
+
+        ingest_doc = {
+            "id": ingest_id,
+            "filename": file.filename,
+            "mission_id": mission_id or f"mission_{uuid.uuid4().hex[:8]}",
+            "drone_id": drone_id or f"drone_{uuid.uuid4().hex[:8]}",
+            "vid_stride": max(1, vid_stride or VideoService.VIDEO_STRIDE),
+            "threshold": VideoService.DEDUPE_THRESHOLD if threshold is None else threshold,
+            "status": "processing",
+            "frames_read": 0,
+            "keyframes": 0,
+            "image_ids": [],
+            "error": None,
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "updated_at": datetime.utcnow().isoformat() + "Z"
+        }
+        await video_ingests.insert_one(dict(ingest_doc))
+
+        task = asyncio.create_task(VideoService._process(ingest_doc, video_path))
+        VideoService._tasks.add(task)
+        task.add_done_callback(VideoService._tasks.discard)
+
+        return ingest_doc
+
+    @staticmethod
+    async def get_ingest(ingest_id: str) -> Optional[dict]:
+        return await video_ingests.find_one({"id": ingest_id}, {"_id": 0})
+
+    @staticmethod
+    async def _process(ingest_doc: dict, video_path: Path):
+        """
+        Decode, dedupe and persist keyframes; progress is written to video_ingests after each batch
+        """
+        stats = {"frames_read": 0}
+        started = datetime.utcnow()
+        keyframes = iter_keyframes(str(video_path), ingest_doc["vid_stride"], ingest_doc["threshold"], stats)
+        batch = []
+
+        def next_keyframe():
+            # Decode and JPEG-encode off the event loop
+            item = next(keyframes, None)
+            if item is None:
+                return None
+            frame_index, seconds, frame = item
+            ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, VideoService.JPEG_QUALITY])
+            if not ok:
+                raise ValueError(f"Could not encode frame {frame_index}")
+            return frame_index, seconds, encoded.tobytes()
+
+        try:
+            while (item := await run_in_threadpool(next_keyframe)) is not None:
+                batch.append(item)
+                if len(batch) >= VideoService.KEYFRAME_BATCH:
+                    await VideoService._persist(ingest_doc, started, batch, stats)
+                    batch = []
+            if batch:
+                await VideoService._persist(ingest_doc, started, batch, stats)
+
+            await video_ingests.update_one(
+                {"id": ingest_doc["id"]},
+                {"$set": {
+                    "status": "done",
+                    "frames_read": stats["frames_read"],
+                    "updated_at": datetime.utcnow().isoformat() + "Z"
+                }}
+            )
+        except Exception as e:
+            await video_ingests.update_one(
+                {"id": ingest_doc["id"]},
+                {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow().isoformat() + "Z"}}
+            )
+        finally:
+            keyframes.close()
+            await run_in_threadpool(video_path.unlink, missing_ok=True)
+
+    @staticmethod
+    async def _persist(ingest_doc: dict, started: datetime, batch: List[Tuple[int, float, bytes]], stats: dict):
+        """
+        Store a batch of keyframes as litter_images (one insert_many) and queue their inference
+        """
+        stem = Path(ingest_doc["filename"]).stem
+        files = [
+            UploadFile(file=BytesIO(data), filename=f"{stem}_f{frame_index:06d}.jpg")
+            for frame_index, _, data in batch
+        ]
+        extras = [
+            {
+                "captured_at": (started + timedelta(seconds=seconds)).isoformat() + "Z",
+                "source_video": {
+                    "ingest_id": ingest_doc["id"],
+                    "filename": ingest_doc["filename"],
+                    "frame": frame_index,
+                    "offset_seconds": round(seconds, 3)
+                }
+            }
+            for frame_index, seconds, _ in batch
+        ]
+
+        outcomes = await ImageService.upload_images(
+            files, mission_id=ingest_doc["mission_id"], drone_id=ingest_doc["drone_id"], extras=extras
+        )
+        records = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+
+        to_infer = [record for record in records if not record.inferred_at]
+        if to_infer:
+            await run_in_threadpool(
+                get_job_queue().enqueue, [(record.id, record.local_path) for record in to_infer]
+            )
+
+        await video_ingests.update_one(
+            {"id": ingest_doc["id"]},
+            {
+                "$set": {"frames_read": stats["frames_read"], "updated_at": datetime.utcnow().isoformat() + "Z"},
+                "$inc": {"keyframes": len(records)},
+                "$push": {"image_ids": {"$each": [record.id for record in records]}}
+            }
+        )
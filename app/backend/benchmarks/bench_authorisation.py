@@ -0,0 +1,200 @@
+"""
+Benchmark and check for authorising requests from session claims.
+
+Logs an Operator and an Admin in through POST /login and sends N requests
+(2000 by default) to permission-protected endpoints, counting Mongo round
+trips. The same requests are timed against a dependency that looks the user
+and role up on every request, as role enforcement would without the claims
+and caches. Then it checks that changes apply to sessions already issued:
+- a permission removed with RoleService.update_role
+- a role moved with UserService.update_user
+- an account deactivated
+- a cold process (as after a restart) trusting the token until its refresh lands
+
+Mongo is replaced by mongomock behind a wrapper that adds a round-trip delay.
+
+    python benchmarks/bench_authorisation.py --requests 2000 --latency-ms 1
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import jwt
+import mongomock
+from bson import ObjectId
+from fastapi import Cookie, Depends, FastAPI, HTTPException
+from passlib.hash import bcrypt
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+import db.async_mongo as async_mongo
+from back_app.api.deps.auth import ALGO, COOKIE_NAME, SECRET, require_permission
+from back_app.api.routes import login as login_routes
+from back_app.models.role_models import RoleUpdate
+from back_app.models.user_models import UserUpdate
+from back_app.services.auth_service import AuthService
+from back_app.services.password_service import PasswordService
+from back_app.services.role_service import RoleService
+from back_app.services.user_service import UserService
+
+
+class RemoteCollection:
+    """mongomock collection with a round-trip delay and a call counter"""
+
+    calls = 0
+
+    def __init__(self, collection, latency_ms: float):
+        self._collection = collection
+        self._latency = latency_ms / 1000
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            RemoteCollection.calls += 1
+            time.sleep(self._latency)
+            return attr(*args, **kwargs)
+        return call
+
+
+def seed(latency_ms: float):
+    db = mongomock.MongoClient().db
+    db.roles.insert_many([
+        {"id": "R001", "name": "Admin", "description": "Full system access", "permissions": ["all"]},
+        {"id": "R002", "name": "Operator", "description": "Drone and user management access",
+         "permissions": ["drones:read", "users:read", "users:write"]},
+    ])
+    for i, role in enumerate(("Admin", "Operator"), start=1):
+        db.users.insert_one({
+            "id": f"U00{i}", "username": role.lower(), "name": role, "access_rights": role,
+            "role_id": db.roles.find_one({"name": role})["_id"], "is_active": True,
+            "hashed_password": bcrypt.using(rounds=4).hash("pw")
+        })
+    async_mongo.users.delegate = RemoteCollection(db.users, latency_ms)
+    async_mongo.roles.delegate = RemoteCollection(db.roles, latency_ms)
+    PasswordService.ROUNDS = 4
+    return db
+
+
+async def lookup_per_request(session: str | None = Cookie(default=None, alias=COOKIE_NAME)):
+    # Role enforcement without claims or caches: the user and their role fetched for every request
+    try:
+        payload = jwt.decode(session, SECRET, algorithms=[ALGO])
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+    user = await async_mongo.users.find_one({"_id": ObjectId(payload["sub"])})
+    role = await async_mongo.roles.find_one({"name": user["access_rights"]}) if user else None
+    if not role or not {"all", "users:read"} & set(role["permissions"]):
+        raise HTTPException(status_code=403, detail="Missing permission: users:read")
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(login_routes.router)
+
+    @app.get("/before")
+    async def before(_=Depends(lookup_per_request)):
+        return {"ok": True}
+
+    @app.get("/users-read")
+    async def users_read(_=Depends(require_permission("users:read"))):
+        return {"ok": True}
+
+    @app.get("/roles-write")
+    async def roles_write(_=Depends(require_permission("roles:write"))):
+        return {"ok": True}
+
+    return app
+
+
+async def login(transport, username: str) -> httpx.AsyncClient:
+    client = httpx.AsyncClient(transport=transport, base_url="http://aerowaste")
+    response = await client.post("/login", json={"username_or_email": username, "password": "pw"})
+    response.raise_for_status()
+    return client
+
+
+async def timed(client: httpx.AsyncClient, path: str, requests: int):
+    latencies, statuses = [], []
+    calls = RemoteCollection.calls
+    start = time.perf_counter()
+    for _ in range(requests):
+        t = time.perf_counter()
+        statuses.append((await client.get(path)).status_code)
+        latencies.append((time.perf_counter() - t) * 1000)
+    return time.perf_counter() - start, latencies, statuses, RemoteCollection.calls - calls
+
+
+async def settle():
+    # Let scheduled cache refreshes finish
+    while AuthService._tasks:
+        await asyncio.sleep(0.001)
+
+
+async def main(args) -> int:
+    seed(args.latency_ms)
+    transport = httpx.ASGITransport(app=build_app())
+    operator = await login(transport, "operator")
+    admin = await login(transport, "admin")
+    checks = []
+
+    print(f"🚀 {args.requests} authorised requests, {args.latency_ms}ms per Mongo round trip")
+    for name, path in (("per-request", "/before"), ("claims+cache", "/users-read")):
+        elapsed, latencies, statuses, calls = await timed(operator, path, args.requests)
+        print(
+            f"{name:<13} {args.requests / elapsed:7.0f} req/s  p50 {statistics.median(latencies):6.2f}ms  "
+            f"{calls} Mongo round trips  ({statuses.count(200)}/{len(statuses)} ok)"
+        )
+    checks.append(("steady state needs no Mongo round trip", calls == 0 and statuses.count(200) == args.requests))
+
+    claims = jwt.decode(operator.cookies[COOKIE_NAME], SECRET, algorithms=[ALGO])
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        AuthService.authorise(claims)
+    print(f"{'authorise()':<13} {(time.perf_counter() - start) / args.requests * 1e6:7.1f} µs per call")
+
+    status = (await operator.get("/roles-write")).status_code, (await admin.get("/roles-write")).status_code
+    checks.append(("Operator refused roles:write, Admin (all) allowed", status == (403, 200)))
+
+    await RoleService.update_role("R002", RoleUpdate(permissions=["drones:read"]))
+    checks.append(("permission removed from a role applies to issued sessions",
+                   (await operator.get("/users-read")).status_code == 403))
+
+    await UserService.update_user("U002", UserUpdate(access_rights="Admin"))
+    checks.append(("role change applies to issued sessions", (await operator.get("/roles-write")).status_code == 200))
+
+    await UserService.update_user("U002", UserUpdate(is_active=False))
+    checks.append(("deactivated account refused", (await operator.get("/users-read")).status_code == 401))
+
+    # A process that has never seen these users: the token's claims hold until the refresh lands
+    # (one round trip per user and per role, off the request path)
+    AuthService._users.clear()
+    AuthService._roles.clear()
+    await settle()
+    calls = RemoteCollection.calls
+    first = (await admin.get("/users-read")).status_code, (await operator.get("/users-read")).status_code
+    await settle()
+    after = (await admin.get("/users-read")).status_code, (await operator.get("/users-read")).status_code
+    checks.append(("cold cache served from token, then refreshed in the background",
+                   first == (200, 200) and after == (200, 401) and RemoteCollection.calls - calls == 4))
+
+    for client in (operator, admin):
+        await client.aclose()
+    for name, ok in checks:
+        print(f"{'✅' if ok else '❌'} {name}")
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,290 @@
+"""
+Benchmark and check for the /events WebSocket push channel.
+
+Opens N connections (2000 by default) to /events/ws straight through the ASGI
+interface, with no server in between. Most clients read every frame at once. A
+few are slow: each frame takes them 1.5 seconds. One is stuck and never
+finishes reading a frame. Telemetry for 50 drones goes through
+FlightController, with a state flush every round, and review decisions are
+published alongside. The report covers:
+- the CPU time and delivery latency of pushing each round to every client
+- the CPU time of N clients polling GET /drones/ instead
+
+Then it checks:
+- fast clients get every event
+- slow clients' queues stay bounded, they are told to resync, and they end
+  on each drone's latest state
+- the stuck client is disconnected
+- sessions are required and topics can be changed on a live connection
+- drone, base, review and detection changes made through the services
+  reach subscribers
+
+Mongo is replaced by mongomock.
+
+    python benchmarks/bench_events.py --clients 2000 --rounds 10
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import mongomock
+from bson import ObjectId
+from fastapi import FastAPI
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+import db.async_mongo as async_mongo
+from back_app.api.routes import drones as drone_routes
+from back_app.api.routes import events as event_routes
+from back_app.api.routes.login import make_session
+from back_app.models.base_models import BaseStationCreate, BaseStationUpdate
+from back_app.models.drone_models import DroneCreate, DroneUpdate
+from back_app.models.telemetry_models import TelemetrySample
+from back_app.services import event_hub
+from back_app.services.base_service import BaseService
+from back_app.services.drone_service import DroneService
+from back_app.services.event_hub import EventHub
+from back_app.services.flight_controller import FlightController
+from back_app.services.image_service import ImageService
+from back_app.services.inference_queue import JobQueue
+
+DRONES = 50
+
+
+class Client:
+    """One WebSocket connection driven through the ASGI interface"""
+
+    def __init__(self, app, token: str = None, topics: str = "drones,reviews", delay: float = 0.0):
+        self.delay = delay
+        # Frames are kept raw (arrival time, text) and parsed afterwards, so parsing is not timed as push cost
+        self.received, self._parsed = [], 0
+        self._events, self.arrivals, self.resyncs, self.event_count = [], [], 0, 0
+        self.close_code = None
+        self.accepted = asyncio.Event()
+        self.ended = asyncio.Event()
+        self._inbox = asyncio.Queue()
+        self._inbox.put_nowait({"type": "websocket.connect"})
+        headers = [(b"cookie", f"aw_session={token}".encode())] if token else []
+        scope = {
+            "type": "websocket", "path": "/events/ws", "raw_path": b"/events/ws",
+            "query_string": f"topics={topics}".encode(), "headers": headers, "scheme": "ws",
+            "server": ("aerowaste", 80), "client": ("10.0.0.2", 40000), "subprotocols": [],
+            "asgi": {"version": "3.0"}, "root_path": "",
+        }
+        self.task = asyncio.create_task(self._run(app, scope))
+
+    async def _run(self, app, scope):
+        try:
+            await app(scope, self._inbox.get, self._send)
+        finally:
+            self.ended.set()
+            self.accepted.set()
+
+    async def _send(self, message):
+        if message["type"] == "websocket.accept":
+            self.accepted.set()
+        elif message["type"] == "websocket.close":
+            self.close_code = message.get("code")
+        elif message["type"] == "websocket.send":
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            self.received.append((time.perf_counter(), message["text"]))
+            # Counted without parsing: every event, and nothing else in a frame, has a "topic"
+            self.event_count += message["text"].count('"topic": ')
+
+    @property
+    def events(self) -> list:
+        for arrived, text in self.received[self._parsed:]:
+            for event in json.loads(text):
+                if event["type"] == "resync":
+                    self.resyncs += 1
+                    continue
+                self._events.append(event)
+                self.arrivals.append(arrived)
+        self._parsed = len(self.received)
+        return self._events
+
+    def say(self, message: dict):
+        self._inbox.put_nowait({"type": "websocket.receive", "text": json.dumps(message)})
+
+    async def close(self):
+        self._inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        await self.ended.wait()
+
+
+def setup():
+    db = mongomock.MongoClient().db
+    async_mongo.async_db.delegate = db
+    for name, collection in async_mongo.async_db._collections.items():
+        collection.delegate = db[name]
+    db.roles.insert_one({"name": "Operator", "permissions": ["drones:read"]})
+    user_id = ObjectId()
+    db.users.insert_one({"_id": user_id, "username": "ops", "access_rights": "Operator", "is_active": True})
+    db.drones.insert_many([
+        {"id": f"D{i:03d}", "name": f"Drone {i}", "base_assigned": "B_001"} for i in range(1, DRONES + 1)
+    ])
+    db.bases.insert_one({"id": "B_001", "name": "Depot", "servicing_address": "1 Quay", "what3words": "a.b.c"})
+    return db, make_session(str(user_id), {"role": "Operator", "perms": ["drones:read"]})
+
+
+def telemetry_round(k: int):
+    FlightController.ingest(
+        TelemetrySample(drone_id=f"D{i:03d}", lat=51.5 + i * 1e-3, lon=-0.12 + k * 1e-5, battery=100 - k)
+        for i in range(1, DRONES + 1)
+    )
+
+
+async def wait_for(predicate, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def fan_out(args, app, token):
+    print(f"🚀 {args.clients} connections ({args.slow} slow, 1 stuck), {DRONES} drones, {args.rounds} rounds")
+    fast = [Client(app, token) for _ in range(args.clients - args.slow - 1)]
+    slow = [Client(app, token, delay=1.5) for _ in range(args.slow)]
+    stuck = Client(app, token, delay=3600)
+    everyone = fast + slow + [stuck]
+    await asyncio.gather(*(client.accepted.wait() for client in everyone))
+
+    cpu, latencies, max_pending = [], [], 0
+    per_round = DRONES + args.reviews
+    for k in range(args.rounds):
+        published = time.perf_counter()
+        start = time.process_time()
+        telemetry_round(k)
+        await FlightController.flush_state()
+        for j in range(args.reviews):
+            image_id = f"img-{k}-{j}"
+            EventHub.publish("reviews", "review.saved", {"id": image_id, "is_litter": True}, key=image_id)
+        await wait_for(lambda: all(client.event_count >= per_round * (k + 1) for client in fast))
+        cpu.append(time.process_time() - start)
+        latencies += [(arrived - published) * 1000 for client in fast for arrived, _ in client.received[-1:]]
+        max_pending = max(max_pending, *(len(sub._pending) for sub in EventHub._subscribers["drones"]))
+        await asyncio.sleep(0.05)
+
+    print(
+        f"{'push':<8} {statistics.median(cpu) * 1000:7.1f} ms CPU per round ({per_round} events x {len(everyone)} "
+        f"clients)  last frame p50 {statistics.median(latencies):6.1f}ms  p99 "
+        f"{sorted(latencies)[int(len(latencies) * 0.99)]:6.1f}ms"
+    )
+
+    await wait_for(lambda: stuck.close_code is not None, EventHub.SEND_TIMEOUT + 5)
+    # Slow clients catch up: nothing left queued, then the frame they were reading lands
+    await wait_for(lambda: not any(sub._pending for sub in EventHub._subscribers["drones"]), 60)
+    await asyncio.sleep(2.0)
+
+    last_battery = 100 - (args.rounds - 1)
+    slow_latest = all(
+        {event["data"]["id"]: event["data"]["battery"] for event in client.events if event["type"] == "drone.telemetry"}
+        == {f"D{i:03d}": last_battery for i in range(1, DRONES + 1)}
+        for client in slow
+    )
+    checks = [
+        (f"fast clients got all {per_round * args.rounds} events",
+         all(len(client.events) == per_round * args.rounds for client in fast)),
+        (f"queues bounded (largest {max_pending} of {EventHub.QUEUE_SIZE})", max_pending <= EventHub.QUEUE_SIZE),
+        ("slow clients told to resync and left on each drone's latest state",
+         all(client.resyncs for client in slow) and slow_latest),
+        ("stuck client disconnected with 1013", stuck.close_code == 1013),
+    ]
+    await asyncio.gather(*(client.close() for client in fast + slow))
+    checks.append(("no subscribers left behind", not any(EventHub._subscribers.values())))
+    return checks, statistics.median(cpu)
+
+
+async def polling_cost(args):
+    app = FastAPI()
+    app.include_router(drone_routes.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://aerowaste") as client:
+        await client.get("/drones/")
+        start = time.process_time()
+        for _ in range(50):
+            assert (await client.get("/drones/")).status_code == 200
+        per_request = (time.process_time() - start) / 50
+    print(
+        f"{'polling':<8} {per_request * 1000:7.2f} ms CPU per GET /drones/; {args.clients} clients polling each round "
+        f"cost {per_request * args.clients * 1000:7.0f} ms CPU"
+    )
+    return per_request * args.clients
+
+
+async def hooks(app, token, db):
+    checks = []
+    anonymous = Client(app, None)
+    await anonymous.ended.wait()
+    checks.append(("connection without a session refused (1008)", anonymous.close_code == 1008))
+
+    client = Client(app, token, topics="drones")
+    await client.accepted.wait()
+    client.say({"subscribe": ["bases", "reviews", "detections"]})
+    await wait_for(lambda: any(event["type"] == "subscribed" for event in client.events))
+
+    created = await DroneService.create_drone(DroneCreate(name="Spare", base_assigned="B_001"))
+    await DroneService.update_drone(created.id, DroneUpdate(status="Maintenance"))
+    await BaseService.update_base("B_001", BaseStationUpdate(litter_capacity_percent=85))
+    db.litter_images.insert_one({"id": "img-1", "review_status": "pending", "captured_at": "2025-01-01T00:00:00Z"})
+    await ImageService.update_human_reviews([{"id": "img-1", "is_litter": True, "litter_class": "Can"}])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(Path(tmp) / "jobs.db")
+        event_hub.get_job_queue = lambda: queue
+        EventHub.DETECTION_POLL_SECONDS = 0.05
+        watcher = asyncio.create_task(EventHub.watch_detections_forever())
+        await asyncio.sleep(0.1)
+        [job_id] = queue.enqueue([("img-2", "/tmp/img-2.jpg")])
+        queue.claim_batch("worker-0", 1)
+        queue.complete({job_id: {"classification": {"label": "Plastic bottle"}, "detection_count": 1}})
+        seen = await wait_for(lambda: any(event["type"] == "detection.created" for event in client.events), 5)
+        watcher.cancel()
+
+    types = {event["type"]: event.get("data", event) for event in client.events}
+    checks.append(("topics changed on a live connection", "bases" in types.get("subscribed", {}).get("topics", [])))
+    checks.append(("drone create/update pushed", types.get("drone.created", {}).get("id") == created.id
+                   and types.get("drone.updated", {}).get("status") == "Maintenance"))
+    checks.append(("base capacity change pushed", types.get("base.updated", {}).get("litter_capacity_percent") == 85))
+    checks.append(("review decision pushed", types.get("review.saved", {}).get("litter_class") == "Can"))
+    checks.append(("detection from the inference queue pushed",
+                   seen and types["detection.created"]["classification"]["label"] == "Plastic bottle"))
+    await client.close()
+    return checks
+
+
+async def main(args) -> int:
+    db, token = setup()
+    EventHub.QUEUE_SIZE = args.queue_size
+    EventHub.SEND_TIMEOUT = args.send_timeout
+    app = FastAPI()
+    app.include_router(event_routes.router)
+
+    checks, push_cpu = await fan_out(args, app, token)
+    poll_cpu = await polling_cost(args)
+    checks.append((f"push cheaper than polling ({push_cpu * 1000:.0f} vs {poll_cpu * 1000:.0f} ms CPU per round)",
+                   push_cpu < poll_cpu))
+    checks += await hooks(app, token, db)
+    for name, ok in checks:
+        print(f"{'✅' if ok else '❌'} {name}")
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--slow", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--reviews", type=int, default=150, help="Review decisions published per round")
+    parser.add_argument("--queue-size", type=int, default=200)
+    parser.add_argument("--send-timeout", type=float, default=3.0)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,157 @@
+"""
+Training-data export benchmark for ExportService.
+
+Seeds N reviewed images (unique JPEG blobs with random boxes, some rejected,
+some duplicate uploads) in a temporary LocalStorage, then streams the YOLO
+zip that GET /ai/export/training-data serves to disk. Reports throughput and peak
+resident memory, which should not grow with N, and checks the archive:
+every member readable, labels normalised, duplicates exported once, and the
+train/val split identical across two exports. Mongo is replaced by mongomock.
+
+    python benchmarks/bench_export.py --images 500
+    python benchmarks/bench_export.py --images 5000
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+import mongomock
+import numpy as np
+from PIL import Image
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+import db.async_mongo as async_mongo
+from back_app.services.export_service import ExportService
+from back_app.services.image_service import ImageService
+from back_app.services.storage import LocalStorage
+
+LABELS = ["Plastic bottle", "Drink can", "Cigarette", "Unlabeled litter", "Broken glass"]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+class PeakRSS(threading.Thread):
+    """Samples resident memory every 50ms while the export runs"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = rss_mb()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(0.05):
+            self.peak = max(self.peak, rss_mb())
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def seed(storage: LocalStorage, count: int, size: int):
+    rng = np.random.default_rng(0)
+    random.seed(0)
+    docs = []
+    for i in range(count):
+        buffer = io.BytesIO()
+        Image.fromarray(rng.integers(0, 255, (size, size, 3), dtype=np.uint8)).save(buffer, "JPEG", quality=85)
+        content_hash = f"{i:064x}"
+        key = ImageService._blob_key(content_hash, ".jpg")
+        target = storage.path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(buffer.getvalue())
+
+        is_litter = random.random() < 0.7
+        boxes = [
+            {
+                "label": random.choice(LABELS), "confidence": 0.9,
+                "x": random.randrange(-10, size - 20), "y": random.randrange(0, size - 20),
+                "width": random.randrange(10, size // 2), "height": random.randrange(10, size // 2)
+            }
+            for _ in range(random.randrange(1, 4))
+        ] if is_litter else []
+        doc = {
+            "id": f"img_{i:08d}", "storage_key": key, "content_hash": content_hash,
+            "width": size if i % 10 else None, "height": size if i % 10 else None,  # some legacy records
+            "review_status": "reviewed", "bounding_boxes": boxes,
+            "human_review": {"is_litter": is_litter}
+        }
+        docs.append(doc)
+        if i % 50 == 0:  # a duplicate upload of the same frame
+            docs.append({**doc, "id": f"img_{i:08d}_dup", "duplicate_of": doc["id"]})
+    async_mongo.litter_images.delegate.insert_many(docs)
+    return sum(1 for doc in docs if "duplicate_of" not in doc)
+
+
+async def export(target: Path) -> float:
+    # Consumes the response generator directly: TestClient would buffer the whole body
+    start = time.perf_counter()
+    with open(target, "wb") as handle:
+        async for chunk in ExportService.stream_yolo_zip():
+            handle.write(chunk)
+    return time.perf_counter() - start
+
+
+def check(path: Path, expected: int):
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        images = [name for name in names if "/images/" in name]
+        labels = [name for name in names if "/labels/" in name]
+        assert len(images) == len(labels) == expected, (len(images), len(labels), expected)
+        assert "data.yaml" in names and "classes.txt" in names
+        classes = archive.read("classes.txt").decode().split("\n")[:-1]
+        for name in labels:
+            for line in archive.read(name).decode().splitlines():
+                cls, *coords = line.split()
+                assert 0 <= int(cls) < len(classes)
+                assert all(0.0 <= float(value) <= 1.0 for value in coords), line
+        assert archive.testzip() is None
+        return sorted(names), sum(name.startswith("val/images") for name in images)
+
+
+def main(args):
+    async_mongo.litter_images.delegate = mongomock.MongoClient().db.litter_images
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        ImageService.storage = LocalStorage(tmp / "images")
+        print(f"🧪 Seeding {args.images} reviewed {args.size}px images...")
+        unique = seed(ImageService.storage, args.images, args.size)
+        blob_mb = sum(p.stat().st_size for p in (tmp / "images").rglob("*.jpg")) / 2**20
+
+        baseline = rss_mb()
+        sampler = PeakRSS()
+        sampler.start()
+        elapsed = asyncio.run(export(tmp / "export_1.zip"))
+        sampler.stop()
+        asyncio.run(export(tmp / "export_2.zip"))
+
+        first, val = check(tmp / "export_1.zip", unique)
+        second, _ = check(tmp / "export_2.zip", unique)
+        assert first == second, "train/val split changed between exports"
+
+        size_mb = (tmp / "export_1.zip").stat().st_size / 2**20
+        print(f"{'images':<12} {unique} exported ({val} val), {args.images // 50 + 1} duplicates skipped")
+        print(f"{'archive':<12} {size_mb:.1f} MB from {blob_mb:.1f} MB of originals")
+        print(f"{'wall time':<12} {elapsed:.1f}s ({size_mb / elapsed:.1f} MB/s)")
+        print(f"{'peak RSS':<12} {sampler.peak:.0f} MB (+{sampler.peak - baseline:.0f} MB over baseline)")
+        print("✅ Archive valid and split deterministic")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=1000)
+    parser.add_argument("--size", type=int, default=320)
+    main(parser.parse_args())
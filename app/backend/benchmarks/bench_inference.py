@@ -0,0 +1,63 @@
+"""
+Throughput benchmark for the batched LitterDetector.
+
+Writes synthetic drone-sized JPEGs to a temp folder and measures end-to-end
+images/sec (decode + preprocess + inference + NMS) at several batch sizes.
+
+    python benchmarks/bench_inference.py --images 256 --batch-sizes 1 8 32
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+from back_app.ai.yolo_detection import LitterDetector, DEFAULT_MODEL_PATH
+
+
+def make_images(folder: Path, count: int, width: int, height: int):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        image = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        path = folder / f"frame_{i:05d}.jpg"
+        cv2.imwrite(str(path), image)
+        paths.append(str(path))
+    return paths
+
+
+def run(model_path: str, batch_sizes, count: int, width: int, height: int, device: str):
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_images(Path(tmp), count, width, height)
+        print(f"🚀 {count} synthetic {width}x{height} images, model {model_path}")
+
+        for batch_size in batch_sizes:
+            detector = LitterDetector(model_path=model_path, batch_size=batch_size, device=device)
+            detector.detect_batch(paths[:batch_size])  # warm caches for this batch shape
+
+            start = time.perf_counter()
+            results = detector.detect_batch(paths)
+            elapsed = time.perf_counter() - start
+
+            failed = sum(1 for r in results if r['status'] != 'success')
+            print(f"batch={batch_size:>3}  {count / elapsed:8.1f} images/sec  ({elapsed:.2f}s, {failed} failed)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--images", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    run(args.model, args.batch_sizes, args.images, args.width, args.height, args.device)
@@ -0,0 +1,156 @@
+"""
+Login storm benchmark for POST /login.
+
+N users (100 by default) log in at once, as at a shift change. The storm
+runs twice: against the previous handler, a sync route calling bcrypt.verify
+on Starlette's threadpool, and against the current one, which hashes on
+PasswordService's bounded executor. While each storm runs, a probe hits a
+cheap sync endpoint. It reports logins/s, login p50/p99 and the probe's p99,
+which shows whether hashing starves the rest of the API. The report then
+covers three more things:
+- a second wave of logins, which the verification cache serves
+- a wave after the cost factor is raised, which rehashes every stored hash
+- a brute-force run against one account, counting the bcrypt verifies it could force
+
+Mongo is replaced by mongomock. Requests go through httpx's ASGI transport,
+so nothing is buffered or serialised by a test client.
+
+    python benchmarks/bench_login.py --users 100 --rounds 10
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import mongomock
+from fastapi import FastAPI, HTTPException
+from passlib.hash import bcrypt
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+import db.async_mongo as async_mongo
+from back_app.api.routes import login as login_routes
+from back_app.services.password_service import PasswordService
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def build_app(collection) -> FastAPI:
+    app = FastAPI()
+    app.include_router(login_routes.router)
+
+    @app.post("/login-before")
+    def login_before(request: login_routes.LoginRequest):
+        # The handler as it was: sync, bcrypt on Starlette's shared threadpool
+        user = collection.find_one({"username": request.username_or_email})
+        if not user or not bcrypt.verify(request.password, user.get("hashed_password", "")):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        return {"ok": True}
+
+    @app.get("/probe")
+    def probe():
+        return {"ok": collection.find_one({"username": "user0"}, {"_id": 1}) is not None}
+
+    return app
+
+
+async def storm(client: httpx.AsyncClient, path: str, users: int, password: str = "pw"):
+    latencies, statuses, probes = [], [], []
+    done = asyncio.Event()
+
+    async def one(i: int):
+        start = time.perf_counter()
+        response = await client.post(path, json={"username_or_email": f"user{i}", "password": password})
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses.append(response.status_code)
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/probe")
+            probes.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.02)
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(users)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+    return latencies, statuses, probes, elapsed
+
+
+def report(name, latencies, statuses, probes, elapsed):
+    ok = sum(status == 200 for status in statuses)
+    print(
+        f"{name:<14} {len(latencies) / elapsed:6.1f} logins/s  p50 {statistics.median(latencies):7.0f}ms  "
+        f"p99 {percentile(latencies, 99):7.0f}ms  probe p99 {percentile(probes, 99):6.0f}ms  ({ok}/{len(statuses)} ok)"
+    )
+
+
+async def main(args) -> int:
+    db = mongomock.MongoClient().db
+    async_mongo.users.delegate = db.users
+    stored = bcrypt.using(rounds=args.rounds).hash("pw")
+    db.users.insert_many([
+        {"username": f"user{i}", "name": f"User {i}", "hashed_password": stored} for i in range(args.users)
+    ])
+    PasswordService.ROUNDS = args.rounds
+
+    transport = httpx.ASGITransport(app=build_app(db.users), client=("10.0.0.1", 5000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://aerowaste", timeout=600) as client:
+        print(f"🚀 {args.users} concurrent logins, bcrypt cost {args.rounds}, {PasswordService.WORKERS} hash worker(s)")
+        report("before (sync)", *await storm(client, "/login-before", args.users))
+        first = await storm(client, "/login", args.users)
+        report("offloaded", *first)
+        report("second wave", *await storm(client, "/login", args.users))
+
+        # As after raising AEROWASTE_BCRYPT_ROUNDS: the next login verifies at the old cost and stores the new one
+        PasswordService.ROUNDS = args.rounds + 1
+        report("cost raised", *await storm(client, "/login", args.users))
+        rehashed = sum(doc["hashed_password"].startswith(f"$2b${args.rounds + 1:02d}$") for doc in db.users.find())
+        print(f"{'rehash':<14} {rehashed}/{args.users} stored hashes upgraded to cost {args.rounds + 1} on login")
+
+        verifies = 0
+        original = PasswordService._check
+
+        def counting_check(plain, hashed):
+            nonlocal verifies
+            verifies += 1
+            return original(plain, hashed)
+
+        PasswordService._check = staticmethod(counting_check)
+        start = time.perf_counter()
+        statuses = [
+            (await client.post("/login", json={"username_or_email": "user0", "password": f"guess{i}"})).status_code
+            for i in range(args.attempts)
+        ]
+        elapsed = time.perf_counter() - start
+        PasswordService._check = staticmethod(original)
+        print(
+            f"{'brute force':<14} {args.attempts} guesses in {elapsed:.2f}s: {statuses.count(401)} rejected after a "
+            f"bcrypt verify, {statuses.count(429)} throttled before hashing ({verifies} verifies run)"
+        )
+
+    ok = (
+        first[1].count(200) == args.users and rehashed == args.users
+        and verifies <= PasswordService.account_throttle.free_attempts
+    )
+    print(f"{'✅' if ok else '❌'} Logins succeed, hashes upgraded, brute force stopped before it burns CPU")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost of the stored hashes")
+    parser.add_argument("--attempts", type=int, default=1000, help="Wrong passwords tried against one account")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,105 @@
+"""
+p99 latency of Mongo-backed handlers under 200 parallel clients.
+
+Uses mongomock as an in-memory stand-in and injects per-call latency
+(plus an occasional slow query) to model a real server, then compares
+calling pymongo directly from async handlers against db.async_mongo.
+
+    python benchmarks/bench_mongo_concurrency.py --clients 200 --requests 20
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import mongomock
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+from db.async_mongo import AsyncCollection
+
+
+class LatencyCollection:
+    """mongomock collection that sleeps like a networked server would"""
+
+    def __init__(self, collection, latency_ms: float, slow_every: int, slow_ms: float):
+        self._collection = collection
+        self._latency = latency_ms / 1000
+        self._slow_every = slow_every
+        self._slow = slow_ms / 1000
+        self._calls = 0
+
+    def find_one(self, *args, **kwargs):
+        self._calls += 1
+        slow = self._slow_every and self._calls % self._slow_every == 0
+        time.sleep(self._slow if slow else self._latency)
+        return self._collection.find_one(*args, **kwargs)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_clients(lookup, clients: int, requests: int, ids):
+    latencies = []
+
+    async def client():
+        for _ in range(requests):
+            # The request "arrives" now; yielding lets a blocked loop show up as queueing time
+            start = time.perf_counter()
+            await asyncio.sleep(0)
+            await lookup(random.choice(ids))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, time.perf_counter() - start
+
+
+def report(name, latencies, elapsed):
+    print(
+        f"{name:<10} p50 {statistics.median(latencies):8.1f}ms  "
+        f"p99 {percentile(latencies, 99):8.1f}ms  "
+        f"{len(latencies) / elapsed:8.0f} req/s"
+    )
+
+
+async def main(args):
+    collection = mongomock.MongoClient().db.drones
+    ids = [f"D{i:03d}" for i in range(1, args.documents + 1)]
+    collection.insert_many([{"id": drone_id, "name": f"Drone {drone_id}"} for drone_id in ids])
+    slow = LatencyCollection(collection, args.latency_ms, args.slow_every, args.slow_ms)
+
+    print(f"🚀 {args.clients} clients x {args.requests} requests, "
+          f"{args.latency_ms}ms per query, 1 in {args.slow_every} takes {args.slow_ms}ms")
+
+    async def blocking_lookup(drone_id):
+        return slow.find_one({"id": drone_id})
+
+    offloaded = AsyncCollection(slow)
+
+    async def offloaded_lookup(drone_id):
+        return await offloaded.find_one({"id": drone_id})
+
+    if not args.skip_blocking:
+        report("blocking", *await run_clients(blocking_lookup, args.clients, args.requests, ids))
+    report("offloaded", *await run_clients(offloaded_lookup, args.clients, args.requests, ids))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--slow-every", type=int, default=500)
+    parser.add_argument("--slow-ms", type=float, default=250.0)
+    parser.add_argument("--skip-blocking", action="store_true", help="only run the async data-access layer")
+    asyncio.run(main(parser.parse_args()))
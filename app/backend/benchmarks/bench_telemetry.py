@@ -0,0 +1,226 @@
+"""
+Benchmark and check for live telemetry ingestion.
+
+N drones (50 by default) each POST one sample at 10 Hz to /telemetry for a
+few seconds. This is the worst case: a real drone would batch or use the
+WebSocket. The run is done twice: once through a handler that writes every
+sample to Mongo as it arrives (insert + drone update), and once through
+FlightController, which buffers samples and flushes them in batches. The report
+covers the sample rate achieved, ingest latency and Mongo round trips. Then
+it checks:
+- every sample reached the telemetry collection
+- each drone document holds its newest sample
+- a late, older sample does not move a drone back
+- samples sent over the WebSocket are stored too, and a malformed frame
+  is answered with an error without closing the stream
+- the telemetry routes refuse clients without a session
+
+Mongo is replaced by mongomock behind a wrapper that adds a round-trip delay.
+
+    python benchmarks/bench_telemetry.py --drones 50 --hz 10 --seconds 5
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+import mongomock
+from bson import ObjectId
+from fastapi import FastAPI, WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+import db.async_mongo as async_mongo
+from back_app.api.routes import telemetry as telemetry_routes
+from back_app.api.routes.login import make_session
+from back_app.models.telemetry_models import TelemetryBatch, TelemetrySample
+from back_app.services.flight_controller import FlightController
+
+
+USER_ID = ObjectId()
+SESSION = {"aw_session": make_session(str(USER_ID), {"role": "Operator", "perms": ["drones:read"]})}
+
+
+class RemoteCollection:
+    """mongomock collection with a round-trip delay and a call counter"""
+
+    calls = 0
+
+    def __init__(self, collection, latency_ms: float):
+        self._collection = collection
+        self._latency = latency_ms / 1000
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            RemoteCollection.calls += 1
+            time.sleep(self._latency)
+            return attr(*args, **kwargs)
+        return call
+
+
+def fresh_db(args):
+    db = mongomock.MongoClient().db
+    db.drones.insert_many([{"id": f"D{i:03d}", "name": f"Drone {i}", "battery": 100} for i in range(1, args.drones + 1)])
+    async_mongo.drones.delegate = RemoteCollection(db.drones, args.latency_ms)
+    async_mongo.telemetry.delegate = RemoteCollection(db.telemetry, args.latency_ms)
+    # Ingestion needs a session; the account lookups are not counted as telemetry round trips
+    db.roles.insert_one({"name": "Operator", "permissions": ["drones:read"]})
+    db.users.insert_one({"_id": USER_ID, "username": "ground-station", "access_rights": "Operator", "is_active": True})
+    async_mongo.users.delegate = db.users
+    async_mongo.roles.delegate = db.roles
+    FlightController._samples, FlightController._latest = [], {}
+    return db
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(telemetry_routes.router)
+
+    @app.post("/telemetry-before", status_code=202)
+    async def ingest_before(batch: TelemetryBatch):
+        # A database write per sample, as the drone routes do for manual updates
+        for sample in batch.samples:
+            doc = FlightController._document(sample)
+            await async_mongo.telemetry.insert_one(doc)
+            await async_mongo.drones.update_one(
+                {"id": sample.drone_id},
+                {"$set": {"position": doc["location"], "battery": sample.battery, "last_telemetry_at": doc["ts"]}}
+            )
+        return {"accepted": len(batch.samples)}
+
+    return app
+
+
+def sample(drone: int, k: int, start: datetime) -> dict:
+    return {
+        "drone_id": f"D{drone:03d}", "ts": (start + timedelta(milliseconds=100 * k)).isoformat(),
+        "lat": 51.5 + drone * 1e-3 + k * 1e-6, "lon": -0.12 + k * 1e-6, "altitude": 30 + k % 10,
+        "battery": max(0, 100 - k // 50), "speed": 6.5, "heading": (k * 3) % 360
+    }
+
+
+async def fleet(client: httpx.AsyncClient, path: str, args):
+    latencies, statuses, lag = [], [], []
+    calls = RemoteCollection.calls
+    clock = datetime.utcnow()
+    loop = asyncio.get_running_loop()
+    begin = loop.time()
+    per_drone = int(args.hz * args.seconds)
+
+    async def drone(i: int):
+        for k in range(per_drone):
+            due = begin + k / args.hz + i / (args.drones * args.hz)
+            await asyncio.sleep(max(0.0, due - loop.time()))
+            lag.append(loop.time() - due)
+            t = time.perf_counter()
+            response = await client.post(path, json={"samples": [sample(i, k, clock)]})
+            latencies.append((time.perf_counter() - t) * 1000)
+            statuses.append(response.status_code)
+
+    await asyncio.gather(*(drone(i) for i in range(1, args.drones + 1)))
+    elapsed = loop.time() - begin
+    return latencies, statuses, elapsed, RemoteCollection.calls - calls, max(lag)
+
+
+def report(name, latencies, statuses, elapsed, calls, lag):
+    print(
+        f"{name:<11} {len(statuses) / elapsed:6.0f} samples/s  p50 {statistics.median(latencies):6.2f}ms  "
+        f"p99 {sorted(latencies)[int(len(latencies) * 0.99)]:6.2f}ms  {calls:5d} Mongo round trips  "
+        f"max lag {lag * 1000:5.0f}ms  ({statuses.count(202)}/{len(statuses)} accepted)"
+    )
+
+
+async def run(args):
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://aerowaste", cookies=SESSION) as client:
+        print(f"🚀 {args.drones} drones at {args.hz} Hz for {args.seconds}s, {args.latency_ms}ms per Mongo round trip")
+        fresh_db(args)
+        report("per-sample", *await fleet(client, "/telemetry-before", args))
+
+        db = fresh_db(args)
+        flusher = asyncio.create_task(FlightController.run_forever())
+        result = await fleet(client, "/telemetry/", args)
+        flusher.cancel()
+        await asyncio.gather(flusher, return_exceptions=True)
+        report("buffered", *result)
+
+    sent = result[1].count(202)
+    stored = db.telemetry.count_documents({})
+    last_k = int(args.hz * args.seconds) - 1
+    newest = all(
+        doc.get("battery") == max(0, 100 - last_k // 50) and doc.get("heading") == (last_k * 3) % 360
+        and abs(doc["position"]["coordinates"][1] - (51.5 + int(doc["id"][1:]) * 1e-3 + last_k * 1e-6)) < 1e-9
+        for doc in db.drones.find()
+    )
+    budget = args.seconds / FlightController.FLUSH_SECONDS + args.seconds / FlightController.STATE_SECONDS + 4
+    checks = [
+        (f"all {sent} samples stored ({stored})", stored == sent == args.drones * int(args.hz * args.seconds)),
+        ("each drone holds its newest sample", newest),
+        (f"no per-sample round trips ({result[3]} for {sent} samples)", result[3] <= budget),
+    ]
+
+    before = db.drones.find_one({"id": "D001"})["last_telemetry_at"]
+    FlightController.ingest([TelemetrySample(drone_id="D001", ts=before - timedelta(seconds=30), lat=0, lon=0, battery=1)])
+    await FlightController.flush()
+    d001 = db.drones.find_one({"id": "D001"})
+    checks.append(("a late sample does not move the drone back",
+                   d001["last_telemetry_at"] == before and d001["battery"] != 1))
+    return checks, db
+
+
+def check_websocket(db) -> tuple:
+    with TestClient(build_app(), cookies=SESSION) as client:
+        with client.websocket_connect("/telemetry/ws") as ws:
+            clock = datetime.utcnow() + timedelta(minutes=1)
+            ws.send_text("{not json")
+            malformed = ws.receive_json()
+            ws.send_json([sample(2, k, clock) for k in range(10)])
+            ws.send_json({"drone_id": "D002", "lat": 100, "lon": 0})
+            error = ws.receive_json()
+        client.portal.call(FlightController.flush)
+    stored = db.telemetry.count_documents({"meta.drone_id": "D002", "ts": {"$gte": clock}})
+    return ("WebSocket samples stored, invalid ones and malformed frames answered with an error",
+            stored == 10 and "error" in error and "error" in malformed)
+
+
+def check_anonymous() -> tuple:
+    with TestClient(build_app()) as client:
+        status = client.post("/telemetry/", json={"samples": [sample(1, 0, datetime.utcnow())]}).status_code
+        history = client.get("/telemetry/D001").status_code
+        try:
+            with client.websocket_connect("/telemetry/ws") as ws:
+                ws.receive_json()
+            close_code = None
+        except WebSocketDisconnect as e:
+            close_code = e.code
+    return ("telemetry without a session refused (401, WebSocket 1008)",
+            status == history == 401 and close_code == 1008)
+
+
+def main(args) -> int:
+    checks, db = asyncio.run(run(args))
+    checks.append(check_websocket(db))
+    checks.append(check_anonymous())
+    for name, ok in checks:
+        print(f"{'✅' if ok else '❌'} {name}")
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, default=50)
+    parser.add_argument("--hz", type=float, default=10)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+"""
+Concurrent large-upload benchmark for ImageService.upload_image.
+
+Builds a 30MB drone-sized JPEG, then pushes 50 concurrent uploads of it
+through the streaming upload path and through the old read-everything
+path, reporting wall time, MB/s and peak Python heap (tracemalloc).
+Mongo is replaced by mongomock so only the file path is measured.
+
+    python benchmarks/bench_upload.py --uploads 50 --size-mb 30
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import mongomock
+import numpy as np
+from starlette.datastructures import UploadFile
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+import db.async_mongo as async_mongo
+from back_app.services.image_service import ImageService
+from back_app.services.storage import LocalStorage
+
+
+def make_source(path: Path, size_mb: int):
+    # A real 48MP JPEG header followed by padding: decoders ignore trailing bytes
+    ok, encoded = cv2.imencode(".jpg", np.full((6048, 8064, 3), 90, np.uint8))
+    with open(path, "wb") as f:
+        f.write(encoded.tobytes())
+        f.write(os.urandom(size_mb * 1024 * 1024 - len(encoded)))
+
+
+async def legacy_upload(file: UploadFile, storage: Path):
+    # The pre-streaming implementation: whole file in memory, blocking write
+    with open(storage / f"{os.urandom(8).hex()}.jpg", "wb") as buffer:
+        content = await file.read()
+        buffer.write(content)
+
+
+async def run(mode: str, source: Path, storage: Path, uploads: int):
+    handles = [open(source, "rb") for _ in range(uploads)]
+    files = [UploadFile(file=handle, filename="frame.jpg") for handle in handles]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "legacy":
+        await asyncio.gather(*(legacy_upload(f, storage) for f in files))
+    else:
+        records = await asyncio.gather(*(ImageService.upload_image(file=f) for f in files))
+        assert all(r.width == 8064 and r.height == 6048 for r in records)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    for handle in handles:
+        handle.close()
+    return elapsed, peak
+
+
+async def main(args):
+    async_mongo.litter_images.delegate = mongomock.MongoClient().db.litter_images
+    # Uploads also count into the daily summaries
+    async_mongo.detections_summary.delegate = mongomock.MongoClient().db.detections_summary
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / "source.jpg"
+        make_source(source, args.size_mb)
+        total_mb = args.uploads * args.size_mb
+        print(f"🚀 {args.uploads} concurrent uploads x {args.size_mb}MB")
+
+        for mode in ("legacy", "streaming"):
+            storage = tmp / mode
+            storage.mkdir()
+            ImageService.storage = LocalStorage(storage)
+            elapsed, peak = await run(mode, source, storage, args.uploads)
+            print(f"{mode:<10} {elapsed:6.2f}s  {total_mb / elapsed:7.1f} MB/s  peak heap {peak / 2**20:8.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--size-mb", type=int, default=30)
+    asyncio.run(main(parser.parse_args()))
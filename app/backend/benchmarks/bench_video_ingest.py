@@ -0,0 +1,132 @@
+"""
+Video ingestion benchmark for VideoService.
+
+Synthesises a drone-style flight (a camera panning over terrain, with
+hovering segments where consecutive frames are near-identical), then runs
+the ingest pipeline on it: streaming decode with vid_stride, dHash
+deduplication and batched keyframe persistence. Reports frames decoded,
+keyframes kept, wall time and peak resident memory, which should stay flat
+however long the flight is. Mongo is replaced by mongomock and storage by
+a temporary LocalStorage; inference jobs go to a scratch queue.
+
+    python benchmarks/bench_video_ingest.py --width 1920 --height 1080 --seconds 60
+    python benchmarks/bench_video_ingest.py --width 3840 --height 2160 --seconds 1200   # 20-minute 4K flight
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import mongomock
+import numpy as np
+from starlette.datastructures import UploadFile
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+import db.async_mongo as async_mongo
+from back_app.services import video_service
+from back_app.services.image_service import ImageService
+from back_app.services.inference_queue import JobQueue
+from back_app.services.storage import LocalStorage
+from back_app.services.video_service import VideoService
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+class PeakRSS(threading.Thread):
+    """Samples resident memory every 50ms while the ingest runs"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = rss_mb()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(0.05):
+            self.peak = max(self.peak, rss_mb())
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def make_flight(path: Path, width: int, height: int, fps: int, seconds: int):
+    # Terrain texture the camera pans across; every 10s of flight ends with a 5s hover
+    rng = np.random.default_rng(0)
+    terrain = cv2.resize(
+        rng.integers(0, 255, (height // 8, width // 2, 3), dtype=np.uint8),
+        (width * 4, height), interpolation=cv2.INTER_CUBIC
+    )
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    x = 0
+    for i in range(fps * seconds):
+        hovering = (i // fps) % 10 >= 5
+        if not hovering:
+            x = (x + max(1, width // (fps * 4))) % (width * 3)
+        frame = terrain[:, x:x + width]
+        noise = rng.integers(-3, 4, frame.shape, dtype=np.int16)
+        writer.write(np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8))
+    writer.release()
+
+
+async def main(args):
+    async_mongo.litter_images.delegate = mongomock.MongoClient().db.litter_images
+    async_mongo.video_ingests.delegate = mongomock.MongoClient().db.video_ingests
+    # Stored keyframes also count into the daily summaries
+    async_mongo.detections_summary.delegate = mongomock.MongoClient().db.detections_summary
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        ImageService.storage = LocalStorage(tmp / "images")
+        VideoService.STAGING_PATH = tmp / "staging"
+        queue = JobQueue(tmp / "jobs.db")
+        video_service.get_job_queue = lambda: queue
+
+        source = tmp / "flight.mp4"
+        print(f"🎬 Synthesising {args.seconds}s of {args.width}x{args.height}@{args.fps} footage...")
+        make_flight(source, args.width, args.height, args.fps, args.seconds)
+        print(f"   {source.stat().st_size / 2**20:.1f} MB, {args.fps * args.seconds} frames")
+
+        import ultralytics.data.loaders  # noqa: F401  (heavy import; keep it out of the measurement)
+        baseline = rss_mb()
+        sampler = PeakRSS()
+        sampler.start()
+        start = time.perf_counter()
+        with open(source, "rb") as handle:
+            ingest = await VideoService.start_ingest(
+                UploadFile(file=handle, filename="flight.mp4"),
+                mission_id="mission_bench", vid_stride=args.stride, threshold=args.threshold
+            )
+        while (await VideoService.get_ingest(ingest["id"]))["status"] == "processing":
+            await asyncio.sleep(0.2)
+        elapsed = time.perf_counter() - start
+        sampler.stop()
+
+        result = await VideoService.get_ingest(ingest["id"])
+        stored = sum(1 for p in (tmp / "images").rglob("*.jpg"))
+        print(f"{'status':<16} {result['status']} {result['error'] or ''}")
+        print(f"{'frames decoded':<16} {result['frames_read']} (stride {args.stride})")
+        print(f"{'keyframes kept':<16} {result['keyframes']} ({stored} blobs, {len(queue.claim_batch('bench', 10**6))} jobs)")
+        print(f"{'wall time':<16} {elapsed:.1f}s ({result['frames_read'] / elapsed:.1f} sampled frames/s)")
+        print(f"{'peak RSS':<16} {sampler.peak:.0f} MB (+{sampler.peak - baseline:.0f} MB over baseline)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--stride", type=int, default=VideoService.VIDEO_STRIDE)
+    parser.add_argument("--threshold", type=int, default=VideoService.DEDUPE_THRESHOLD)
+    asyncio.run(main(parser.parse_args()))
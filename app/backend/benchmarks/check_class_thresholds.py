@@ -0,0 +1,163 @@
+"""
+Check for per-class confidence thresholds applied before NMS.
+
+Feeds the same raw YOLO outputs through two paths: per-class thresholds
+applied to the prediction tensor (apply_class_floor) followed by
+non_max_suppression at the lowest threshold, and plain non_max_suppression at
+that threshold with the per-class thresholds applied to the results
+afterwards. Both must keep exactly the same boxes; the report shows how many
+detections the in-model path stops from ever reaching Python (and Mongo).
+Synthetic outputs are used by default (8400 candidates per frame, as YOLOv8
+emits at 640px); with --model the same comparison runs end to end through
+LitterDetector on synthetic frames. Finally thresholds are stored through
+ThresholdService and a worker's ThresholdWatcher must pick the new version
+up. Mongo is replaced by mongomock.
+
+    python benchmarks/check_class_thresholds.py
+    python benchmarks/check_class_thresholds.py --model yolov8n.pt --images 64
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+import mongomock
+import numpy as np
+import torch
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+import db.async_mongo as async_mongo
+from back_app.ai.yolo_detection import LitterDetector, apply_class_floor
+from back_app.services.threshold_service import ThresholdService, ThresholdWatcher, class_thresholds
+
+
+def synthetic_predictions(frames: int, classes: int, candidates: int = 8400) -> torch.Tensor:
+    """
+    Raw detect-head output (frames, 4 + classes, candidates): xywh boxes in a 640px frame;
+    about 4% of candidates score one class anywhere in 0..1, the rest is background noise
+    """
+    generator = torch.Generator().manual_seed(0)
+    centres = torch.rand(frames, 2, candidates, generator=generator) * 640
+    sizes = 8 + torch.rand(frames, 2, candidates, generator=generator) * 120
+    scores = torch.rand(frames, classes, candidates, generator=generator) * 0.05
+    best_class = torch.randint(0, classes, (frames, 1, candidates), generator=generator)
+    scores.scatter_(1, best_class, torch.rand(frames, 1, candidates, generator=generator))
+    scores *= torch.rand(frames, 1, candidates, generator=generator) < 0.04
+    return torch.cat([centres, sizes, scores], 1)
+
+
+def check_nms(args, names, thresholds) -> bool:
+    from ultralytics.utils import ops
+
+    floor_conf = min([args.conf, *thresholds.values()])
+    floor = torch.tensor([thresholds.get(name, args.conf) for name in names])
+    raw = synthetic_predictions(args.images, len(names))
+    ops.non_max_suppression(raw[:1].clone(), floor_conf)  # warm up torchvision
+
+    start = time.perf_counter()
+    baseline = ops.non_max_suppression(raw.clone(), floor_conf, max_det=args.max_det)
+    after = [pred[pred[:, 4] > floor[pred[:, 5].long()]] for pred in baseline]
+    post_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    in_model = ops.non_max_suppression(apply_class_floor(raw.clone(), floor), floor_conf, max_det=args.max_det)
+    in_model_time = time.perf_counter() - start
+
+    same = all(torch.equal(a, b) for a, b in zip(in_model, after))
+    returned, kept = sum(map(len, baseline)), sum(map(len, in_model))
+    print(f"🧪 {args.images} frames of raw output, {len(thresholds)} of {len(names)} classes with their own threshold")
+    print(f"{'post-filter':<12} {returned} detections out of NMS, {kept} kept ({post_time * 1000:.0f} ms)")
+    print(f"{'in-model':<12} {kept} detections out of NMS ({in_model_time * 1000:.0f} ms)")
+    print(f"{'✅' if same else '❌'} Identical detections; {returned - kept} never leave the predictor")
+
+    end2end = torch.cat([
+        raw[:, :4, :300].transpose(1, 2), torch.rand(args.images, 300, 1),
+        torch.randint(0, len(names), (args.images, 300, 1)).float()
+    ], 2)
+    expected = [pred[(pred[:, 4] > floor_conf) & (pred[:, 4] > floor[pred[:, 5].long()])] for pred in end2end.clone()]
+    result = ops.non_max_suppression(apply_class_floor(end2end, floor, end2end=True), floor_conf, end2end=True)
+    same_end2end = all(torch.equal(a, b) for a, b in zip(result, expected))
+    print(f"{'✅' if same_end2end else '❌'} End-to-end (NMS-free) output filtered the same way")
+    return same and same_end2end
+
+
+def run_detector(detector: LitterDetector, images):
+    start = time.perf_counter()
+    detections = detector.detect_arrays(images)
+    return detections, time.perf_counter() - start
+
+
+def key(detection):
+    return (detection["class"], round(detection["confidence"], 5), tuple(round(v, 2) for v in detection["bbox"]))
+
+
+async def check_watcher() -> bool:
+    db = mongomock.MongoClient().db
+    async_mongo.ai_settings.delegate = db.ai_settings
+    watcher = ThresholdWatcher(db.ai_settings, refresh_seconds=0)
+
+    first = watcher.poll()
+    unchanged = watcher.poll()
+    await ThresholdService.update_config([{"class": "Plastic bottle", "conf": 0.6}], {"battery_pct": 25, "hold_pct": 75})
+    changed = watcher.poll()
+    served = await ThresholdService.get_config()
+
+    ok = (
+        first is not None and first["version"] == 0 and unchanged is None
+        and changed is not None and class_thresholds(changed) == {"Plastic bottle": 0.6}
+        and served["version"] == changed["version"] == 1
+    )
+    print(f"{'✅' if ok else '❌'} ThresholdWatcher: default config, no reload while unchanged, v1 picked up after PUT")
+    return ok
+
+
+def check_detector(args, thresholds) -> bool:
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(args.images)]
+    floor_conf = min([args.conf, *thresholds.values()])
+
+    filtered = LitterDetector(
+        model_path=args.model, batch_size=args.batch, conf=args.conf, device="cpu", class_thresholds=thresholds
+    )
+    baseline = LitterDetector(model_path=args.model, batch_size=args.batch, conf=floor_conf, device="cpu")
+    run_detector(filtered, images[:args.batch])  # warm up
+    run_detector(baseline, images[:args.batch])
+    in_model, in_model_time = run_detector(filtered, images)
+    raw, raw_time = run_detector(baseline, images)
+
+    after = [[d for d in dets if d["confidence"] > thresholds.get(d["class"], args.conf)] for dets in raw]
+    same = all(sorted(map(key, a)) == sorted(map(key, b)) for a, b in zip(in_model, after))
+    kept, returned = sum(map(len, in_model)), sum(map(len, raw))
+    print(f"🧪 {args.images} frames through LitterDetector ({args.model})")
+    print(f"{'post-filter':<12} {returned} detections returned, {kept} kept ({raw_time:.2f}s)")
+    print(f"{'in-model':<12} {kept} detections returned ({in_model_time:.2f}s)")
+    print(f"{'✅' if same else '❌'} Identical detections; {returned - kept} never leave the predictor")
+    return same
+
+
+def main(args) -> int:
+    if args.model:
+        names = list(LitterDetector(model_path=args.model, batch_size=1, device="cpu").names.values())
+    else:
+        names = [f"class_{i}" for i in range(60)]
+    random.seed(0)
+    thresholds = {name: round(random.uniform(args.conf, 0.95), 2) for name in random.sample(names, len(names) // 4)}
+
+    ok = check_detector(args, thresholds) if args.model else check_nms(args, names, thresholds)
+    ok &= asyncio.run(check_watcher())
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="Weights to run end to end (default: synthetic raw output)")
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--max-det", type=int, default=300)
+    parser.add_argument("--conf", type=float, default=0.25, help="Default conf for classes without a threshold")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,169 @@
+"""
+Consistency check for incremental training-data snapshots.
+
+Seeds reviewed images, takes a full snapshot and unpacks it with
+back_app/ai/apply_dataset_snapshot.py, then changes the data the ways the
+app does: new reviews, re-reviews that flip a verdict, edited bounding boxes,
+duplicate uploads, lease claims on pending images. It then takes a delta
+snapshot and applies it. The rebuilt local copy must match a fresh full export
+at the same high-water mark file for file, and the delta must carry only the
+touched samples. Runs with and without background images. Mongo is replaced
+by mongomock; storage by a temporary LocalStorage.
+
+    python benchmarks/check_export_snapshots.py
+"""
+import asyncio
+import filecmp
+import io
+import random
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+import mongomock
+import numpy as np
+from PIL import Image
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+import db.async_mongo as async_mongo
+from back_app.ai.apply_dataset_snapshot import apply_archive
+from back_app.services.export_service import ExportService
+from back_app.services.image_service import ImageService
+from back_app.services.storage import LocalStorage
+
+LABELS = ["Plastic bottle", "Drink can", "Cigarette"]
+
+
+def now():
+    from datetime import datetime
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def make_image(storage: LocalStorage, i: int) -> dict:
+    buffer = io.BytesIO()
+    Image.fromarray(np.random.default_rng(i).integers(0, 255, (64, 64, 3), dtype=np.uint8)).save(buffer, "JPEG")
+    content_hash = f"{i:064x}"
+    key = ImageService._blob_key(content_hash, ".jpg")
+    storage.path(key).parent.mkdir(parents=True, exist_ok=True)
+    storage.path(key).write_bytes(buffer.getvalue())
+    stamp = now()
+    return {
+        "id": f"img_{i:06d}", "storage_key": key, "content_hash": content_hash, "width": 64, "height": 64,
+        "image_url": f"/media/{key}", "mission_id": "mission_check", "captured_at": stamp, "review_status": "pending",
+        "location": {"type": "Point", "coordinates": [-0.12, 51.56]},
+        "bounding_boxes": [{"label": random.choice(LABELS), "confidence": 0.9, "x": 4, "y": 4, "width": 20, "height": 20}],
+        "classification": {"label": None, "confidence": None},
+        "human_review": {"is_litter": None}, "created_at": stamp, "updated_at": stamp
+    }
+
+
+async def save(version: int, target: Path):
+    with open(target, "wb") as handle:
+        async for chunk in await ExportService.stream_snapshot(version):
+            handle.write(chunk)
+
+
+async def full_export(snapshot: dict, target: Path):
+    with open(target, "wb") as handle:
+        async for chunk in ExportService.stream_yolo_zip(
+            val_percent=snapshot["val_percent"], include_background=snapshot["include_background"],
+            class_names=snapshot["class_names"], until=snapshot["high_water_mark"]
+        ):
+            handle.write(chunk)
+
+
+def same_tree(left: Path, right: Path) -> list:
+    problems = []
+    compare = filecmp.dircmp(left, right, ignore=["manifest.json"])
+    stack = [compare]
+    while stack:
+        current = stack.pop()
+        problems += [f"only local: {current.left}/{n}" for n in current.left_only]
+        problems += [f"missing locally: {current.right}/{n}" for n in current.right_only]
+        _, mismatch, errors = filecmp.cmpfiles(current.left, current.right, current.common_files, shallow=False)
+        problems += [f"differs: {current.left}/{n}" for n in mismatch + errors]
+        stack += current.subdirs.values()
+    return problems
+
+
+async def run(tmp: Path, include_background: bool) -> bool:
+    random.seed(1)
+    db = mongomock.MongoClient().db
+    async_mongo.litter_images.delegate = db.litter_images
+    async_mongo.dataset_snapshots.delegate = db.dataset_snapshots
+    for collection in ("litter_tiles", "detections_summary"):
+        getattr(async_mongo, collection).delegate = db[collection]
+    db.dataset_snapshots.create_index("version", unique=True)
+    storage = ImageService.storage = LocalStorage(tmp / "images")
+    ExportService.SNAPSHOT_LAG_SECONDS = 0
+
+    docs = [make_image(storage, i) for i in range(60)]
+    db.litter_images.insert_many(docs)
+    await ImageService.update_human_reviews([
+        {"id": doc["id"], "is_litter": i % 4 != 0, "litter_class": "plastic"} for i, doc in enumerate(docs[:40])
+    ])
+    await asyncio.sleep(0.01)
+
+    first = await ExportService.create_snapshot(full=True, include_background=include_background)
+    await save(first["version"], tmp / "v1.zip")
+    local = tmp / "local"
+    apply_archive(local, tmp / "v1.zip")
+    await asyncio.sleep(0.01)
+
+    # Touch the data: 5 new reviews, 3 flipped verdicts, 2 box edits, a reviewed duplicate, lease claims
+    await ImageService.update_human_reviews([{"id": doc["id"], "is_litter": True} for doc in docs[40:45]])
+    await ImageService.update_human_reviews([
+        {"id": doc["id"], "is_litter": not (i % 4 != 0)} for i, doc in enumerate(docs[:3])
+    ])
+    for doc in docs[5:7]:
+        await ImageService.update_bounding_boxes(doc["id"], [
+            {"label": "Drink can", "confidence": 1.0, "x": 10, "y": 10, "width": 30, "height": 30}
+        ])
+    duplicate = {**make_image(storage, 10), "id": "img_dup_10", "duplicate_of": docs[10]["id"]}
+    db.litter_images.insert_one(duplicate)
+    await ImageService.update_human_reviews([{"id": duplicate["id"], "is_litter": True}])
+    await ImageService.get_pending_images(limit=5, reviewer="checker")
+    await asyncio.sleep(0.01)
+
+    second = await ExportService.create_snapshot()
+    await save(second["version"], tmp / "v2.zip")
+    manifest = apply_archive(local, tmp / "v2.zip")
+
+    snapshot = db.dataset_snapshots.find_one({"version": second["version"]})
+    await full_export(snapshot, tmp / "full.zip")
+    fresh = tmp / "fresh"
+    with zipfile.ZipFile(tmp / "full.zip") as archive:
+        archive.extractall(fresh)
+
+    problems = same_tree(local, fresh)
+    with zipfile.ZipFile(tmp / "v2.zip") as archive:
+        delta_samples = sum("/images/" in name for name in archive.namelist())
+    touched = len(manifest["removed"]) + delta_samples
+    mode = "with background" if include_background else "litter only"
+    if problems or second["base_version"] != first["version"] or touched > 11:
+        print(f"❌ {mode}: {len(problems)} differences, {touched} touched samples")
+        for problem in problems[:10]:
+            print(f"   {problem}")
+        return False
+    print(
+        f"✅ {mode}: v{first['version']} full + v{second['version']} delta "
+        f"(+{manifest['added']} added, {manifest['changed']} changed, {len(manifest['removed'])} removed) "
+        f"== full export at the same high-water mark"
+    )
+    return True
+
+
+def main():
+    ok = True
+    for include_background in (True, False):
+        with tempfile.TemporaryDirectory() as tmp:
+            ok &= asyncio.run(run(Path(tmp), include_background))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
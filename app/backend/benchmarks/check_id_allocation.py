@@ -0,0 +1,196 @@
+"""
+Stress check for IdAllocator-based ids.
+
+Creates drones, bases, routes and roles (10k by default, plus a few users:
+bcrypt makes those slow) concurrently through the services while some of them
+are deleted and other "processes" reserve blocks from the same counters.
+Every create must succeed under the unique id indexes, and every id must be
+unique and in its collection's format. The same load is first run with the
+old count_documents() + 1 ids to show the collisions they produce.
+
+Mongo is replaced by mongomock behind a wrapper that serialises each call
+(the server applies every single-document write atomically) and adds network
+latency, so creates from many coroutines interleave as they would in
+production.
+
+    python benchmarks/check_id_allocation.py --entities 10000
+"""
+import argparse
+import asyncio
+import random
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+import mongomock
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+import db.async_mongo as async_mongo
+from db.mongo import INDEXES
+from back_app.models.base_models import BaseStationCreate, RouteCreate
+from back_app.models.drone_models import DroneCreate
+from back_app.models.role_models import RoleCreate
+from back_app.models.user_models import UserCreate
+from back_app.services.base_service import BaseService, RouteService
+from back_app.services.drone_service import DroneService
+from back_app.services.id_allocator import ID_FORMATS, IdAllocator, _id_pattern
+from back_app.services.role_service import RoleService
+from back_app.services.user_service import UserService
+
+SEQUENCED = ("drones", "bases", "routes", "roles")
+
+
+class ServerCollection:
+    """mongomock collection with a server's per-operation atomicity and a round-trip delay"""
+
+    _lock = threading.Lock()
+
+    def __init__(self, collection, latency_ms: float):
+        self._collection = collection
+        self._latency = latency_ms / 1000
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            time.sleep(self._latency)
+            with ServerCollection._lock:
+                return attr(*args, **kwargs)
+        return call
+
+
+def fresh_db(latency_ms: float):
+    db = mongomock.MongoClient().db
+    for name in (*SEQUENCED, "users", "counters"):
+        if name in INDEXES:
+            db[name].create_indexes(INDEXES[name])
+        getattr(async_mongo, name).delegate = ServerCollection(db[name], latency_ms)
+    async_mongo.async_db.delegate = db
+    for name in SEQUENCED:
+        async_mongo.async_db[name].delegate = getattr(async_mongo, name).delegate
+
+    # Records from before the allocator: seeded ids and a role without one
+    db.drones.insert_many([{"id": f"D{i:03d}", "name": f"Legacy {i}"} for i in range(1, 4)])
+    db.roles.insert_one({"name": "Admin", "description": "Full system access", "permissions": ["all"]})
+    IdAllocator._blocks.clear()
+    IdAllocator._seeded.clear()
+    IdAllocator._refill_locks.clear()
+    return db
+
+
+def create(kind: str, i: int):
+    if kind == "drones":
+        return DroneService.create_drone(DroneCreate(name=f"Drone {i}", base_assigned="B_001"))
+    if kind == "bases":
+        return BaseService.create_base(
+            BaseStationCreate(name=f"Base {i}", servicing_address=f"{i} High St", what3words="filled.count.soap")
+        )
+    if kind == "routes":
+        return RouteService.create_route(RouteCreate(name=f"Route {i}", distance="750m", base_assigned="B_001"))
+    return RoleService.create_role(RoleCreate(name=f"Role {i}", description="Stress", permissions=[]))
+
+
+def delete(kind: str, entity_id: str):
+    return {
+        "drones": DroneService.delete_drone, "bases": BaseService.delete_base,
+        "routes": RouteService.delete_route, "roles": RoleService.delete_role
+    }[kind](entity_id)
+
+
+async def count_based_create(kind: str, i: int):
+    # The ids the services built before IdAllocator
+    collection = getattr(async_mongo, kind)
+    prefix, suffix = ID_FORMATS[kind]
+    await collection.insert_one({"id": f"{prefix}{str(await collection.count_documents({}) + 1).zfill(3)}{suffix}"})
+
+
+async def other_process(reserved: list, rounds: int):
+    # Another API process drawing blocks from the same counters
+    for _ in range(rounds):
+        kind = random.choice(SEQUENCED)
+        counter = await async_mongo.counters.find_one_and_update(
+            {"_id": kind}, {"$inc": {"seq": IdAllocator.BLOCK_SIZE}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        reserved += [(kind, n) for n in range(counter["seq"] - IdAllocator.BLOCK_SIZE + 1, counter["seq"] + 1)]
+
+
+async def run(args, count_based: bool):
+    db = fresh_db(args.latency_ms)
+    random.seed(0)
+    created, collisions, deleted = [], 0, 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int):
+        nonlocal collisions, deleted
+        kind = SEQUENCED[i % len(SEQUENCED)]
+        async with semaphore:
+            try:
+                if count_based:
+                    await count_based_create(kind, i)
+                    return
+                entity = await create(kind, i)
+            except DuplicateKeyError:
+                collisions += 1
+                return
+            created.append((kind, entity.id))
+            if i % 7 == 0 and await delete(kind, entity.id):
+                deleted += 1
+
+    reserved = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(one(i) for i in range(args.entities)),
+        *([] if count_based else [other_process(reserved, 20) for _ in range(3)])
+    )
+    elapsed = time.perf_counter() - start
+
+    if count_based:
+        print(f"{'count-based':<12} {args.entities - collisions} created, {collisions} duplicate-id failures ({elapsed:.1f}s)")
+        return True
+
+    users = [
+        await UserService.create_user(UserCreate(username=f"user{i}", name=f"User {i}", access_rights="Admin", password="x"))
+        for i in range(args.users)
+    ] if args.users else []
+    created += [("users", user.id) for user in users]
+
+    ids = [entity_id for _, entity_id in created]
+    numbers = {(kind, int(re.match(_id_pattern(kind), entity_id).group(1))) for kind, entity_id in created}
+    well_formed = all(re.match(_id_pattern(kind), entity_id) for kind, entity_id in created)
+    legacy_kept = all(number > 3 for kind, number in numbers if kind == "drones")
+    ok = (
+        not collisions and len(set(ids)) == len(ids) == args.entities + len(users) and well_formed
+        and legacy_kept and not numbers & set(reserved)
+    )
+    counters = {doc["_id"]: doc["seq"] for doc in db.counters.find()}
+    print(
+        f"{'allocator':<12} {len(created)} created, {collisions} duplicate-id failures, {deleted} deleted meanwhile, "
+        f"{len(reserved)} numbers reserved by other processes ({elapsed:.1f}s)"
+    )
+    print(f"{'counters':<12} {counters}")
+    print(f"{'✅' if ok else '❌'} Every id unique, well-formed and above the seeded ones; no overlap with other processes")
+    return ok
+
+
+def main(args) -> int:
+    print(f"🧪 {args.entities} concurrent creates ({args.concurrency} in flight), {args.latency_ms}ms per round trip")
+    asyncio.run(run(argparse.Namespace(**{**vars(args), "entities": min(args.entities, 1000)}), count_based=True))
+    return 0 if asyncio.run(run(args, count_based=False)) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,138 @@
+"""
+Query-plan regression check for the hot litter_images and litter_tiles queries.
+
+Builds the db.mongo.INDEXES registry on a scratch database, seeds a few
+documents and explains every hot query. Fails (exit code 1) if any winning
+plan falls back to a COLLSCAN, or needs an in-memory SORT for a query that
+the registry is supposed to serve in index order. Needs a real MongoDB
+(MONGO_URI); mongomock cannot explain queries.
+
+    python benchmarks/check_query_plans.py
+"""
+import sys
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+from db.mongo import client, INDEXES, MONGO_DB_NAME
+
+SCRATCH_DB = f"{MONGO_DB_NAME}_plan_check"
+
+QUEUE_SORT = [("captured_at", 1), ("id", 1)]
+HISTORY_SORT = [("human_review.reviewed_at", -1), ("id", -1)]
+
+# (name, collection, filter, sort) - keep in step with ImageService's queries
+HOT_QUERIES = [
+    ("pending browse", "litter_images", {"review_status": "pending"}, QUEUE_SORT),
+    ("review queue claim", "litter_images", {"$or": [
+        {"review_status": "pending"},
+        {"review_status": "in_review", "lease.expires_at": {"$lte": "2025-08-01T12:30:00Z"}},
+    ]}, QUEUE_SORT),
+    ("reviewer's leases", "litter_images", {
+        "review_status": "in_review", "lease.reviewer": "admin", "lease.expires_at": {"$gt": "2025-08-01T12:30:00Z"}
+    }, QUEUE_SORT),
+    ("expired lease sweep", "litter_images", {
+        "review_status": "in_review", "lease.expires_at": {"$lte": "2025-08-01T12:30:00Z"}
+    }, None),
+    ("pending browse (deep page)", "litter_images", {
+        "review_status": "pending",
+        "$or": [
+            {"captured_at": {"$gt": "2025-08-01T12:30:00Z"}},
+            {"captured_at": "2025-08-01T12:30:00Z", "id": {"$gt": "img_00000031"}},
+        ],
+    }, QUEUE_SORT),
+    ("review history", "litter_images", {"review_status": "reviewed"}, HISTORY_SORT),
+    ("review history (deep page)", "litter_images", {
+        "review_status": "reviewed",
+        "$or": [
+            {"human_review.reviewed_at": {"$lt": "2025-08-02T12:30:00Z"}},
+            {"human_review.reviewed_at": "2025-08-02T12:30:00Z", "id": {"$lt": "img_00000030"}},
+        ],
+    }, HISTORY_SORT),
+    ("image by id", "litter_images", {"id": "img_00000001"}, None),
+    ("upload dedupe", "litter_images", {"content_hash": "0" * 64, "inferred_at": {"$ne": None}}, None),
+    ("mission images", "litter_images", {"mission_id": "mission_1"}, None),
+    ("drone images", "litter_images", {"drone_id": "drone_1"}, None),
+    ("images in area", "litter_images", {
+        "location": {"$geoWithin": {"$centerSphere": [[-0.12, 51.56], 1 / 6378.1]}}
+    }, None),
+    ("confirmed litter in box", "litter_images", {
+        "review_status": "reviewed", "human_review.is_litter": True,
+        "location": {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [[
+            [-0.13, 51.55], [-0.10, 51.55], [-0.10, 51.57], [-0.13, 51.57], [-0.13, 51.55]
+        ]]}}}
+    }, None),
+    ("heatmap cells", "litter_tiles", {
+        "level": 16, "x": {"$gte": 32740, "$lte": 32780}, "y": {"$gte": 25580, "$lte": 25620}, "count": {"$gt": 0}
+    }, None),
+]
+
+
+def plan_stages(plan):
+    """Flatten a winning plan (classic or SBE layout) into its stage names"""
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return [stage for stage in stages if stage]
+
+
+def seed(db):
+    for collection, models in INDEXES.items():
+        db[collection].create_indexes(models)
+
+    db.litter_images.insert_many([
+        {
+            "id": f"img_{i:08d}",
+            "mission_id": f"mission_{i % 5}",
+            "drone_id": f"drone_{i % 3}",
+            "captured_at": f"2025-08-01T12:{i % 60:02d}:00Z",
+            "review_status": ("pending", "reviewed", "in_review")[i % 3],
+            "lease": {"reviewer": f"reviewer_{i % 4}", "expires_at": f"2025-08-01T12:{i % 60:02d}:00Z"},
+            "human_review": {"is_litter": i % 2 == 0, "reviewed_at": f"2025-08-02T12:{i % 60:02d}:00Z"},
+            "location": {"type": "Point", "coordinates": [-0.12 + i / 1e4, 51.56]},
+        }
+        for i in range(200)
+    ])
+    db.litter_tiles.insert_many([
+        {"_id": f"16/{32760 + i % 20}/{25600 + i // 20}", "level": 16, "x": 32760 + i % 20, "y": 25600 + i // 20, "count": i}
+        for i in range(200)
+    ])
+
+
+def main():
+    client.drop_database(SCRATCH_DB)
+    db = client[SCRATCH_DB]
+    failures = 0
+
+    try:
+        seed(db)
+        for name, collection, query, sort in HOT_QUERIES:
+            cursor = db[collection].find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            stages = plan_stages(cursor.explain()["queryPlanner"]["winningPlan"])
+
+            problems = []
+            if "COLLSCAN" in stages:
+                problems.append("collection scan")
+            if sort and "SORT" in stages:
+                problems.append("in-memory sort")
+
+            if problems:
+                failures += 1
+                print(f"❌ {name}: {', '.join(problems)} ({' <- '.join(stages)})")
+            else:
+                print(f"✅ {name}: {' <- '.join(stages)}")
+    finally:
+        client.drop_database(SCRATCH_DB)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
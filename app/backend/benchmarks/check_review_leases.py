@@ -0,0 +1,199 @@
+"""
+Concurrency check for the leased review queue.
+
+Seeds a pending queue and lets 20 simulated reviewers claim, review and
+(occasionally) abandon batches in parallel through ImageService. Fails
+(exit code 1) if any image is handed to a second reviewer while the first
+one's lease is still running, or if abandoned leases are not reclaimed. Runs on
+mongomock by default, serialised behind a lock with per-call latency to
+model a server's single-document atomicity; pass --mongo to use MONGO_URI.
+
+    python benchmarks/check_review_leases.py --reviewers 20 --images 600
+"""
+import argparse
+import asyncio
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import mongomock
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+import db.async_mongo as async_mongo
+from back_app.services.image_service import ImageService
+
+SCRATCH_COLLECTION = "litter_images_lease_check"
+
+
+class SerializedCursor:
+    """mongomock cursor that reads all its results under the collection lock"""
+
+    def __init__(self, cursor, lock):
+        self._cursor = cursor
+        self._lock = lock
+
+    def sort(self, *args, **kwargs):
+        self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, *args, **kwargs):
+        self._cursor.limit(*args, **kwargs)
+        return self
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._cursor))
+
+
+class SerializedCollection:
+    """mongomock collection made thread-safe the way a server is: one operation at a time"""
+
+    def __init__(self, collection, latency_ms: float):
+        self._collection = collection
+        self._latency = latency_ms / 1000
+        self._lock = threading.Lock()
+
+    def find(self, *args, **kwargs):
+        return SerializedCursor(self._collection.find(*args, **kwargs), self._lock)
+
+    def find_one_and_update(self, filter, update, projection=None, sort=None, return_document=False, **kwargs):
+        # mongomock ignores `sort` when picking the document to update if the projection
+        # drops _id, and may return a different one; select by _id the way a server does
+        time.sleep(self._latency)
+        with self._lock:
+            doc = self._collection.find_one(filter, {"_id": 1}, sort=sort)
+            if doc is None:
+                return None
+            return self._collection.find_one_and_update(
+                {"_id": doc["_id"]}, update, projection=projection, return_document=return_document, **kwargs
+            )
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+
+        def method(*args, **kwargs):
+            time.sleep(self._latency)
+            with self._lock:
+                return attr(*args, **kwargs)
+
+        return method
+
+
+def seed(collection, images: int):
+    collection.insert_many([
+        {
+            "id": f"img_{i:06d}",
+            "image_url": f"/static/litter_images/{i}.jpg",
+            "mission_id": f"mission_{i % 7}",
+            "captured_at": f"2025-08-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}Z",
+            "classification": {"label": "plastic", "confidence": 0.9},
+            "review_status": "pending",
+            "human_review": {},
+        }
+        for i in range(images)
+    ])
+
+
+async def reviewer(name: str, batch: int, abandon_rate: float, claims: list, reviews: Counter):
+    while True:
+        # The lease runs at least from before the call; the claim happened before it returned
+        requested = time.monotonic()
+        items = await ImageService.get_pending_images(limit=batch, reviewer=name)
+        if not items:
+            return
+        claims.append((name, requested, time.monotonic(), [item["id"] for item in items]))
+
+        if random.random() < abandon_rate:
+            return  # walks away mid-batch; the lease must expire and be reclaimed
+
+        results, _ = await ImageService.update_human_reviews(
+            [{"id": item["id"], "is_litter": True, "reviewer": name} for item in items]
+        )
+        for result in results:
+            if result["saved"]:
+                reviews[result["id"]] += 1
+
+
+async def main(args):
+    if args.mongo:
+        from db.mongo import mongo_db
+        collection = mongo_db[SCRATCH_COLLECTION]
+        collection.drop()
+        async_mongo.litter_images.delegate = collection
+        async_mongo.detections_summary.delegate = mongo_db[f"{SCRATCH_COLLECTION}_summary"]
+        async_mongo.detections_summary.delegate.drop()
+    else:
+        collection = mongomock.MongoClient().db.litter_images
+        async_mongo.litter_images.delegate = SerializedCollection(collection, args.latency_ms)
+        # Reviews also adjust the daily summaries
+        async_mongo.detections_summary.delegate = SerializedCollection(
+            mongomock.MongoClient().db.detections_summary, args.latency_ms
+        )
+    seed(collection, args.images)
+    ImageService.REVIEW_LEASE_SECONDS = args.lease_seconds
+
+    print(f"🚀 {args.reviewers} reviewers, {args.images} images, batches of {args.batch}")
+    claims, reviews = [], Counter()
+    start = time.perf_counter()
+    try:
+        # First wave may abandon batches; the second wave picks up whatever they left behind
+        await asyncio.gather(*(
+            reviewer(f"reviewer_{i}", args.batch, args.abandon_rate, claims, reviews)
+            for i in range(args.reviewers)
+        ))
+        await asyncio.sleep(args.lease_seconds + 0.1)
+        released = await ImageService.release_expired_leases()
+        await asyncio.gather(*(
+            reviewer(f"reviewer_{i}", args.batch, 0.0, claims, reviews)
+            for i in range(args.reviewers)
+        ))
+        elapsed = time.perf_counter() - start
+    finally:
+        if args.mongo:
+            collection.drop()
+            async_mongo.detections_summary.delegate.drop()
+
+    failures = 0
+    holders = {}
+    overlaps = []
+    for name, requested, returned, ids in sorted(claims, key=lambda claim: claim[1]):
+        for image_id in ids:
+            previous = holders.get(image_id)
+            if previous and previous[0] != name and returned < previous[1] + args.lease_seconds:
+                overlaps.append(image_id)
+            holders[image_id] = (name, requested)
+    if overlaps:
+        failures += 1
+        print(f"❌ {len(overlaps)} images handed to a second reviewer during a live lease, e.g. {overlaps[:3]}")
+    if len(reviews) != args.images:
+        failures += 1
+        print(f"❌ {args.images - len(reviews)} images never reviewed (abandoned leases not reclaimed)")
+
+    per_reviewer = Counter()
+    for name, _, _, ids in claims:
+        per_reviewer[name] += len(ids)
+    print(f"{'leases released':<18} {released}")
+    print(f"{'reviewed':<18} {len(reviews)}/{args.images} in {elapsed:.2f}s")
+    print(f"{'late resubmits':<18} {sum(1 for n in reviews.values() if n > 1)} (review landed after the lease expired)")
+    print(f"{'per reviewer':<18} min {min(per_reviewer.values())}  max {max(per_reviewer.values())}")
+    if not failures:
+        print("✅ no image was held by two reviewers at once")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviewers", type=int, default=20)
+    parser.add_argument("--images", type=int, default=600)
+    parser.add_argument("--batch", type=int, default=6)
+    parser.add_argument("--abandon-rate", type=float, default=0.05)
+    parser.add_argument("--lease-seconds", type=int, default=2)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    parser.add_argument("--mongo", action="store_true", help="run against MONGO_URI instead of mongomock")
+    sys.exit(asyncio.run(main(parser.parse_args())))
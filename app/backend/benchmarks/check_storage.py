@@ -0,0 +1,115 @@
+"""
+Contract check for the storage backends in back_app/services/storage.py.
+
+Runs the same scenario against LocalStorage and S3Storage: a multipart
+upload committed under its content key, a duplicate commit, ranged reads,
+uri round-trips for the inference workers and deletes. S3 runs against
+moto's in-process S3 by default, or against MinIO/another S3-compatible
+server with --endpoint (credentials from the usual AWS environment).
+
+    python benchmarks/check_storage.py
+    python benchmarks/check_storage.py --endpoint http://localhost:9000 --bucket aerowaste-test
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+from contextlib import nullcontext
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(backend_dir))
+
+from back_app.services.storage import LocalStorage, S3Storage, StorageBackend
+
+MB = 1024 * 1024
+
+
+async def upload(storage: StorageBackend, payload: bytes, chunk: int = MB):
+    content_hash = hashlib.sha256(payload).hexdigest()
+    key = f"{content_hash[:2]}/{content_hash}.bin"
+    handle = await storage.open_upload()
+    try:
+        for start in range(0, len(payload), chunk):
+            await handle.write(payload[start:start + chunk])
+        return key, await handle.commit(key)
+    except BaseException:
+        await handle.abort()
+        raise
+
+
+async def collect(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+async def check(storage: StorageBackend) -> int:
+    failures = 0
+
+    def expect(name, ok):
+        nonlocal failures
+        print(f"{'✅' if ok else '❌'} {storage.name}: {name}")
+        failures += not ok
+
+    large = os.urandom(23 * MB + 123)  # several parts plus a short tail
+    small = os.urandom(1000)
+
+    key, created = await upload(storage, large)
+    expect("multipart upload commits under its key", created and await storage.exists(key))
+    expect("size reports the object length", await storage.size(key) == len(large))
+    expect("whole-object read matches", await storage.get(key) == large)
+    expect("ranged read matches", await collect(storage.stream(key, 5 * MB - 3, 9 * MB)) == large[5 * MB - 3:9 * MB + 1])
+    expect("open-ended range matches", await collect(storage.stream(key, len(large) - 10)) == large[-10:])
+
+    _, created_again = await upload(storage, large)
+    expect("duplicate upload is detected", created_again is False)
+
+    small_key, created = await upload(storage, small)
+    expect("single-part upload commits", created and await storage.get(small_key) == small)
+    source = storage.open_uri(storage.uri(small_key))
+    read_back = Path(source).read_bytes() if isinstance(source, str) else source.getvalue()
+    expect("uri round-trips for workers", read_back == small)
+
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(small)
+    try:
+        expect("put_file stores a new key", await storage.put_file("files/copy.bin", Path(f.name)))
+        expect("put_file skips an existing key", not await storage.put_file("files/copy.bin", Path(f.name)))
+    finally:
+        os.unlink(f.name)
+
+    for k in (key, small_key, "files/copy.bin"):
+        await storage.delete(k)
+    expect("delete removes objects", not await storage.exists(key) and await storage.size(small_key) is None)
+    return failures
+
+
+async def main(args):
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        failures += await check(LocalStorage(Path(tmp)))
+
+    if args.endpoint:
+        context = nullcontext()
+    else:
+        from moto import mock_aws
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+        context = mock_aws()
+
+    with context:
+        storage = S3Storage(bucket=args.bucket, prefix="check", endpoint_url=args.endpoint, part_size=5 * MB)
+        if not args.endpoint:
+            storage.client.create_bucket(Bucket=args.bucket)
+        failures += await check(storage)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", help="S3-compatible endpoint, e.g. a local MinIO (default: in-process moto)")
+    parser.add_argument("--bucket", default="aerowaste-storage-check")
+    sys.exit(asyncio.run(main(parser.parse_args())))
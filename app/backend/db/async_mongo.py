@@ -0,0 +1,166 @@
+"""
+Non-blocking access to the MongoDB collections for the FastAPI services.
+
+pymongo is synchronous, so every call is shipped to a dedicated thread pool
+sized to the client's connection pool; the event loop only ever awaits.
+The API mirrors Motor (``await coll.find_one(...)``,
+``await coll.find(...).sort(...).to_list(n)``, ``async for doc in cursor``)
+so the services stay unchanged if we move to an async driver later.
+"""
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from db import mongo
+
+# One thread per pooled connection: more threads would only queue on the pool
+_executor = ThreadPoolExecutor(
+    max_workers=mongo.MONGO_MAX_POOL_SIZE,
+    thread_name_prefix="mongo-io",
+)
+
+DEFAULT_BATCH_SIZE = 100
+
+
+async def run_sync(fn, *args, **kwargs):
+    """Run a blocking pymongo call on the Mongo I/O pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(fn, *args, **kwargs))
+
+
+class AsyncCursor:
+    """Awaitable wrapper around a pymongo cursor (find or aggregate)"""
+
+    def __init__(self, cursor=None, factory=None):
+        # Aggregations hit the server on creation, so they are built lazily off-loop
+        self._cursor = cursor
+        self._factory = factory
+        self._buffer = []
+
+    def _chain(self, method, *args, **kwargs):
+        if self._cursor is None:
+            raise TypeError(f"{method}() is not supported on aggregation cursors")
+        getattr(self._cursor, method)(*args, **kwargs)
+        return self
+
+    def sort(self, *args, **kwargs):
+        return self._chain("sort", *args, **kwargs)
+
+    def limit(self, *args, **kwargs):
+        return self._chain("limit", *args, **kwargs)
+
+    def skip(self, *args, **kwargs):
+        return self._chain("skip", *args, **kwargs)
+
+    def batch_size(self, *args, **kwargs):
+        return self._chain("batch_size", *args, **kwargs)
+
+    def hint(self, *args, **kwargs):
+        return self._chain("hint", *args, **kwargs)
+
+    def _materialize(self):
+        if self._cursor is None:
+            self._cursor = self._factory()
+        return self._cursor
+
+    def _take(self, length):
+        cursor = self._materialize()
+        if length is None:
+            return list(cursor)
+        return list(itertools.islice(cursor, length))
+
+    async def to_list(self, length=None):
+        """Fetch up to `length` documents (all of them if None) in one thread hop"""
+        docs, self._buffer = self._buffer, []
+        if length is not None:
+            if len(docs) >= length:
+                self._buffer = docs[length:]
+                return docs[:length]
+            length -= len(docs)
+        return docs + await run_sync(self._take, length)
+
+    async def explain(self):
+        return await run_sync(self._materialize().explain)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._buffer:
+            self._buffer = await run_sync(self._take, DEFAULT_BATCH_SIZE)
+            if not self._buffer:
+                raise StopAsyncIteration
+        return self._buffer.pop(0)
+
+
+class AsyncCollection:
+    """
+    Async facade over a pymongo Collection
+
+    Cursor-returning methods give an AsyncCursor; every other collection
+    method becomes a coroutine that runs on the Mongo I/O pool.
+    """
+
+    def __init__(self, collection):
+        self.delegate = collection
+
+    @property
+    def name(self):
+        return self.delegate.name
+
+    def find(self, *args, **kwargs) -> AsyncCursor:
+        # Building a pymongo cursor does no I/O; iteration does
+        return AsyncCursor(self.delegate.find(*args, **kwargs))
+
+    def aggregate(self, pipeline, **kwargs) -> AsyncCursor:
+        return AsyncCursor(factory=partial(self.delegate.aggregate, pipeline, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self.delegate, name)
+        if not callable(attr):
+            return attr
+
+        async def method(*args, **kwargs):
+            return await run_sync(attr, *args, **kwargs)
+
+        method.__name__ = name
+        return method
+
+
+class AsyncDatabase:
+    """Async facade over a pymongo Database; collections are cached wrappers"""
+
+    def __init__(self, database):
+        self.delegate = database
+        self._collections = {}
+
+    def __getitem__(self, name) -> AsyncCollection:
+        if name not in self._collections:
+            self._collections[name] = AsyncCollection(self.delegate[name])
+        return self._collections[name]
+
+    def __getattr__(self, name) -> AsyncCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+
+async_db = AsyncDatabase(mongo.mongo_db)
+
+# Collections
+litter_images = async_db["litter_images"]
+detections_summary = async_db["detections_summary"]
+mission_events = async_db["mission_events"]
+ai_model_versions = async_db["ai_model_versions"]
+users = async_db["users"]
+roles = async_db["roles"]
+bases = async_db["bases"]
+drones = async_db["drones"]
+routes = async_db["routes"]
+video_ingests = async_db["video_ingests"]
+litter_tiles = async_db["litter_tiles"]
+dataset_snapshots = async_db["dataset_snapshots"]
+ai_settings = async_db["ai_settings"]
+counters = async_db["counters"]
+telemetry = async_db["telemetry"]
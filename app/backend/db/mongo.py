@@ -1,12 +1,34 @@
-from pymongo import MongoClient
+import os
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING, GEOSPHERE
+from pymongo.errors import OperationFailure
 from passlib.hash import bcrypt
 from datetime import datetime
 
-# Connect to the default local MongoDB instance
-client = MongoClient("mongodb://localhost:27017")
+# Connection settings (docker-compose provides MONGO_URI)
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "AeroWaste")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+# Build missing indexes on startup; set to 0 to only report them (e.g. to build them off-peak)
+MONGO_AUTO_CREATE_INDEXES = os.getenv("MONGO_AUTO_CREATE_INDEXES", "1") == "1"
+
+# One client (and connection pool) per process
+client = MongoClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+)
 
 # Define the database
-mongo_db = client["AeroWaste"]
+mongo_db = client[MONGO_DB_NAME]
 
 # Collections
 litter_images = mongo_db["litter_images"]
@@ -18,11 +40,150 @@ roles = mongo_db["roles"]
 bases = mongo_db["bases"]
 drones = mongo_db["drones"]
 routes = mongo_db["routes"]
+video_ingests = mongo_db["video_ingests"]
+litter_tiles = mongo_db["litter_tiles"]
+dataset_snapshots = mongo_db["dataset_snapshots"]
+ai_settings = mongo_db["ai_settings"]
+counters = mongo_db["counters"]
+telemetry = mongo_db["telemetry"]
+
+# Drone telemetry is kept this long; the server drops older samples itself
+TELEMETRY_RETENTION_DAYS = int(os.getenv("AEROWASTE_TELEMETRY_RETENTION_DAYS", "30"))
+
+# Time-series collections: these must be created with their options before anything is written to them
+TIMESERIES = {
+    # one document per sample; stored in per-drone buckets, so a drone's track reads few blocks
+    "telemetry": {
+        "timeseries": {"timeField": "ts", "metaField": "meta", "granularity": "seconds"},
+        "expireAfterSeconds": TELEMETRY_RETENTION_DAYS * 86400,
+    },
+}
+
+# Index registry: every index the app's queries rely on, per collection
+INDEXES = {
+    # ids come from IdAllocator; sparse, as records seeded without one are served by _id
+    "users": [
+        IndexModel([("username", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True, sparse=True),
+        IndexModel([("id", ASCENDING)], unique=True, sparse=True),
+    ],
+    "roles": [
+        IndexModel([("name", ASCENDING)], unique=True),
+        IndexModel([("id", ASCENDING)], unique=True, sparse=True),
+    ],
+    "drones": [
+        IndexModel([("id", ASCENDING)], unique=True, sparse=True),
+    ],
+    "bases": [
+        IndexModel([("id", ASCENDING)], unique=True, sparse=True),
+    ],
+    "routes": [
+        IndexModel([("id", ASCENDING)], unique=True, sparse=True),
+    ],
+    "litter_images": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        # review queue: pending images oldest first, keyset-paged on (captured_at, id)
+        IndexModel([("review_status", ASCENDING), ("captured_at", ASCENDING), ("id", ASCENDING)]),
+        # review history: newest reviews first, keyset-paged on (reviewed_at, id)
+        IndexModel([("review_status", ASCENDING), ("human_review.reviewed_at", DESCENDING), ("id", DESCENDING)]),
+        # review leases: a reviewer's held images, and the expired-lease sweep
+        IndexModel([("review_status", ASCENDING), ("lease.reviewer", ASCENDING), ("captured_at", ASCENDING)]),
+        IndexModel([("review_status", ASCENDING), ("lease.expires_at", ASCENDING)]),
+        IndexModel([("location", GEOSPHERE)]),
+        IndexModel([("mission_id", ASCENDING)]),
+        IndexModel([("drone_id", ASCENDING)]),
+        IndexModel([("classification.label", ASCENDING)]),
+        # upload dedupe: find an earlier copy of the same bytes; training export walks it in order
+        IndexModel([("content_hash", ASCENDING), ("id", ASCENDING)]),
+        # export snapshot deltas: reviewed records changed since the previous high-water mark
+        IndexModel([("review_status", ASCENDING), ("updated_at", ASCENDING)]),
+    ],
+    "video_ingests": [
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+    "dataset_snapshots": [
+        IndexModel([("version", ASCENDING)], unique=True),
+    ],
+    # daily reports: a date range of per-day summaries (missions and the total are read by _id)
+    "detections_summary": [
+        IndexModel([("scope", ASCENDING), ("key", ASCENDING)]),
+    ],
+    # heatmap grid: the cells of one level inside a bounding box
+    "litter_tiles": [
+        IndexModel([("level", ASCENDING), ("x", ASCENDING), ("y", ASCENDING)]),
+    ],
+    "mission_events": [
+        IndexModel([("mission_id", ASCENDING)]),
+        IndexModel([("event_type", ASCENDING)]),
+    ],
+    # a drone's track over a time range
+    "telemetry": [
+        IndexModel([("meta.drone_id", ASCENDING), ("ts", ASCENDING)]),
+    ],
+}
+
+def _index_key(key_spec):
+    return tuple((field, direction) for field, direction in key_spec)
+
+def check_indexes():
+    """
+    Compare the registry against the live database
+
+    Returns {collection: [index names]} for every registered index that does not exist yet
+    """
+    missing = {}
+    for collection, models in INDEXES.items():
+        existing = {
+            _index_key(info["key"])
+            for info in mongo_db[collection].index_information().values()
+        }
+        names = [
+            model.document["name"] for model in models
+            if _index_key(model.document["key"].items()) not in existing
+        ]
+        if names:
+            missing[collection] = names
+    return missing
+
+def ensure_timeseries():
+    existing = set(mongo_db.list_collection_names())
+    for name, options in TIMESERIES.items():
+        if name not in existing:
+            mongo_db.create_collection(name, **options)
+
+def _create_indexes(collection: str, models: list):
+    """
+    Build a collection's indexes; a unique index that existing duplicates prevent
+    is reported and skipped rather than stopping startup
+    """
+    try:
+        mongo_db[collection].create_indexes(models)
+        return
+    except OperationFailure as e:
+        if e.code != 11000:
+            raise
+    # One at a time, so the duplicates only hold back their own index
+    for model in models:
+        try:
+            mongo_db[collection].create_indexes([model])
+        except OperationFailure as e:
+            if e.code != 11000:
+                raise
+            keys = ", ".join(model.document["key"])
+            fix = "run `python -m back_app.maintenance dedupe-ids`" if keys == "id" else "remove the duplicates"
+            print(f"⚠️ Unique index {model.document['name']} on {collection} not built, duplicate {keys} values exist: {fix}")
 
 def ensure_indexes():
-    mongo_db.users.create_index("username", unique=True)
-    mongo_db.users.create_index("email", unique=True, sparse=True)
-    mongo_db.roles.create_index("name", unique=True)
+    # Before the index check: building an index would create a plain collection in their place
+    ensure_timeseries()
+    missing = check_indexes()
+    for collection, names in missing.items():
+        print(f"⚠️ Missing indexes on {collection}: {', '.join(names)}")
+
+    if MONGO_AUTO_CREATE_INDEXES:
+        for collection, models in INDEXES.items():
+            _create_indexes(collection, models)
+    return missing
 
 def seed_admin():
     roles = mongo_db.roles
@@ -1,10 +1,4 @@
-from db.mongo import litter_images, mission_events
+from db.mongo import ensure_indexes
 
-# Index for 2D geolocation queries
-litter_images.create_index([("location", "2dsphere")])
-litter_images.create_index("mission_id")
-litter_images.create_index("classification.label")
-litter_images.create_index("review_status")
-
-mission_events.create_index("mission_id")
-mission_events.create_index("event_type")
+# Indexes (2dsphere location, review queue/history, mission/drone lookups) live in db.mongo.INDEXES
+ensure_indexes()
@@ -60,7 +60,9 @@ export default function LitterValidation() {
       <div style={{display:'grid', gridTemplateColumns:'repeat(3, 1fr)', gap:'12px'}}>
         {images.map(img => (
           <div key={img.id} style={{border:'1px solid #ddd', borderRadius:'6px', padding:'8px', background:'#fafafa'}}>
-            <img src={img.image_url} alt={img.id} style={{width:'100%', height:'180px', objectFit:'cover', borderRadius:'4px'}} />
+            <a href={img.preview_url || img.image_url} target="_blank" rel="noopener noreferrer">
+              <img src={img.thumbnail_url || img.image_url} alt={img.id} loading="lazy" style={{width:'100%', height:'180px', objectFit:'cover', borderRadius:'4px'}} />
+            </a>
             <div style={{fontSize:'0.9rem', marginTop:'6px', color:'#333'}}>
               <div><strong>ID:</strong> {img.id}</div>
               <div><strong>AI:</strong> {img.ai_class} ({Math.round((img.ai_conf||0)*100)}%)</div>
@@ -8,14 +8,21 @@ const headers = () => ({
 });
 
 // AI: Litter validation queue
+// Claims (leases) the images for this reviewer, so other reviewers get different ones
 export async function getNextImageBatch({ reviewer='admin', limit=6 } = {}) {
   const q = new URLSearchParams({ reviewer, limit });
-  const res = await fetch(`${BASE_URL}/ai/queue?${q.toString()}`);
+  const res = await fetch(`${BASE_URL}/ai/queue?${q.toString()}`, { credentials: 'include' });
+  return j(res);
+}
+export async function listPendingImages({ limit=20, cursor } = {}) {
+  const q = new URLSearchParams({ limit });
+  if (cursor) q.set('cursor', cursor);
+  const res = await fetch(`${BASE_URL}/ai/queue/pending?${q.toString()}`, { credentials: 'include' });
   return j(res);
 }
 export async function submitImageReview(payload) {
   const res = await fetch(`${BASE_URL}/ai/review`, {
-    method: 'POST', headers: headers(), body: JSON.stringify({ items: payload })
+    method: 'POST', headers: headers(), credentials: 'include', body: JSON.stringify({ items: payload })
   });
   return j(res);
 }
@@ -33,9 +40,10 @@ export async function updateInitiationThresholds(body) {
 }
 
 // AI: review history
-export async function getImageReviewHistory({ limit=20 } = {}) {
+export async function getImageReviewHistory({ limit=20, cursor } = {}) {
   const q = new URLSearchParams({ limit });
-  const res = await fetch(`${BASE_URL}/ai/review/history?${q.toString()}`);
+  if (cursor) q.set('cursor', cursor);
+  const res = await fetch(`${BASE_URL}/ai/review/history?${q.toString()}`, { credentials: 'include' });
   return j(res);
 }
 // AI: Image upload
@@ -65,6 +73,7 @@ export async function updateBoundingBoxes(imageId, boundingBoxes) {
   const res = await fetch(`${BASE_URL}/ai/bounding-boxes`, {
     method: 'POST',
     headers: headers(),
+    credentials: 'include',
     body: JSON.stringify({
       image_id: imageId,
       bounding_boxes: boundingBoxes
@@ -74,7 +83,7 @@ export async function updateBoundingBoxes(imageId, boundingBoxes) {
 }
 
 export async function getBoundingBoxes(imageId) {
-  const res = await fetch(`${BASE_URL}/ai/image/${imageId}/bounding-boxes`);
+  const res = await fetch(`${BASE_URL}/ai/image/${imageId}/bounding-boxes`, { credentials: 'include' });
   return j(res);
 }
 